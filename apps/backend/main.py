@@ -1,26 +1,103 @@
 # apps/backend/main.py
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from apps.backend import warmup
 
 from apps.backend.services.analysis_svc.api import router as analysis_router
 from apps.backend.services.marketdata_svc.api import router as marketdata_router
 from apps.backend.services.portfolio_svc.stubs import router as portfolio_router
 from apps.backend.services.etrade_api import router as etrade_router
+from apps.backend.services.stream_svc.api import router as stream_router
+from libs.utils import metrics
+from libs.utils.profiler import SamplingProfiler
 from dotenv import load_dotenv
 load_dotenv()
 
-app = FastAPI(title="AI Trading MVP")
+# allow ?profile=1 / X-Profile: 1
+PROFILE = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+PROFILES = Path("data/profiles")
+READY_PATHS = (Path("data/silver"), Path("data/gold"))
+# preload artifacts in the background; /readyz waits for it
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "API latency to response headers",
+                                    ["method", "route", "status"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP:
+        warmup.start()
+    else:
+        warmup.skip()
+    yield
+
+app = FastAPI(title="AI Trading MVP", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """Latency per route template; with PROFILE_REQUESTS on, a sampled profile of the whole
+    process (every thread, by name) while a flagged request runs."""
+    flagged = PROFILE and (request.query_params.get("profile") == "1"
+                           or request.headers.get("x-profile") == "1")
+    prof = SamplingProfiler().start() if flagged else None
+    t0, status = time.perf_counter(), 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(time.perf_counter() - t0, method=request.method,
+                                route=route.path if route is not None else "unmatched",
+                                status=status)
+        if prof is not None:
+            prof.stop()
+    if prof is not None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        out = PROFILES / f"{stamp}{request.url.path.replace('/', '_')}.process.folded"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(prof.folded())
+        response.headers["X-Profile"] = str(out)
+    return response
+
 app.include_router(analysis_router)
 app.include_router(marketdata_router)
 app.include_router(portfolio_router)
 app.include_router(etrade_router)
+app.include_router(stream_router)
+
+@app.get("/healthz", include_in_schema=False)
+def liveness():
+    """The process is up and serving; restart it only when this fails."""
+    return {"live": True}
+
+def _readiness() -> dict:
+    missing = [str(p) for p in READY_PATHS if not p.exists()]
+    return {"ready": warmup.STATE["ready"] and not missing, "missing": missing,
+            "warmup": warmup.STATE}
+
+@app.get("/readyz", include_in_schema=False)
+def readiness():
+    """200 once the startup warmup has run over existing silver/gold data; route traffic here
+    only then."""
+    body = _readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "live": True, **_readiness()}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
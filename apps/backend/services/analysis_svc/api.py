@@ -1,13 +1,14 @@
-from fastapi import APIRouter
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from pathlib import Path
-import pandas as pd
-from ml.registry.loader import load_model
-from ml.strategies.holdings_review import review_holdings
+
+if TYPE_CHECKING:  # pandas and the data layer load on the first request (or the startup warmup)
+    import pandas as pd
+    from libs.md.covariance import EwmCov
+    from ml.strategies.holdings_review import HoldingsReviewer
 
 router = APIRouter(prefix="/v1/analysis", tags=["analysis"])
-SILVER = Path("data/silver")
-GOLD = Path("data/gold")
 
 class KeepReplaceReq(BaseModel):
     account_id: str
@@ -16,22 +17,86 @@ class KeepReplaceReq(BaseModel):
     strategy: str = "momo_trend@0.1.0"
     symbols: list[str]
 
-@router.post("/portfolio/keep_or_replace")
-def keep_or_replace(req: KeepReplaceReq):
-    ohlcv = pd.read_parquet(SILVER / "ohlcv.parquet")
-    scores_path = GOLD / "scores_latest.parquet"
-    if scores_path.exists():
-        scores = pd.read_parquet(scores_path)
-    else:
-        name, _, ver = req.strategy.partition("@")
-        model, _ = load_model(name, ver or None)
-        scores = model.score(ohlcv)["scores"].to_frame(name=name)
-
-    review = review_holdings(ohlcv, req.symbols, benchmark=req.benchmark)
-
-    name = req.strategy.split("@")[0]
-    top = scores[name].sort_values(ascending=False)
-    candidates = [s for s in top.index if s not in set(req.symbols)][:3]
+class Portfolio(BaseModel):
+    account_id: str
+    symbols: list[str]
+
+class BatchKeepReplaceReq(BaseModel):
+    evaluation_date: str | None = None
+    benchmark: str = "SPY"
+    strategy: str = "momo_trend@0.1.0"
+    portfolios: list[Portfolio]
+
+@router.get("/strategies")
+def strategies():
+    from ml.registry.loader import get_registry
+    registry = get_registry()
+    return {name: registry.versions(name) for name in registry.names()}
+
+def _strategy(name: str) -> str:
+    from ml.registry.loader import get_registry
+    try:
+        return get_registry().resolve(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+def _reviewer(evaluation_date: str | None) -> HoldingsReviewer:
+    from apps.backend.services import artifacts
+    from ml.strategies.holdings_review import HoldingsReviewer
+    if evaluation_date:
+        return HoldingsReviewer(artifacts.ohlcv().slice(end=evaluation_date))
+    return artifacts.reviewer()
+
+def _scores(ref: str, evaluation_date: str | None) -> pd.Series:
+    from apps.backend.services import artifacts
+    scores = artifacts.scores()
+    if scores is not None and ref in scores.columns and not evaluation_date:
+        return scores[ref]
+    return artifacts.model_scores(ref, evaluation_date)
+
+def _covariance(evaluation_date: str | None) -> EwmCov | None:
+    """The gold EWMA matrix, unless it was built on data after ``evaluation_date``."""
+    import pandas as pd
+    from apps.backend.services import artifacts
+    cov = artifacts.covariance()
+    if cov is not None and evaluation_date and (cov.asof is None
+                                                or cov.asof > pd.Timestamp(evaluation_date)):
+        return None
+    return cov
+
+def _with_replacements(review: list[dict], held: list[str], scores: pd.Series,
+                       cov: EwmCov | None) -> list[dict]:
+    """Same candidates for every REPLACE row, diversified against the rows the portfolio keeps."""
+    from ml.strategies.holdings_review import replacement_candidates
+    candidates = []
+    if any(r["action"] == "REPLACE" for r in review):
+        keep = [r["symbol"] for r in review if r["action"] != "REPLACE"]
+        candidates = replacement_candidates(scores, held, keep, cov)
     for r in review:
         r["replacements"] = candidates if r["action"] == "REPLACE" else []
-    return {"as_of": str(ohlcv.index[-1].date()), "items": review}
+    return review
+
+@router.post("/portfolio/keep_or_replace")
+def keep_or_replace(req: KeepReplaceReq):
+    ref = _strategy(req.strategy)
+    reviewer = _reviewer(req.evaluation_date)
+    review = reviewer.review(req.symbols)
+    items = _with_replacements(review, req.symbols, _scores(ref, req.evaluation_date),
+                               _covariance(req.evaluation_date))
+    return {"as_of": str(reviewer.panel.dates[-1].date()), "strategy": ref, "items": items}
+
+@router.post("/portfolio/keep_or_replace/batch")
+def keep_or_replace_batch(req: BatchKeepReplaceReq):
+    """Many accounts against one evaluation date: shared data, one metrics pass."""
+    ref = _strategy(req.strategy)
+    reviewer = _reviewer(req.evaluation_date)
+    scores, cov = _scores(ref, req.evaluation_date), _covariance(req.evaluation_date)
+    reviews = reviewer.review_many({i: p.symbols for i, p in enumerate(req.portfolios)})
+    return {
+        "as_of": str(reviewer.panel.dates[-1].date()), "strategy": ref,
+        "accounts": [
+            {"account_id": p.account_id,
+             "items": _with_replacements(reviews[i], p.symbols, scores, cov)}
+            for i, p in enumerate(req.portfolios)
+        ],
+    }
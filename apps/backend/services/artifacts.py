@@ -0,0 +1,142 @@
+"""Process-wide cache of silver/gold artifacts shared by the API routers.
+
+Every artifact is loaded once and reused until its version token changes: the
+silver manifest (or legacy parquet) for OHLCV, the file mtime for gold files.
+Loads are single-flight, so N concurrent cold requests for a key run one load.
+Entries are evicted least recently used past ``ARTIFACT_CACHE_ENTRIES``, which
+bounds the per-``evaluation_date`` model scores clients can ask for.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+import pandas as pd
+
+from libs.md.covariance import COVARIANCE, EwmCov, load_covariance
+from libs.md.panel import Panel
+from libs.md.silver import ADJUSTMENTS, LEGACY, MANIFEST, STORE, read_panel
+from libs.utils import metrics
+from ml.registry.loader import get_registry
+from ml.strategies.holdings_review import HoldingsReviewer
+
+GOLD = Path("data/gold")
+SCORES = GOLD / "scores_latest.parquet"
+MAX_ENTRIES = int(os.getenv("ARTIFACT_CACHE_ENTRIES", "64"))
+LOAD_SECONDS = metrics.histogram("artifact_load_seconds", "Cold loads into the API artifact cache",
+                                 ["artifact"])
+
+
+class ArtifactCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self._loading: dict[Hashable, threading.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._loading.setdefault(key, threading.Lock())
+
+    def _hit(self, key: Hashable, version: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return True, entry[1]
+
+    def get(self, key: Hashable, version: Hashable, loader: Callable[[], Any]) -> Any:
+        hit, value = self._hit(key, version)
+        if hit:
+            return value
+        with self._key_lock(key):
+            hit, value = self._hit(key, version)
+            if hit:
+                return value
+            with self._lock:
+                self.stats["misses"] += 1
+            with LOAD_SECONDS.time(artifact=key[0] if isinstance(key, tuple) else key):
+                value = loader()
+            with self._lock:
+                self.stats["loads"] += 1
+                self._entries[key] = (version, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    old, _ = self._entries.popitem(last=False)
+                    self._loading.pop(old, None)
+                    self.stats["evictions"] += 1
+            return value
+
+    def peek(self, key: Hashable) -> Any:
+        """The cached value for ``key`` whatever its version, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+CACHE = ArtifactCache()
+metrics.collect("artifact_cache_total", "API artifact cache lookups and loads", ["event"],
+                lambda: dict(CACHE.stats))
+
+
+def file_version(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def ohlcv_version() -> Hashable:
+    """Token that changes whenever the silver OHLCV data changes."""
+    for path in (MANIFEST, LEGACY):
+        v = file_version(path)
+        if v is not None:
+            return path.name, v
+    return "store", file_version(STORE), file_version(ADJUSTMENTS)
+
+
+def ohlcv(fields: tuple[str, ...] = ("Close",)) -> Panel:
+    return CACHE.get(("ohlcv", fields), ohlcv_version(), lambda: read_panel(fields=list(fields)))
+
+
+def reviewer() -> HoldingsReviewer:
+    """Holdings reviewer on the current close panel; running maxes carry over reloads."""
+    prev = CACHE.peek("reviewer")
+    return CACHE.get("reviewer", ohlcv_version(), lambda: HoldingsReviewer(ohlcv(), prev=prev))
+
+
+def covariance() -> EwmCov | None:
+    version = file_version(COVARIANCE)
+    if version is None:
+        return None
+    return CACHE.get("covariance", version, load_covariance)
+
+
+def scores() -> pd.DataFrame | None:
+    version = file_version(SCORES)
+    if version is None:
+        return None
+    return CACHE.get("scores", version, lambda: pd.read_parquet(SCORES, memory_map=True))
+
+
+def model_scores(strategy: str, asof: str | None = None) -> pd.Series:
+    """Scores of ``name@version`` on the current silver data.
+
+    Memoized per (strategy@version, spec mtime, data version).
+    """
+    registry = get_registry()
+    ref, spec_mtime = registry.token(strategy)
+    def _score() -> pd.Series:
+        model, _ = registry.model(ref)
+        return model.score(ohlcv().slice(end=asof))["scores"]
+    return CACHE.get(("model_scores", ref, asof), (spec_mtime, ohlcv_version()), _score)
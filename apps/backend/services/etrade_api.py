@@ -4,18 +4,37 @@ from starlette.responses import RedirectResponse
 import os
 from fastapi import Body
 
-from libs.brokers.etrade.client import ETradeClient
-from libs.brokers.etrade.token_store import clear as token_clear
-
 from typing import Optional
 
 router = APIRouter(prefix="/v1/brokers/etrade", tags=["etrade"])
 
+# the broker clients (requests_oauthlib, httpx, oauthlib) load on the first E*TRADE call,
+# not at app import
+def get_client():
+    from libs.brokers.etrade.client import get_client
+    return get_client()
+
+def get_async_client():
+    from libs.brokers.etrade.aio import get_async_client
+    return get_async_client()
+
+def token_clear():
+    from libs.brokers.etrade.token_store import clear
+    clear()
+
+def _http_error(e: Exception) -> HTTPException:
+    """Upstream auth/limit statuses pass through; other E*TRADE failures are a bad gateway."""
+    from libs.brokers.etrade.client import ETradeAPIError
+    if isinstance(e, ETradeAPIError):
+        status = e.status_code if e.status_code in (401, 403, 404, 429) else 502
+        return HTTPException(status_code=status, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
 @router.get("/auth/start")
 def auth_start():
     """Begin OAuth 1.0a. If ETRADE_CALLBACK_URL == 'oob', return authorize_url + oauth_token for manual flow."""
     try:
-        client = ETradeClient()
+        client = get_client()
         oauth_token, _ = client.get_request_token()
         authorize_url = client.get_authorize_url(oauth_token)
         callback = os.environ.get("ETRADE_CALLBACK_URL", "").strip().lower()
@@ -30,7 +49,7 @@ def auth_start():
 def auth_callback(oauth_token: str = Query(...), oauth_verifier: str = Query(...)):
     """Callback endpoint E*TRADE redirects to with oauth_verifier; exchanges for access token."""
     try:
-        client = ETradeClient()
+        client = get_client()
         access_token, _ = client.get_access_token(oauth_token, oauth_verifier)
         return {"ok": True, "access_token_set": bool(access_token)}
     except Exception as e:
@@ -52,7 +71,7 @@ def auth_complete(payload: dict = Body(...)):
         oauth_verifier = payload.get("oauth_verifier")
         if not oauth_token or not oauth_verifier:
             raise HTTPException(status_code=422, detail="oauth_token and oauth_verifier are required")
-        client = ETradeClient()
+        client = get_client()
         access_token, _ = client.get_access_token(oauth_token, oauth_verifier)
         return {"ok": True, "access_token_set": bool(access_token)}
     except HTTPException:
@@ -72,11 +91,11 @@ def logout():
 @router.get("/accounts")
 def accounts():
     try:
-        client = ETradeClient()
+        client = get_client()
         data = client.list_accounts()
         return data
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _http_error(e)
 
 @router.get("/portfolio")
 def portfolio(
@@ -86,9 +105,10 @@ def portfolio(
     totalsRequired: Optional[bool] = Query(None),
     lotsRequired: Optional[bool] = Query(None),
     marketSession: Optional[str] = Query(None),
+    pageNumber: Optional[int] = Query(None),
 ):
     try:
-        client = ETradeClient()
+        client = get_client()
         data = client.get_portfolio(
             account_id_key=accountIdKey,
             view=view,
@@ -96,7 +116,25 @@ def portfolio(
             totals_required=totalsRequired,
             lots_required=lotsRequired,
             market_session=marketSession,
+            page_number=pageNumber,
         )
         return data
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise _http_error(e)
+
+@router.get("/positions")
+async def positions(view: str = Query("QUICK")):
+    """Positions across every account, all pages fetched concurrently, one row per symbol.
+    ``symbols`` can be passed straight to /v1/analysis/portfolio/keep_or_replace."""
+    try:
+        return await get_async_client().all_positions(view=view.upper())
+    except Exception as e:
+        raise _http_error(e)
+
+@router.get("/stats")
+def stats():
+    """Response-cache and rate-limiter counters."""
+    try:
+        return get_client().stats()
+    except Exception as e:
+        raise _http_error(e)
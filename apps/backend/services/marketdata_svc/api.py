@@ -1,38 +1,207 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import Literal, List
-import pandas as pd
-from libs.md.norgate.client import NorgateClient
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+
+if TYPE_CHECKING:  # numpy/pandas/pyarrow and the silver store load on first use
+    import numpy as np
+    import pandas as pd
+    from libs.md.norgate.client import NorgateClient
+    from libs.utils.cache import MemoCache
 
 router = APIRouter(prefix="/v1/md", tags=["marketdata"])
 
-class Bar(BaseModel):
-    ts: str; o: float; h: float; l: float; c: float; v: float
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+SHORT = {"Open": "o", "High": "h", "Low": "l", "Close": "c", "Volume": "v"}
+LONG = {v: k for k, v in SHORT.items()}
+
+BARS_CACHE = int(os.getenv("BARS_CACHE_MB", "256")) << 20
+
+# full-history bars per (symbol, adjust, data version); requests slice dates out of it
+_BARS: MemoCache | None = None
+_NORGATE: NorgateClient | None = None
+_LOCK = threading.Lock()
+
+def _bars_cache() -> MemoCache:
+    global _BARS
+    with _LOCK:
+        if _BARS is None:
+            from libs.utils.cache import MemoCache
+            _BARS = MemoCache(max_bytes=BARS_CACHE)
+        return _BARS
+
+def _norgate() -> NorgateClient:
+    global _NORGATE
+    with _LOCK:
+        if _NORGATE is None:
+            from libs.md.norgate.client import NorgateClient
+            _NORGATE = NorgateClient()
+        return _NORGATE
+
+def _split(values: list[str] | None) -> list[str]:
+    return [p.strip() for v in values or [] for p in v.split(",") if p.strip()]
+
+def _local_bars(symbols: list[str], adjust: str) -> dict[str, pd.DataFrame]:
+    from apps.backend.services import artifacts
+    from libs.md.silver import FIELDS, read_long
+    cache, version = _bars_cache(), artifacts.ohlcv_version()
+    out, missing = {}, []
+    for s in symbols:
+        df = cache.get(repr((s, adjust, version)), None)
+        if df is None:
+            missing.append(s)
+        else:
+            out[s] = df
+    if missing:
+        long = read_long(missing, FIELDS, adjust=adjust)
+        for s, df in long.groupby("symbol", observed=True):
+            df = df.drop(columns="symbol").set_index("date").sort_index()
+            cache.put(repr((str(s), adjust, version)), df)
+            out[str(s)] = df
+    return out
+
+def _remote_bars(symbols: list[str], start, end, adjust) -> dict[str, pd.DataFrame]:
+    from libs.md.silver import to_long
+    wide = _norgate().bars_eod(symbols, start=start, end=end, adjust=adjust)
+    long = to_long(wide)
+    return {str(s): df.drop(columns="symbol").set_index("date")
+            for s, df in long.groupby("symbol", observed=True)}
 
-class BarsResp(BaseModel):
-    symbol: str
-    adjust: Literal["CASHDIVIDENDS","TOTALRETURN","CAPITAL"]
-    bars: List[Bar]
+def _json_array(a: np.ndarray) -> str:
+    """JSON array text for a float column (NaN -> null), via pandas' C encoder."""
+    import pandas as pd
+    return pd.Series(a, copy=False).to_json(orient="values", double_precision=15)
 
-@router.get("/bars", response_model=BarsResp)
+def _json_dates(idx: pd.Index) -> str:
+    import numpy as np
+    return json.dumps(np.datetime_as_string(idx.to_numpy("datetime64[D]")).tolist())
+
+@router.get("/bars")
 def get_bars(
-    symbol: str = Query(...),
+    request: Request,
+    symbol: list[str] = Query(..., description="repeat or comma-separate for several symbols"),
+    fields: str = Query("o,h,l,c,v", description="subset of o,h,l,c,v"),
     start: str | None = Query(None, description="YYYY-MM-DD"),
     end: str | None = Query(None, description="YYYY-MM-DD"),
-    adjust: Literal["CASHDIVIDENDS","TOTALRETURN","CAPITAL"] = "CASHDIVIDENDS",
+    adjust: Literal["CASHDIVIDENDS","TOTALRETURN","CAPITAL","NONE"] = "CASHDIVIDENDS",
 ):
+    """Daily bars for one or more symbols, columnar.
+
+    JSON: ``{"series": {sym: {"ts": [...], "c": [...], ...}}}``; send
+    ``Accept: application/vnd.apache.arrow.stream`` for a long Arrow IPC stream.
+    Served from the silver store (raw bars x adjustment factors, for every
+    ``adjust``); only symbols it lacks go to Norgate. If that call fails, what
+    silver has is still served and ``source["failed"]`` lists the rest; the
+    error is only returned when nothing was found.
+    """
+    import numpy as np
+    from libs.md.silver import list_symbols
+    syms = list(dict.fromkeys(_split(symbol)))
+    short = _split([fields])
+    bad = [f for f in short if f not in LONG]
+    if bad or not short:
+        raise HTTPException(status_code=422, detail=f"unknown fields {bad}; use o,h,l,c,v")
+    cols = [LONG[f] for f in short]
     try:
-        nc = NorgateClient()
-        df: pd.DataFrame = nc.bars_eod([symbol], start=start, end=end, adjust=adjust)
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No data found")
-        ohlcv = df[symbol].reset_index().rename(columns={
-            "index": "ts", "Open":"o","High":"h","Low":"l","Close":"c","Volume":"v"
-        })
-        rows = [Bar(ts=r["ts"].strftime("%Y-%m-%d"), o=r["o"], h=r["h"], l=r["l"], c=r["c"], v=r["v"])
-                for _, r in ohlcv.iterrows()]
-        return BarsResp(symbol=symbol, adjust=adjust, bars=rows)
-    except HTTPException:
-        raise
+        local = set(list_symbols())
+        bars = _local_bars([s for s in syms if s in local], adjust)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    remote = [s for s in syms if s not in bars]
+    failed, error = [], None
+    if remote:
+        try:
+            bars.update(_remote_bars(remote, start, end, adjust))
+        except Exception as e:
+            failed, error = remote, f"norgate: {e}"
+    bars = {s: bars[s].loc[start:end, cols] for s in syms if s in bars}
+    bars = {s: df for s, df in bars.items() if not df.empty}
+    if not bars:
+        if error is not None:
+            raise HTTPException(status_code=502, detail=error)
+        raise HTTPException(status_code=404, detail="No data found")
+    source = {"silver": [s for s in bars if s not in remote],
+              "norgate": [s for s in bars if s in remote], "failed": failed}
+
+    if ARROW_MIME in request.headers.get("accept", ""):
+        import pandas as pd
+        import pyarrow as pa
+        frames = [df.reset_index().rename(columns={"date": "ts", **SHORT}).assign(symbol=s)
+                  for s, df in bars.items()]
+        table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True)[["symbol", "ts", *short]],
+                                     preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        headers = {"X-Adjust": adjust}
+        if failed:
+            headers["X-Failed"] = ",".join(failed)
+        return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MIME, headers=headers)
+
+    # assembled from per-column JSON fragments: json.dumps over float lists dominates otherwise
+    series = ",".join(
+        f'{json.dumps(s)}:{{"ts":{_json_dates(df.index)},'
+        + ",".join(f'"{f}":{_json_array(df[col].to_numpy(np.float64))}'
+                   for f, col in zip(short, cols))
+        + "}"
+        for s, df in bars.items()
+    )
+    head = json.dumps({"adjust": adjust, "fields": short, "source": source})[:-1]
+    return Response(f'{head},"series":{{{series}}}}}', media_type="application/json")
+
+def _spark_json(dates: pd.Index, close: np.ndarray) -> str:
+    return f'{{"ts":{_json_dates(dates)},"c":{_json_array(close)}}}'
+
+def _precomputed_sparklines() -> tuple[dict, dict[str, str]] | None:
+    """The gold sparkline table as ready-to-join JSON fragments, per file version."""
+    import numpy as np
+    import pandas as pd
+    from apps.backend.services import artifacts
+    from libs.md.sparklines import SPARKLINES, read_sparklines
+    def load():
+        got = read_sparklines(SPARKLINES)
+        if got is None:
+            return None
+        meta, df = got
+        return meta, {str(s): _spark_json(pd.DatetimeIndex(g["date"]), g["c"].to_numpy(np.float64))
+                      for s, g in df.groupby("symbol", observed=True, sort=False)}
+    version = artifacts.file_version(SPARKLINES)
+    return None if version is None else artifacts.CACHE.get("sparklines", version, load)
+
+@router.get("/sparklines")
+def get_sparklines(
+    symbol: list[str] = Query(..., description="repeat or comma-separate"),
+    points: int | None = Query(None, ge=2, le=1000, description="default SPARK_POINTS (64)"),
+):
+    """Downsampled (LTTB) trailing close series for many symbols in one response.
+
+    ``{"as_of", "points", "series": {sym: {"ts": [...], "c": [...]}}, "missing": [...]}``.
+    Served from the table precomputed after ingest; other point counts and
+    symbols it lacks are computed from the silver store. No Norgate fallback.
+    """
+    import numpy as np
+    import pandas as pd
+    from libs.md.silver import ADJUST, list_symbols
+    from libs.md.sparklines import DAYS, POINTS, lttb
+    points = points or POINTS
+    syms = list(dict.fromkeys(_split(symbol)))
+    pre = _precomputed_sparklines()
+    meta, frags = pre if pre is not None else ({"asof": None, "days": DAYS}, {})
+    series = {s: frags[s] for s in syms if s in frags} if meta.get("points") == points else {}
+    todo = [s for s in syms if s not in series]
+    if todo:
+        local = set(list_symbols())
+        for s, df in _local_bars([s for s in todo if s in local], ADJUST).items():
+            end = pd.Timestamp(meta["asof"]) if meta["asof"] else df.index[-1]
+            c = df.loc[end - pd.Timedelta(days=meta["days"]):end, "Close"].dropna()
+            if len(c):
+                keep = lttb(c.to_numpy(np.float64), points)
+                series[s] = _spark_json(c.index[keep], c.to_numpy(np.float64)[keep])
+    body = ",".join(f"{json.dumps(s)}:{series[s]}" for s in syms if s in series)
+    head = json.dumps({"as_of": meta["asof"], "points": points, "adjust": ADJUST,
+                       "missing": [s for s in syms if s not in series]})[:-1]
+    return Response(f'{head},"series":{{{body}}}}}', media_type="application/json")
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import traceback
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from libs.utils import metrics
+
+if TYPE_CHECKING:  # the scorer stack (pandas, models) loads when the first hub starts
+    from libs.md.feeds import Feed
+    from ml.strategies.streaming import StreamScorer
+
+router = APIRouter(prefix="/v1/stream", tags=["stream"])
+
+FEED = os.getenv("STREAM_FEED", "")   # spec format: libs.md.feeds
+INDEX = os.getenv("UNIVERSE_INDEX", "^SPX")
+QUEUE = int(os.getenv("STREAM_QUEUE", "1000"))   # events buffered per subscriber, oldest dropped
+PING = 15.0
+LATENCY = metrics.histogram("stream_latency_seconds", "Feed event received to scored and published",
+                            ["strategy"])
+
+def load_feed() -> Feed:
+    from libs.md.feeds import load_feed
+    return load_feed(FEED)
+
+def _scorer(ref: str) -> StreamScorer:
+    """Scorer on the persisted daily-scores state (built from silver if it lacks a key we need)."""
+    from apps.backend.services import artifacts
+    from libs.md.universe import load_membership
+    from ml.registry.loader import get_registry
+    from ml.strategies.holdings_review import KEYS as REVIEW_KEYS
+    from ml.strategies.online import OnlineFeatures, feature_keys, load_online
+    from ml.strategies.streaming import StreamScorer
+    model, _ = get_registry().model(ref)
+    keys = sorted(set(feature_keys(model)) | set(REVIEW_KEYS))
+    state = load_online("scores", keys)
+    if state is None:
+        state = OnlineFeatures(keys)
+        state.update(artifacts.ohlcv())
+    membership = load_membership(INDEX)
+    universe = membership.mask([state.asof], state.symbols) if membership is not None else None
+    return StreamScorer(state, model, ref, universe)
+
+def _state_version():
+    """Token that changes when the daily pipeline persists a new scores state
+    (or, while there is none, when silver changes)."""
+    from apps.backend.services import artifacts
+    from ml.strategies.online import ONLINE
+    v = artifacts.file_version(ONLINE / "scores.npz")
+    return ("scores", v) if v is not None else ("silver", artifacts.ohlcv_version())
+
+class Hub:
+    """One feed and scorer per strategy, fanned out to every SSE subscriber.
+
+    Bars that queue up while a batch is being scored are coalesced into the
+    next batch, so a burst costs one peek over the symbols it touched. The feed
+    runs only while someone is subscribed; the scorer (and its state) is kept
+    for the next subscriber, and rebuilt before a batch once the persisted state
+    has moved on. Once the feed has ended, late subscribers get the snapshot and
+    ``end`` instead of a restart.
+    """
+
+    def __init__(self, ref: str) -> None:
+        self.ref = ref
+        self.subscribers: set[asyncio.Queue] = set()
+        self.snapshot: dict[str, dict] = {}     # last score event per symbol, for new subscribers
+        self.task: asyncio.Task | None = None
+        self.scorer: StreamScorer | None = None
+        self.version = None                     # _state_version() the scorer was built on
+        self.ended = False
+        self.stats = {"bars": 0, "batches": 0, "events": 0, "dropped": 0, "latency_ms": None,
+                      "max_latency_ms": 0.0}
+
+    def start(self) -> None:
+        if not self.ended and (self.task is None or self.task.done()):
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    async def _refresh(self) -> None:
+        version = _state_version()
+        if self.scorer is None or version != self.version:
+            self.scorer = await asyncio.to_thread(_scorer, self.ref)
+            self.version = version
+
+    async def _run(self) -> None:
+        inbox: asyncio.Queue = asyncio.Queue()
+
+        async def pump(feed):
+            try:
+                async for bar in feed:
+                    inbox.put_nowait(bar)
+            finally:
+                inbox.put_nowait(None)
+
+        pump_task = None
+        try:
+            await self._refresh()
+            pump_task = asyncio.create_task(pump(load_feed()))
+            done = False
+            while not done:
+                batch = [await inbox.get()]
+                while not inbox.empty():
+                    batch.append(inbox.get_nowait())
+                if batch[-1] is None:
+                    batch.pop(); done = True
+                await self._refresh()
+                events = self.scorer.apply(batch)
+                self.stats["bars"] += len(batch); self.stats["batches"] += 1
+                if events and "latency_ms" in events[0]:
+                    lat = self.stats["latency_ms"] = events[0]["latency_ms"]
+                    self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], lat)
+                    LATENCY.observe(lat / 1e3, strategy=self.ref)
+                self.publish(events)
+            await pump_task
+            self.ended = True
+            self.publish([{"type": "end"}])
+        except Exception as e:
+            traceback.print_exc()
+            self.publish([{"type": "error", "detail": f"{type(e).__name__}: {e}"}])
+        finally:
+            if pump_task is not None and not pump_task.done():
+                pump_task.cancel()
+
+    def publish(self, events: list[dict]) -> None:
+        for e in events:
+            if e["type"] == "score":
+                self.snapshot[e["symbol"]] = e
+        self.stats["events"] += len(events)
+        for q in self.subscribers:
+            for e in events:
+                if q.full():
+                    q.get_nowait(); self.stats["dropped"] += 1
+                q.put_nowait(e)
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(QUEUE)
+        self.subscribers.add(q)
+        if self.ended:
+            q.put_nowait({"type": "end"})
+        self.start()
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        """Drop ``q``; the last one out stops the feed."""
+        self.subscribers.discard(q)
+        if not self.subscribers:
+            self.stop()
+
+_HUBS: dict[str, Hub] = {}
+
+def _hub(ref: str) -> Hub:
+    if ref not in _HUBS:
+        _HUBS[ref] = Hub(ref)
+    return _HUBS[ref]
+
+def _split(values: list[str] | None) -> set[str]:
+    return {p.strip() for v in values or [] for p in v.split(",") if p.strip()}
+
+def _sse(e: dict) -> str:
+    return f"event: {e['type']}\ndata: {json.dumps(e)}\n\n"
+
+@router.get("/insights")
+async def insights(request: Request, symbol: list[str] | None = Query(None),
+                   strategy: str = "momo_trend@0.1.0"):
+    """Server-sent events: provisional ``score`` per bar, ``action`` on KEEP/WATCH/REPLACE
+    changes, ``signals`` when the buy list moves. ``symbol`` (repeated or comma-separated)
+    filters per-symbol events."""
+    if not FEED:
+        raise HTTPException(status_code=503, detail="no live feed configured (STREAM_FEED)")
+    from ml.registry.loader import get_registry
+    try:
+        ref = get_registry().resolve(strategy)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    hub, wanted = _hub(ref), _split(symbol)
+
+    def keep(e: dict) -> bool:
+        return not wanted or "symbol" not in e or e["symbol"] in wanted
+
+    async def events():
+        q = hub.subscribe()
+        try:
+            for e in list(hub.snapshot.values()):
+                if keep(e):
+                    yield _sse(e)
+            while not await request.is_disconnected():
+                try:
+                    e = await asyncio.wait_for(q.get(), PING)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if keep(e):
+                    yield _sse(e)
+                if e["type"] in ("end", "error"):
+                    break
+        finally:
+            hub.unsubscribe(q)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/stats")
+def stats():
+    return {ref: {**hub.stats, "subscribers": len(hub.subscribers),
+                  "running": hub.task is not None and not hub.task.done()}
+            for ref, hub in _HUBS.items()}
@@ -0,0 +1,106 @@
+"""Background warmup run by the API lifespan.
+
+Routers import their data stack lazily, so the process is live (and answers
+``/healthz``) within a second of starting. This thread then pays the cold costs
+the first ``keep_or_replace`` would otherwise pay: the pandas/pyarrow/model
+imports, the strategy registry, the silver close panel and the holdings
+reviewer, the gold scores (memory-mapped), covariance and sparklines, and the
+model scores of ``WARMUP_STRATEGY`` when gold has no column for it. Everything
+lands in the shared artifact cache; ``/readyz`` turns 200 once it is done.
+
+A failed step is recorded in ``STATE`` and skipped: the route that needs it
+retries the load (and reports the error) on its own.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+import traceback
+
+STRATEGY = os.getenv("WARMUP_STRATEGY", "momo_trend@0.1.0")
+
+STATE: dict = {"ready": False, "started": None, "finished": None, "steps": {}, "error": None}
+_LOCK = threading.Lock()
+
+
+def _imports() -> None:
+    import pandas  # noqa: F401
+    import pyarrow.dataset  # noqa: F401
+    from apps.backend.services import artifacts  # noqa: F401
+    from ml.strategies import holdings_review, streaming  # noqa: F401
+
+
+def _registry() -> None:
+    from ml.registry.loader import get_registry
+    get_registry().model(STRATEGY)
+
+
+def _has_silver() -> bool:
+    from apps.backend.services import artifacts
+    return artifacts.ohlcv_version() != ("store", None, None)
+
+
+def _ohlcv() -> None:
+    from apps.backend.services import artifacts
+    if _has_silver():
+        artifacts.ohlcv()
+
+
+def _reviewer() -> None:
+    from apps.backend.services import artifacts
+    if _has_silver():
+        artifacts.reviewer()
+
+
+def _gold() -> None:
+    from apps.backend.services import artifacts
+    artifacts.scores()
+    artifacts.covariance()
+
+
+def _sparklines() -> None:
+    from apps.backend.services.marketdata_svc.api import _precomputed_sparklines
+    _precomputed_sparklines()
+
+
+def _model_scores() -> None:
+    from apps.backend.services.analysis_svc.api import _scores
+    from ml.registry.loader import get_registry
+    if _has_silver():
+        _scores(get_registry().resolve(STRATEGY), None)
+
+
+STEPS = [("imports", _imports), ("registry", _registry), ("ohlcv", _ohlcv), ("reviewer", _reviewer),
+         ("gold", _gold), ("sparklines", _sparklines), ("model_scores", _model_scores)]
+
+
+def run() -> dict:
+    """Run every step in order, recording seconds (or the error) per step."""
+    STATE.update(started=time.time(), finished=None, ready=False, steps={}, error=None)
+    for name, step in STEPS:
+        t0 = time.perf_counter()
+        try:
+            step()
+            STATE["steps"][name] = round(time.perf_counter() - t0, 4)
+        except Exception as e:
+            traceback.print_exc()
+            STATE["steps"][name] = None
+            STATE["error"] = STATE["error"] or f"{name}: {type(e).__name__}: {e}"
+    STATE.update(finished=time.time(), ready=True)
+    return STATE
+
+
+def start() -> threading.Thread | None:
+    """Start ``run`` in a daemon thread unless one is already running."""
+    with _LOCK:
+        if STATE["started"] is not None and STATE["finished"] is None:
+            return None
+        STATE.update(started=time.time(), finished=None, ready=False)
+        thread = threading.Thread(target=run, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+def skip() -> None:
+    """Warmup disabled: ready straight away, everything loads on first use."""
+    STATE.update(ready=True, started=None, finished=None, steps={}, error=None)
@@ -1,20 +1,13 @@
-import React, { useEffect, useState } from "react";
-import { KeepReplaceItem } from "../types";
+import React from "react";
+import { KeepReplaceItem, StreamScoreEvent } from "../types";
 import { InsightBadge } from "./InsightBadge";
 import { Sparkline } from "./Sparkline";
 
-export const InsightCard: React.FC<{ item: KeepReplaceItem }> = ({ item }) => {
+// spark: undefined while the page's batch sparkline request is in flight, null if it has no series
+// live: latest provisional intraday update, when a stream is running
+export const InsightCard: React.FC<{ item: KeepReplaceItem; spark?: number[] | null; live?: StreamScoreEvent }> = ({ item, spark, live }) => {
   const m = item.metrics;
-  const [spark, setSpark] = useState<number[] | null>(null);
-  useEffect(() => {
-    const d = new Date(); d.setMonth(d.getMonth() - 6);
-    const start = d.toISOString().slice(0,10);
-    fetch(`/v1/md/bars?symbol=${encodeURIComponent(item.symbol)}&start=${start}&adjust=CASHDIVIDENDS`)
-      .then(async r => { if (!r.ok) throw new Error(await r.text()); return r.json(); })
-      .then(data => setSpark((data.bars as any[]).map(b => b.c)))
-      .catch(() => setSpark(null));
-  }, [item.symbol]);
-  const pct = (x:number)=> (x*100).toFixed(1)+"%";
+  const pct = (x:number|null)=> x == null || !isFinite(x) ? "–" : (x*100).toFixed(1)+"%";
   return (
     <div style={{border:"1px solid #e5e7eb", borderRadius:8, padding:12, background:"#fff"}}>
       <div style={{display:"flex", justifyContent:"space-between", alignItems:"center", marginBottom:8}}>
@@ -22,8 +15,13 @@ export const InsightCard: React.FC<{ item: KeepReplaceItem }> = ({ item }) => {
         <InsightBadge action={item.action}/>
       </div>
       <div style={{display:"flex", gap:12, alignItems:"center", marginBottom:12}}>
-        {spark ? <Sparkline data={spark}/> : <div style={{fontSize:12,color:"#9ca3af"}}>loading…</div>}
+        {spark ? <Sparkline data={spark}/> : <div style={{fontSize:12,color:"#9ca3af"}}>{spark === undefined ? "loading…" : "no data"}</div>}
         <div style={{fontSize:12,color:"#6b7280"}}>as of {item.as_of}</div>
+        {live && (
+          <div style={{fontSize:12,color:"#2563eb"}}>
+            live {live.close.toFixed(2)} · rank {live.rank ?? "–"} · {live.latency_ms.toFixed(1)} ms
+          </div>
+        )}
       </div>
       <div style={{display:"grid", gridTemplateColumns:"repeat(4,1fr)", gap:8, fontSize:13}}>
         <div style={cell()}>Trend: <b>{m.trend_ok ? "OK" : "Broken"}</b></div>
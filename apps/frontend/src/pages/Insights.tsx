@@ -1,12 +1,47 @@
-import React, { useState } from "react";
-import { KeepReplaceResp } from "../types";
+import React, { useEffect, useState } from "react";
+import { KeepReplaceItem, KeepReplaceResp, SparklinesResp, StreamScoreEvent } from "../types";
 import { InsightCard } from "../components/InsightCard";
 
+// live values over the daily ones, except where the stream has none yet (null)
+const withLive = (it: KeepReplaceItem, e: StreamScoreEvent): KeepReplaceItem => {
+  const metrics = { ...it.metrics };
+  for (const [k, v] of Object.entries(e.metrics)) if (v != null) (metrics as any)[k] = v;
+  return { ...it, action: e.action, metrics, as_of: e.ts.replace("T", " ") };
+};
+
 export default function InsightsPage() {
   const [symbols, setSymbols] = useState("AAPL,MSFT,AMZN,TSLA");
   const [resp, setResp] = useState<KeepReplaceResp|null>(null);
+  const [sparks, setSparks] = useState<SparklinesResp|null|undefined>(undefined);
   const [loading, setLoading] = useState(false);
   const [err, setErr] = useState<string|null>(null);
+  const [live, setLive] = useState<Record<string, StreamScoreEvent>>({});
+
+  // one round trip for every card's sparkline; a response for an earlier Analyze is dropped
+  useEffect(() => {
+    if (!resp?.items.length) return;
+    let current = true;
+    const q = encodeURIComponent(resp.items.map(it => it.symbol).join(","));
+    fetch(`/v1/md/sparklines?symbol=${q}`)
+      .then(async s => { if (!s.ok) throw new Error(await s.text()); return s.json(); })
+      .then((s: SparklinesResp) => { if (current) setSparks(s); })
+      .catch(() => { if (current) setSparks(null); });
+    return () => { current = false; };
+  }, [resp]);
+
+  // provisional intraday updates for the analyzed symbols; the endpoint is 503 without a live feed
+  useEffect(() => {
+    if (!resp?.items.length) return;
+    const q = encodeURIComponent(resp.items.map(it => it.symbol).join(","));
+    const es = new EventSource(`/v1/stream/insights?symbol=${q}&strategy=momo_trend@0.1.0`);
+    es.addEventListener("score", (m) => {
+      const e: StreamScoreEvent = JSON.parse((m as MessageEvent).data);
+      setLive(prev => ({ ...prev, [e.symbol]: e }));
+    });
+    es.addEventListener("end", () => es.close());
+    es.onerror = () => { if (es.readyState !== EventSource.OPEN) es.close(); };
+    return () => es.close();
+  }, [resp]);
 
   const run = async () => {
     setLoading(true); setErr(null);
@@ -17,7 +52,8 @@ export default function InsightsPage() {
         body: JSON.stringify({ account_id: "demo", symbols: symbols.split(",").map(s=>s.trim()).filter(Boolean), benchmark: "SPY", strategy: "momo_trend@0.1.0" })
       });
       if (!r.ok) throw new Error(await r.text());
-      setResp(await r.json());
+      const data: KeepReplaceResp = await r.json();
+      setResp(data); setSparks(undefined); setLive({});
     } catch (e:any) { setErr(e.message ?? "request failed"); }
     finally { setLoading(false); }
   };
@@ -33,7 +69,14 @@ export default function InsightsPage() {
       </div>
       {err && <div style={{color:"#dc2626", marginBottom:8}}>{err}</div>}
       <div style={{display:"grid", gap:10}}>
-        {resp?.items.map(it => <InsightCard key={it.symbol} item={it} />)}
+        {resp?.items.map(it => {
+          const e = live[it.symbol];
+          return (
+            <InsightCard key={it.symbol} live={e}
+              item={e ? withLive(it, e) : it}
+              spark={sparks === undefined ? undefined : sparks?.series[it.symbol]?.c ?? null} />
+          );
+        })}
       </div>
     </div>
   );
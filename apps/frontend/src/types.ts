@@ -6,3 +6,24 @@ export type KeepReplaceItem = {
   replacements: string[];
 };
 export type KeepReplaceResp = { as_of: string; items: KeepReplaceItem[] };
+// /v1/stream/insights server-sent events
+export type StreamScoreEvent = {
+  type: "score"; symbol: string; ts: string; close: number; score: number | null; rank: number | null;
+  action: KeepReplaceItem["action"]; latency_ms: number;
+  // null while a symbol's intraday history is too short for the window
+  metrics: { [K in keyof KeepReplaceItem["metrics"]]: KeepReplaceItem["metrics"][K] | null };
+};
+export type BarSeries = { ts: string[]; o?: number[]; h?: number[]; l?: number[]; c?: number[]; v?: number[] };
+export type SparklinesResp = {
+  as_of: string | null;
+  points: number;
+  adjust: string;
+  missing: string[];
+  series: Record<string, { ts: string[]; c: number[] }>;
+};
+export type BarsResp = {
+  adjust: string;
+  fields: string[];
+  source: { silver: string[]; norgate: string[] };
+  series: Record<string, BarSeries>;
+};
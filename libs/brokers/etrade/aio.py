@@ -0,0 +1,180 @@
+"""Async E*TRADE client for fan-out reads (all accounts, all portfolio pages).
+
+Requests are signed with oauthlib directly (the same OAuth 1.0a HMAC-SHA1
+header ``OAuth1Session`` produces) and sent over one pooled ``httpx`` client per
+fan-out, with at most ``max_concurrency`` calls in flight.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+from oauthlib.oauth1 import Client as OAuth1Signer
+
+from libs.utils import metrics
+
+from .client import TIMEOUT, ETradeAPIError
+from .throttle import BUCKET, RETRIES, RETRY_STATUS, backoff
+from .token_store import generation as token_generation, load as token_load
+
+CONCURRENCY = int(os.environ.get("ETRADE_CONCURRENCY", "8"))
+PAGE_SIZE = 50  # E*TRADE's maximum portfolio page size
+
+
+def _as_list(x: Any) -> list:
+    if x is None:
+        return []
+    return x if isinstance(x, list) else [x]
+
+
+class AsyncETradeClient:
+    def __init__(self, base: Optional[str] = None, max_concurrency: int = CONCURRENCY,
+                 timeout: float = TIMEOUT) -> None:
+        self.consumer_key = os.environ.get("ETRADE_CONSUMER_KEY", "").strip()
+        self.consumer_secret = os.environ.get("ETRADE_CONSUMER_SECRET", "").strip()
+        if not self.consumer_key or not self.consumer_secret:
+            raise RuntimeError("Missing ETRADE_CONSUMER_KEY/ETRADE_CONSUMER_SECRET in environment.")
+        sandbox = os.environ.get("ETRADE_SANDBOX", "true").lower() == "true"
+        self.base = (base or ("https://apisb.etrade.com" if sandbox else "https://api.etrade.com")).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._signer: Optional[tuple[int, OAuth1Signer]] = None
+
+    def _sign(self, url: str) -> Dict[str, str]:
+        gen, entry = token_generation(), self._signer
+        if entry is None or entry[0] != gen:
+            t = token_load() or {}
+            if not t.get("access_token") or not t.get("access_token_secret"):
+                raise RuntimeError("No E*TRADE access token found. Complete OAuth flow first.")
+            signer = OAuth1Signer(
+                self.consumer_key, client_secret=self.consumer_secret,
+                resource_owner_key=t["access_token"],
+                resource_owner_secret=t["access_token_secret"],
+            )
+            entry = self._signer = (gen, signer)   # one assignment: readers see old or new, whole
+        _, headers, _ = entry[1].sign(url, http_method="GET")
+        return headers
+
+    async def _get(self, http: httpx.AsyncClient, sem: asyncio.Semaphore, path: str,
+                   params: Optional[Dict[str, Any]] = None) -> Dict:
+        url = str(httpx.URL(f"{self.base}{path}", params=params or None))
+        for attempt in range(RETRIES + 1):
+            async with sem:
+                wait = BUCKET.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                try:
+                    with metrics.UPSTREAM_SECONDS.time(upstream="etrade"):
+                        r = await http.get(url, headers={"Accept": "application/json",
+                                                         **self._sign(url)})
+                except Exception:
+                    metrics.UPSTREAM_CALLS.inc(upstream="etrade", status="error")
+                    raise
+                metrics.UPSTREAM_CALLS.inc(upstream="etrade", status=r.status_code)
+                metrics.BYTES_READ.inc(len(r.content), source="etrade")
+            if r.status_code not in RETRY_STATUS or attempt == RETRIES:
+                break
+            BUCKET.note_retry()
+            await asyncio.sleep(backoff(attempt, r.headers.get("Retry-After")))
+        if r.status_code == 204:  # E*TRADE's answer for an empty portfolio
+            return {}
+        if r.is_error:
+            raise ETradeAPIError(r.status_code, r.text)
+        return r.json()
+
+    async def _accounts(self, http, sem) -> List[Dict]:
+        data = await self._get(http, sem, "/v1/accounts/list.json")
+        accounts = _as_list(data.get("AccountListResponse", {}).get("Accounts", {}).get("Account"))
+        return [a for a in accounts if a.get("accountStatus", "ACTIVE") != "CLOSED"]
+
+    async def _portfolio(self, http, sem, account_id_key: str, view: str) -> List[Dict]:
+        """Every position of one account: page 1 first, the remaining pages concurrently."""
+        path = f"/v1/accounts/{account_id_key}/portfolio.json"
+        params = {"view": view, "count": PAGE_SIZE}
+
+        def positions(data: Dict) -> tuple[list, int]:
+            out, pages = [], 1
+            for p in _as_list(data.get("PortfolioResponse", {}).get("AccountPortfolio")):
+                out += _as_list(p.get("Position"))
+                pages = max(pages, int(p.get("totalPages") or 1))
+            return out, pages
+
+        first, pages = positions(await self._get(http, sem, path, params))
+        rest = await asyncio.gather(*(self._get(http, sem, path, {**params, "pageNumber": n})
+                                      for n in range(2, pages + 1)))
+        return first + [p for data in rest for p in positions(data)[0]]
+
+    async def all_positions(self, view: str = "QUICK") -> Dict:
+        """Accounts plus the normalized, deduplicated positions across all of them."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as http:
+            accounts = await self._accounts(http, sem)
+            portfolios = await asyncio.gather(*(self._portfolio(http, sem, a["accountIdKey"], view)
+                                                for a in accounts))
+        by_account = {a["accountIdKey"]: unique_positions(ps)
+                      for a, ps in zip(accounts, portfolios)}
+        positions = aggregate_positions(by_account)
+        return {
+            "accounts": [{"accountIdKey": a["accountIdKey"], "accountId": a.get("accountId"),
+                          "accountDesc": a.get("accountDesc"),
+                          "positions": len(by_account[a["accountIdKey"]])}
+                         for a in accounts],
+            "positions": positions,
+            "symbols": [p["symbol"] for p in positions
+                        if p["security_type"] in ("EQ", "ETF", "MF")],
+        }
+
+
+def unique_positions(positions: List[Dict]) -> List[Dict]:
+    """One account's positions with those repeated across pages (same ``positionId``) once."""
+    seen: set = set()
+    out = []
+    for p in positions:
+        pid = p.get("positionId")
+        if pid is not None and pid in seen:
+            continue
+        seen.add(pid)
+        out.append(p)
+    return out
+
+
+def aggregate_positions(by_account: Dict[str, List[Dict]]) -> List[Dict]:
+    """One row per symbol across accounts; positions repeated across pages count once."""
+    rows: Dict[str, Dict] = {}
+    for account, positions in by_account.items():
+        for p in unique_positions(positions):
+            product = p.get("Product") or {}
+            symbol = (product.get("symbol") or p.get("symbolDescription") or "").upper()
+            if not symbol:
+                continue
+            row = rows.setdefault(symbol, {
+                "symbol": symbol, "security_type": product.get("securityType", "EQ"),
+                "quantity": 0.0, "market_value": 0.0, "total_cost": 0.0,
+                "last_price": None, "accounts": [],
+            })
+            row["quantity"] += float(p.get("quantity") or 0)
+            row["market_value"] += float(p.get("marketValue") or 0)
+            row["total_cost"] += float(p.get("totalCost") or 0)
+            last = (p.get("Quick") or {}).get("lastTrade")
+            if last is not None:
+                row["last_price"] = float(last)
+            if account not in row["accounts"]:
+                row["accounts"].append(account)
+    return sorted(rows.values(), key=lambda r: -r["market_value"])
+
+
+_CLIENT: Optional[AsyncETradeClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_async_client() -> AsyncETradeClient:
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = AsyncETradeClient()
+    return _CLIENT
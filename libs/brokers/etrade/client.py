@@ -1,15 +1,52 @@
 from __future__ import annotations
 import os
+import threading
+import time
 import urllib.parse as urlparse
+import weakref
 from typing import Dict, Tuple, Optional, Any
 
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth1Session
 
-from .token_store import load as token_load, save as token_save
+from libs.utils import metrics
+from .throttle import BUCKET, RETRIES, RETRY_STATUS, BrokerCache, backoff
+from .token_store import generation as token_generation, load as token_load, save as token_save
+
+POOL_SIZE = int(os.environ.get("ETRADE_POOL_SIZE", "10"))
+TIMEOUT = float(os.environ.get("ETRADE_TIMEOUT", "30"))
+
+# response caches of the live clients; the collector sums them without keeping any alive
+_CACHES: "weakref.WeakSet[BrokerCache]" = weakref.WeakSet()
+
+
+def _cache_stats() -> Dict[str, float]:
+    total: Dict[str, float] = {}
+    for cache in list(_CACHES):
+        for event, n in cache.stats.items():
+            total[event] = total.get(event, 0) + n
+    return total
+
+
+metrics.collect("etrade_cache_total", "E*TRADE response cache outcomes", ["event"], _cache_stats)
+
+
+class ETradeAPIError(RuntimeError):
+    """Non-2xx answer from E*TRADE after retries; ``status_code`` is the upstream status."""
+
+    def __init__(self, status_code: int, body: str = "") -> None:
+        super().__init__(f"E*TRADE API error {status_code}: {body[:2000]}")
+        self.status_code = status_code
+        self.body = body
 
 
 class ETradeClient:
-    """Minimal E*TRADE API client (OAuth 1.0a)."""
+    """Minimal E*TRADE API client (OAuth 1.0a).
+
+    One instance is meant to live for the whole process (see ``get_client``):
+    every session it hands out mounts the same keep-alive connection pool, and
+    signed sessions are kept per thread until the stored tokens change.
+    """
 
     def __init__(self) -> None:
         self.consumer_key = os.environ.get("ETRADE_CONSUMER_KEY", "").strip()
@@ -25,10 +62,20 @@ class ETradeClient:
         self.base = "https://apisb.etrade.com" if self.sandbox else "https://api.etrade.com"
         self.authorize_base = "https://us.etrade.com"
 
+        # urllib3 pools are thread-safe; OAuth1Session objects are not shared across threads
+        self._adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE)
+        self._local = threading.local()
+        self.cache = BrokerCache()
+        _CACHES.add(self.cache)
+
+    def _mount(self, sess: OAuth1Session) -> OAuth1Session:
+        sess.mount("https://", self._adapter)
+        return sess
+
     def get_request_token(self) -> Tuple[str, str]:
-        oauth = OAuth1Session(
+        oauth = self._mount(OAuth1Session(
             self.consumer_key, client_secret=self.consumer_secret, callback_uri=self.callback_url
-        )
+        ))
         resp = oauth.fetch_request_token(f"{self.base}/oauth/request_token")
         token_save(resp)
         return resp["oauth_token"], resp["oauth_token_secret"]
@@ -40,13 +87,13 @@ class ETradeClient:
     def get_access_token(self, oauth_token: str, oauth_verifier: str) -> Tuple[str, str]:
         stored = token_load() or {}
         resource_owner_secret = stored.get("oauth_token_secret", "")
-        oauth = OAuth1Session(
+        oauth = self._mount(OAuth1Session(
             self.consumer_key,
             client_secret=self.consumer_secret,
             resource_owner_key=oauth_token,
             resource_owner_secret=resource_owner_secret,
             verifier=oauth_verifier,
-        )
+        ))
         resp = oauth.fetch_access_token(f"{self.base}/oauth/access_token")
         token_save(
             {
@@ -59,34 +106,60 @@ class ETradeClient:
         return resp["oauth_token"], resp["oauth_token_secret"]
 
     def _signed(self) -> OAuth1Session:
+        """This thread's signed session, rebuilt only after ``token_store.save``/``clear``."""
+        gen = token_generation()
+        cached = getattr(self._local, "signed", None)
+        if cached is not None and cached[0] == gen:
+            return cached[1]
         t = token_load() or {}
         at = t.get("access_token", "")
         ats = t.get("access_token_secret", "")
         if not at or not ats:
             raise RuntimeError("No E*TRADE access token found. Complete OAuth flow first.")
-        return OAuth1Session(
+        sess = self._mount(OAuth1Session(
             self.consumer_key,
             client_secret=self.consumer_secret,
             resource_owner_key=at,
             resource_owner_secret=ats,
-        )
+        ))
+        self._local.signed = (gen, sess)
+        return sess
 
     def _signed_get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict:
+        """Rate-limited signed GET; 429/5xx are retried with exponential backoff."""
         sess = self._signed()
-        r = sess.get(url, params=params or None, headers={"Accept": "application/json"})
-        try:
-            r.raise_for_status()
-        except Exception as e:
-            body = r.text[:2000] if hasattr(r, "text") else ""
-            raise RuntimeError(f"E*TRADE API error {r.status_code}: {body}") from e
+        for attempt in range(RETRIES + 1):
+            BUCKET.acquire()
+            try:
+                with metrics.UPSTREAM_SECONDS.time(upstream="etrade"):
+                    r = sess.get(url, params=params or None,
+                                 headers={"Accept": "application/json"}, timeout=TIMEOUT)
+            except Exception:
+                metrics.UPSTREAM_CALLS.inc(upstream="etrade", status="error")
+                raise
+            metrics.UPSTREAM_CALLS.inc(upstream="etrade", status=r.status_code)
+            metrics.BYTES_READ.inc(len(r.content), source="etrade")
+            if r.status_code not in RETRY_STATUS or attempt == RETRIES:
+                break
+            BUCKET.note_retry()
+            time.sleep(backoff(attempt, r.headers.get("Retry-After")))
+        if not r.ok:
+            raise ETradeAPIError(r.status_code, r.text if hasattr(r, "text") else "")
         try:
             return r.json()
         except Exception:
             return {"raw": r.text}
 
+    def _cached_get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict:
+        key = (url, tuple(sorted((params or {}).items())), token_generation())
+        return self.cache.get(key, lambda: self._signed_get(url, params))
+
+    def stats(self) -> Dict[str, Dict]:
+        return {"cache": dict(self.cache.stats), "throttle": dict(BUCKET.stats)}
+
     def list_accounts(self) -> Dict:
         url = f"{self.base}/v1/accounts/list.json"
-        return self._signed_get(url)
+        return self._cached_get(url)
 
     def get_portfolio(
         self,
@@ -96,6 +169,7 @@ class ETradeClient:
         totals_required: Optional[bool] = None,
         lots_required: Optional[bool] = None,
         market_session: Optional[str] = None,
+        page_number: Optional[int] = None,
     ) -> Dict:
         url = f"{self.base}/v1/accounts/{account_id_key}/portfolio.json"
         params: Dict[str, Any] = {}
@@ -124,5 +198,21 @@ class ETradeClient:
             params["lotsRequired"] = str(bool(lots_required)).lower()
         if market_session:
             params["marketSession"] = market_session
+        if page_number is not None:
+            params["pageNumber"] = int(page_number)
+
+        return self._cached_get(url, params=params)
+
+
+_CLIENT: Optional[ETradeClient] = None
+_CLIENT_LOCK = threading.Lock()
+
 
-        return self._signed_get(url, params=params)
+def get_client() -> ETradeClient:
+    """Process-wide client, created on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = ETradeClient()
+    return _CLIENT
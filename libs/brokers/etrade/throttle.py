@@ -0,0 +1,148 @@
+"""Rate limiting and response caching shared by the E*TRADE clients.
+
+``BUCKET`` is a process-wide token bucket every upstream call reserves from,
+so sync and async callers share one budget. ``BrokerCache`` serves fresh
+entries for ``ttl`` seconds, then stale ones for up to ``stale_ttl`` more while
+a background refresh runs; concurrent misses on one key share a single
+upstream call. Expired entries are pruned on insert and at most ``max_entries``
+are kept, oldest write first out.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from libs.utils import metrics
+
+RATE = float(os.environ.get("ETRADE_RATE", "2"))         # sustained requests / second
+BURST = int(os.environ.get("ETRADE_BURST", "4"))
+RETRIES = int(os.environ.get("ETRADE_RETRIES", "3"))
+BACKOFF = float(os.environ.get("ETRADE_BACKOFF", "0.5"))  # seconds, doubled per retry
+CACHE_TTL = float(os.environ.get("ETRADE_CACHE_TTL", "15"))
+STALE_TTL = float(os.environ.get("ETRADE_STALE_TTL", "60"))
+CACHE_ENTRIES = int(os.environ.get("ETRADE_CACHE_ENTRIES", "1024"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based); honours a numeric Retry-After."""
+    try:
+        return max(float(retry_after), 0.0) if retry_after else BACKOFF * 2 ** attempt
+    except ValueError:
+        return BACKOFF * 2 ** attempt
+
+
+class TokenBucket:
+    def __init__(self, rate: float = RATE, burst: int = BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "throttled": 0, "throttle_seconds": 0.0, "retries": 0}
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._t) * self.rate)
+            self._t = now
+            self._tokens -= 1.0
+            self.stats["acquired"] += 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait:
+                self.stats["throttled"] += 1
+                self.stats["throttle_seconds"] += wait
+            return wait
+
+    def note_retry(self) -> None:
+        with self._lock:
+            self.stats["retries"] += 1
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+
+class BrokerCache:
+    def __init__(self, ttl: float = CACHE_TTL, stale_ttl: float = STALE_TTL,
+                 max_entries: int = CACHE_ENTRIES) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="etrade-refresh")
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0,
+                      "errors": 0, "evictions": 0}
+
+    def _load(self, key: Hashable, refresh: bool = False) -> Tuple[Future, bool]:
+        """The in-flight future for ``key``; True when this caller has to run ``fetch``."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.stats["coalesced"] += 1
+                return fut, False
+            fut = self._inflight[key] = Future()
+            self.stats["refreshes" if refresh else "misses"] += 1
+            return fut, True
+
+    def _run(self, key: Hashable, fut: Future, fetch: Callable[[], Any]) -> None:
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._insert(key, value)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        """Store ``key`` as the newest entry; drop expired ones, then the oldest past the bound."""
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        expired = [k for k, (t, _) in self._entries.items() if now - t >= self.ttl + self.stale_ttl]
+        for k in expired:
+            del self._entries[k]
+        while self._entries and len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+            self.stats["evictions"] += 1
+        self._entries[key] = (now, value)
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[0] if entry else None
+            if age is not None and age < self.ttl:
+                self.stats["hits"] += 1
+                return entry[1]
+            stale = age is not None and age < self.ttl + self.stale_ttl
+            if stale:
+                self.stats["stale_hits"] += 1
+        fut, leader = self._load(key, refresh=stale)
+        if stale:
+            if leader:
+                self._refresher.submit(self._run, key, fut, fetch)
+            return entry[1]
+        if leader:
+            self._run(key, fut, fetch)
+        return fut.result()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+BUCKET = TokenBucket()
+metrics.collect("etrade_throttle_total",
+                "E*TRADE token bucket: calls, throttled calls/seconds, retries", ["event"],
+                lambda: dict(BUCKET.stats))
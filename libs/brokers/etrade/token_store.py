@@ -2,6 +2,10 @@
 
 """Simple JSON token store for E*TRADE OAuth tokens.
 Stored locally at secrets/etrade_token.json (git-ignored).
+
+Tokens are read from disk once per path and then served from memory; ``save``
+and ``clear`` update the cache and bump ``generation()``, which is how
+long-lived sessions notice that they need re-signing with new tokens.
 """
 from __future__ import annotations
 import json
@@ -11,37 +15,51 @@ from typing import Optional, Dict
 
 _LOCK = threading.RLock()
 _DEFAULT_PATH = os.path.join("secrets", "etrade_token.json")
+_KEYS = ["oauth_token", "oauth_token_secret", "access_token", "access_token_secret"]
+_CACHE: Dict[str, Optional[Dict[str, str]]] = {}
+_GENERATION = 0
+
+def generation() -> int:
+    """Incremented on every ``save``/``clear``."""
+    return _GENERATION
+
+def _bump(path: str, tokens: Optional[Dict[str, str]]) -> None:
+    global _GENERATION
+    _CACHE[os.path.abspath(path)] = tokens
+    _GENERATION += 1
 
 def _ensure_dir(path: str) -> None:
     d = os.path.dirname(path)
     if d and not os.path.isdir(d):
         os.makedirs(d, exist_ok=True)
 
+def _read(path: str) -> Optional[Dict[str, str]]:
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return None
+        return {k: v for k, v in data.items() if k in _KEYS}
+    except Exception:
+        return None
+
 def load(path: str = _DEFAULT_PATH) -> Optional[Dict[str, str]]:
+    key = os.path.abspath(path)
     with _LOCK:
-        if not os.path.isfile(path):
-            return None
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not isinstance(data, dict):
-                return None
-            return {
-                k: v for k, v in data.items()
-                if k in {"oauth_token", "oauth_token_secret", "access_token", "access_token_secret"}
-            }
-        except Exception:
-            return None
+        if key not in _CACHE:
+            _CACHE[key] = _read(path)
+        tokens = _CACHE[key]
+        return dict(tokens) if tokens is not None else None
 
 def save(tokens: Dict[str, str], path: str = _DEFAULT_PATH) -> None:
     with _LOCK:
         _ensure_dir(path)
-        safe = {
-            k: tokens.get(k, "")
-            for k in ["oauth_token", "oauth_token_secret", "access_token", "access_token_secret"]
-        }
+        safe = {k: tokens.get(k, "") for k in _KEYS}
         with open(path, "w", encoding="utf-8") as f:
             json.dump(safe, f, indent=2)
+        _bump(path, safe)
 
 def clear(path: str = _DEFAULT_PATH) -> None:
     with _LOCK:
@@ -50,3 +68,4 @@ def clear(path: str = _DEFAULT_PATH) -> None:
                 os.remove(path)
         except Exception:
             pass
+        _bump(path, None)
@@ -0,0 +1,171 @@
+"""Exponentially weighted covariance / correlation of daily returns, kept in gold.
+
+The state is two symbols x symbols matrices, updated once per new bar with
+``lam = 0.5 ** (1 / halflife)``::
+
+    S = lam * S + (1 - lam) * r r'     # r: that day's returns, NaN -> 0
+    W = lam * W + (1 - lam) * m m'     # m: 1 where the return exists
+
+so ``cov = S / W`` weights each pair over the days both symbols traded. A pair
+is unknown (NaN) until ``W`` reaches the weight of ``COV_MIN_OVERLAP`` recent
+days together: a symbol added after the build starts with zero ``S``/``W``, and
+one or two shared returns would otherwise give a correlation of exactly +-1.
+Returns are zero-mean (RiskMetrics style). A block of T days folds in as one
+weighted ``R' R``, so the initial build and the daily increment are the same
+computation. Persisted as one ``.npz`` with the symbols and valid-through date.
+
+Each symbol also counts the trading days since its last return. Symbols idle
+for ``COV_PRUNE_HALFLIVES`` half-lives (delisted, renamed) are dropped before
+saving, so the matrices track the live universe instead of growing forever.
+"""
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from libs.md.panel import Panel
+
+GOLD = Path("data/gold"); COVARIANCE = GOLD / "ewm_cov.npz"
+HALFLIFE = float(os.getenv("COV_HALFLIFE", "63"))   # trading days
+MIN_OVERLAP = int(os.getenv("COV_MIN_OVERLAP", "21"))   # trading days both sides traded
+PRUNE_HALFLIVES = float(os.getenv("COV_PRUNE_HALFLIVES", "4"))   # idle this long: dropped on save
+
+
+@dataclass(frozen=True, eq=False)
+class EwmCov:
+    symbols: pd.Index
+    s: np.ndarray                   # (symbols, symbols) weighted sum of r r'
+    w: np.ndarray                   # (symbols, symbols) weighted pair counts
+    halflife: float = HALFLIFE
+    asof: pd.Timestamp | None = None  # date of the last return folded in
+    idle: np.ndarray | None = None  # (symbols,) trading days since each symbol's last return
+
+    def __post_init__(self) -> None:
+        if self.idle is None:
+            object.__setattr__(self, "idle", np.zeros(len(self.symbols), dtype=np.int64))
+
+    @classmethod
+    def empty(cls, symbols: Iterable[str] = (), halflife: float = HALFLIFE) -> EwmCov:
+        symbols = pd.Index(list(symbols), dtype=object)
+        n = len(symbols)
+        return cls(symbols, np.zeros((n, n)), np.zeros((n, n)), halflife)
+
+    @property
+    def lam(self) -> float:
+        return 0.5 ** (1.0 / self.halflife)
+
+    @property
+    def min_weight(self) -> float:
+        """``W`` of a pair that traded together on the last ``MIN_OVERLAP`` days only."""
+        return 1.0 - self.lam ** MIN_OVERLAP
+
+    def update(self, returns: pd.DataFrame) -> EwmCov:
+        """Fold in a dates x symbols frame of returns newer than ``asof``; new symbols are added."""
+        returns = returns.sort_index()
+        if self.asof is not None:
+            returns = returns.loc[returns.index > self.asof]
+        if returns.empty:
+            return self
+        symbols = self.symbols.append(pd.Index(returns.columns).difference(self.symbols))
+        pad = len(symbols) - len(self.symbols)
+        s = np.pad(self.s, ((0, pad), (0, pad)))
+        w = np.pad(self.w, ((0, pad), (0, pad)))
+        r = returns.reindex(columns=symbols).to_numpy(np.float64)
+        m = np.isfinite(r)
+        r = np.where(m, r, 0.0)
+        lam, t = self.lam, len(r)
+        decay = (1.0 - lam) * lam ** np.arange(t - 1, -1, -1.0)   # newest row weighs (1 - lam)
+        s = lam ** t * s + (r * decay[:, None]).T @ r
+        w = lam ** t * w + (m * decay[:, None]).T @ m
+        idle = np.where(m.any(axis=0), np.argmax(m[::-1], axis=0), np.pad(self.idle, (0, pad)) + t)
+        return EwmCov(symbols, s, w, self.halflife, pd.Timestamp(returns.index[-1]), idle)
+
+    def prune(self, max_idle: float) -> EwmCov:
+        """Drop symbols without a return in the last ``max_idle`` trading days."""
+        keep = np.flatnonzero(self.idle <= max_idle)
+        if len(keep) == len(self.symbols):
+            return self
+        ix = np.ix_(keep, keep)
+        return EwmCov(self.symbols[keep], self.s[ix], self.w[ix], self.halflife, self.asof,
+                      self.idle[keep])
+
+    def _idx(self, symbols: Iterable[str]) -> np.ndarray:
+        return self.symbols.get_indexer(list(symbols))
+
+    def cov(self, rows: Iterable[str], cols: Iterable[str] | None = None) -> np.ndarray:
+        """Covariance sub-matrix; NaN for unknown symbols or pairs without enough overlap."""
+        i = self._idx(rows)
+        j = i if cols is None else self._idx(cols)
+        ii, jj = np.ix_(np.maximum(i, 0), np.maximum(j, 0))
+        if len(self.symbols):
+            w = self.w[ii, jj]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out = np.where(w >= self.min_weight, self.s[ii, jj] / w, np.nan)
+        else:
+            out = np.zeros((len(i), len(j)))
+        out[i < 0] = np.nan
+        out[:, j < 0] = np.nan
+        return out
+
+    def corr(self, rows: Iterable[str], cols: Iterable[str] | None = None) -> np.ndarray:
+        rows = list(rows)
+        cols = rows if cols is None else list(cols)
+        w = np.diagonal(self.w)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sd = np.append(np.where(w >= self.min_weight, np.sqrt(np.diagonal(self.s) / w), np.nan),
+                           np.nan)  # [-1]: unknown
+            return self.cov(rows, cols) / np.outer(sd[self._idx(rows)], sd[self._idx(cols)])
+
+    def frame(self, corr: bool = False) -> pd.DataFrame:
+        m = (self.corr if corr else self.cov)(self.symbols)
+        return pd.DataFrame(m, index=self.symbols, columns=self.symbols)
+
+
+def panel_returns(panel: Panel) -> pd.DataFrame:
+    close = panel.field("Close")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = close[1:] / close[:-1] - 1.0
+    return pd.DataFrame(r, index=panel.dates[1:], columns=panel.symbols)
+
+
+def save_covariance(c: EwmCov, path: Path = COVARIANCE) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"halflife": c.halflife, "asof": str(c.asof.date()) if c.asof is not None else None}
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, symbols=np.asarray(c.symbols, dtype=str), s=c.s, w=c.w, idle=c.idle,
+             meta=json.dumps(meta))
+    os.replace(tmp, path)
+    return path
+
+
+def load_covariance(path: Path = COVARIANCE) -> EwmCov | None:
+    if not path.exists():
+        return None
+    with np.load(path) as z:
+        meta = json.loads(str(z["meta"]))
+        asof = pd.Timestamp(meta["asof"]) if meta["asof"] else None
+        symbols = pd.Index(z["symbols"].tolist(), dtype=object)
+        idle = z["idle"] if "idle" in z.files else None   # saved before idle counts existed
+        return EwmCov(symbols, z["s"], z["w"], meta["halflife"], asof, idle)
+
+
+def update_covariance(read_closes, path: Path = COVARIANCE, halflife: float = HALFLIFE) -> EwmCov:
+    """Bring the stored matrix up to the newest bar.
+
+    ``read_closes(start)`` returns a close ``Panel`` from ``start`` (None: full
+    history). Only bars after the stored ``asof`` are read, plus that day for
+    the first new return; a changed half-life rebuilds from scratch. Symbols
+    idle for ``PRUNE_HALFLIVES`` half-lives are dropped before saving.
+    """
+    c = load_covariance(path)
+    if c is None or c.halflife != halflife or c.asof is None:
+        c = EwmCov.empty(halflife=halflife)
+    panel = read_closes(c.asof)
+    c = c.update(panel_returns(panel)).prune(PRUNE_HALFLIVES * halflife)
+    save_covariance(c, path)
+    return c
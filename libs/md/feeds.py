@@ -0,0 +1,115 @@
+"""Live bar/quote feeds for the streaming scorer.
+
+A feed is any async iterable of ``Bar`` events: the latest price of one symbol
+within the session ``ts`` falls on. ``ReplayFeed`` plays a JSONL recording back
+(one ``{"ts", "symbol", "close"}`` object per line) and stands in for a live
+source in tests and dev. ``QueueFeed`` is what push-style adapters (a broker
+websocket callback, for instance) put events into.
+
+``STREAM_FEED`` selects the feed the API runs: ``replay:<path>`` or
+``<module>:<factory>`` for a callable returning a feed.
+"""
+from __future__ import annotations
+import asyncio
+import importlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+import numpy as np
+import pandas as pd
+
+FEED = os.getenv("STREAM_FEED", "")
+SPEED = float(os.getenv("STREAM_REPLAY_SPEED", "1"))   # replay: x real time, 0 = no waits
+REPLAY = Path("data/stream/replay.jsonl")
+
+Feed = AsyncIterable["Bar"]
+
+
+@dataclass(frozen=True)
+class Bar:
+    symbol: str
+    ts: pd.Timestamp
+    close: float
+    recv: float = field(default_factory=time.perf_counter, compare=False)   # when it reached us
+
+    @property
+    def session(self) -> pd.Timestamp:
+        return self.ts.normalize()
+
+
+class ReplayFeed:
+    def __init__(self, path: Path = REPLAY, speed: float = SPEED) -> None:
+        self.path, self.speed = Path(path), speed
+
+    async def __aiter__(self) -> AsyncIterator[Bar]:
+        prev = None
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                ts = pd.Timestamp(rec["ts"])
+                if self.speed > 0 and prev is not None and ts > prev:
+                    await asyncio.sleep((ts - prev).total_seconds() / self.speed)
+                prev = ts
+                yield Bar(rec["symbol"], ts, float(rec["close"]))
+
+
+class QueueFeed:
+    """Feed of whatever is ``put`` into it; ``close()`` ends the iteration."""
+
+    _END = object()
+
+    def __init__(self, maxsize: int = 0) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, bar: Bar) -> None:
+        self.queue.put_nowait(bar)
+
+    def close(self) -> None:
+        self.queue.put_nowait(self._END)
+
+    async def __aiter__(self) -> AsyncIterator[Bar]:
+        while (bar := await self.queue.get()) is not self._END:
+            yield bar
+
+
+def load_feed(spec: str = FEED) -> Feed | None:
+    """The feed ``spec`` names (see module docstring); None when it is blank."""
+    if not spec:
+        return None
+    kind, _, arg = spec.partition(":")
+    if kind == "replay":
+        return ReplayFeed(arg or REPLAY)
+    module, _, attr = spec.rpartition(":")
+    if not module:
+        raise ValueError(f"STREAM_FEED must be replay:<path> or <module>:<factory>, got {spec!r}")
+    return getattr(importlib.import_module(module), attr)()
+
+
+def write_replay(bars: Iterable[tuple[str, pd.Timestamp, float]], path: Path = REPLAY) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for symbol, ts, close in bars:
+            row = {"ts": pd.Timestamp(ts).isoformat(), "symbol": symbol,
+                   "close": round(float(close), 4)}
+            f.write(json.dumps(row) + "\n")
+    return path
+
+
+def synth_session(last: pd.Series, session, minutes: int = 390, every: int = 1, seed: int = 0
+                  ) -> list[tuple[str, pd.Timestamp, float]]:
+    """One regular session of random-walk prices from each symbol's last close, every ``every``
+    minutes."""
+    rng = np.random.default_rng(seed)
+    last = last.dropna()
+    open_ = pd.Timestamp(session).normalize() + pd.Timedelta(hours=9, minutes=30)
+    steps = np.arange(every, minutes + 1, every)
+    paths = last.to_numpy() * np.exp(np.cumsum(rng.normal(0, 0.01 * np.sqrt(every / minutes),
+                                                          (len(steps), len(last))), axis=0))
+    return [(s, open_ + pd.Timedelta(minutes=int(m)), paths[t, j])
+            for t, m in enumerate(steps) for j, s in enumerate(last.index)]
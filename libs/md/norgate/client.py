@@ -1,34 +1,227 @@
+"""Norgate Data access.
+
+``bars_eod`` splits large universes into batches fetched on a bounded thread
+pool, and keeps a per ``(symbol, adjust)`` on-disk cache of the contiguous
+date range already fetched, so overlapping requests (ingest, golden data, the
+``/v1/md/bars`` fallback) only go to Norgate for the missing ends. Coverage
+only runs past the last bar Norgate returned for days older than
+``NORGATE_SETTLE_DAYS``; a more recent day may simply not be published yet.
+"""
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from urllib.parse import quote
+
 import pandas as pd
-from functools import lru_cache
+
+from libs.utils import metrics
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+CACHE_DIR = os.getenv("NORGATE_CACHE_DIR", "data/cache/norgate")  # "" disables the cache
+# adjusted history is rewritten on corporate events
+CACHE_TTL = float(os.getenv("NORGATE_CACHE_TTL", str(12 * 3600)))
+BATCH = int(os.getenv("NORGATE_BATCH", "50"))
+WORKERS = int(os.getenv("NORGATE_WORKERS", "4"))
+SETTLE_DAYS = int(os.getenv("NORGATE_SETTLE_DAYS", "3"))  # younger bars may not be published yet
+EARLIEST = pd.Timestamp("1900-01-01")
+EVENTS = metrics.counter("norgate_events_total",
+                         "Norgate client cache hits/misses and fetch volume", ["event"])
 
 def _require(pkg):
     try: return __import__(pkg)
     except ImportError as e: raise RuntimeError(f"Missing dependency: {pkg}") from e
 
+def _day(d) -> pd.Timestamp:
+    return pd.Timestamp(d).normalize()
+
+def _wide(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=[None, None]),
+                            index=pd.DatetimeIndex([]))
+    return pd.concat(frames, axis=1).sort_index()
+
 class NorgateClient:
-    def __init__(self, db_path: str | None = None):
+    def __init__(self, db_path: str | None = None, cache_dir: str | Path | None = CACHE_DIR,
+                 batch_size: int = BATCH, max_workers: int = WORKERS, ttl: float = CACHE_TTL):
         self.db_path = db_path or os.getenv("NORGATE_DB_PATH")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "partial": 0, "misses": 0, "fetch_calls": 0,
+                       "fetched_symbols": 0, "fetched_rows": 0}
 
-    @lru_cache(maxsize=1)
+    @cached_property
     def _api(self):
         norgatedata = _require("norgatedata")
         if self.db_path:
             norgatedata.set_db_path(self.db_path)
         return norgatedata
 
-    def bars_eod(self, symbols: list[str], start: str | None = None, end: str | None = None,
-                 adjust: str = "CASHDIVIDENDS"):
-        nd = self._api()
-        df = nd.price_timeseries(
-            symbols, start_date=start, end_date=end,
-            fields=["Open","High","Low","Close","Volume"],
-            adjust=adjust, include_delisted=True, dataframe=True
-        )
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, **inc) -> None:
+        with self._lock:
+            for k, v in inc.items():
+                self._stats[k] += v
+        for k, v in inc.items():
+            EVENTS.inc(v, event=k)
+
+    # --- Norgate calls ---
+    def _fetch(self, symbols: list[str], start, end, adjust: str,
+               fields: list[str] = FIELDS) -> pd.DataFrame:
+        status = "error"
+        try:
+            with metrics.UPSTREAM_SECONDS.time(upstream="norgate"):
+                df = self._api.price_timeseries(
+                    symbols, start_date=start, end_date=end,
+                    fields=fields, adjust=adjust, include_delisted=True, dataframe=True
+                )
+            status = "ok"
+        finally:
+            metrics.UPSTREAM_CALLS.inc(upstream="norgate", status=status)
         df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+        self._count(fetch_calls=1, fetched_symbols=len(symbols),
+                    fetched_rows=len(df) * len(symbols))
         return df.sort_index()
 
+    def _fetch_all(self, jobs: list[tuple[list[str], str | None, str | None]], adjust: str,
+                   fields: list[str] = FIELDS) -> dict[str, list[pd.DataFrame]]:
+        """Run ``(symbols, start, end)`` jobs in batches; per-symbol frames, in job order."""
+        batches = [(syms[i:i + self.batch_size], start, end)
+                   for syms, start, end in jobs for i in range(0, len(syms), self.batch_size)]
+        if len(batches) <= 1 or self.max_workers == 1:
+            results = [self._fetch(s, a, b, adjust, fields) for s, a, b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+                results = list(pool.map(lambda job: self._fetch(*job, adjust, fields), batches))
+        out: dict[str, list[pd.DataFrame]] = {}
+        for (syms, _, _), df in zip(batches, results):
+            have = set(df.columns.get_level_values(0))
+            for s in syms:
+                if s in have:
+                    out.setdefault(s, []).append(df[s].dropna(how="all"))
+        return out
+
+    # --- disk cache: <dir>/<adjust>/<symbol>.parquet + .json coverage sidecar ---
+    def _paths(self, symbol: str, adjust: str) -> tuple[Path, Path]:
+        base = self.cache_dir / adjust / quote(symbol, safe="")
+        return base.with_suffix(".parquet"), base.with_suffix(".json")
+
+    def _coverage(self, symbol: str, adjust: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+        data, meta = self._paths(symbol, adjust)
+        try:
+            m = json.loads(meta.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - m["fetched"] > self.ttl or not data.exists():
+            return None
+        return pd.Timestamp(m["lo"]), pd.Timestamp(m["hi"])
+
+    def _store(self, symbol: str, adjust: str, parts: list[pd.DataFrame],
+               lo: pd.Timestamp, hi: pd.Timestamp, keep: bool) -> pd.DataFrame:
+        data, meta = self._paths(symbol, adjust)
+        data.parent.mkdir(parents=True, exist_ok=True)
+        if keep:
+            parts = [pd.read_parquet(data), *parts]
+        parts = [p for p in parts if not p.empty]
+        df = pd.concat(parts) if parts else pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([]))
+        df = df[~df.index.duplicated(keep="last")].sort_index().astype("float64")
+        span = {"lo": str(lo.date()), "hi": str(hi.date()), "fetched": time.time()}
+        for path, write in ((data, lambda p: df.to_parquet(p)),
+                            (meta, lambda p: p.write_text(json.dumps(span)))):
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            write(tmp)
+            os.replace(tmp, path)
+        return df
+
+    def bars_eod(self, symbols: list[str], start: str | None = None, end: str | None = None,
+                 adjust: str = "CASHDIVIDENDS"):
+        """Wide ``(symbol, field)`` frame of daily bars over ``[start, end]``."""
+        symbols = list(dict.fromkeys(symbols))
+        if self.cache_dir is None:
+            got = self._fetch_all([(symbols, start, end)], adjust)
+            return _wide({s: pd.concat(got[s]).sort_index() for s in symbols if s in got})
+
+        lo = _day(start) if start else EARLIEST
+        hi = _day(end) if end else _day(pd.Timestamp.today())
+        jobs: dict[tuple, list[str]] = {}   # (start, end) gap -> symbols missing it
+        spans: dict[str, tuple] = {}
+        hits = partial = 0
+        for s in symbols:
+            cov = self._coverage(s, adjust)
+            if cov is None:
+                gaps = [(lo, hi)]
+            else:
+                gaps = []
+                if lo < cov[0]:
+                    gaps.append((lo, cov[0] - pd.Timedelta(days=1)))
+                if hi > cov[1]:
+                    gaps.append((cov[1] + pd.Timedelta(days=1), hi))
+                hits += not gaps; partial += bool(gaps)
+            for gap in gaps:
+                jobs.setdefault(gap, []).append(s)
+            spans[s] = (cov, (lo, hi) if cov is None else (min(lo, cov[0]), max(hi, cov[1])))
+        self._count(hits=hits, partial=partial, misses=len(symbols) - hits - partial)
+
+        def arg(d):
+            return None if d == EARLIEST else str(d.date())
+        batches = [(syms, arg(a), str(b.date())) for (a, b), syms in sorted(jobs.items())]
+        got = self._fetch_all(batches, adjust)
+
+        settled = _day(pd.Timestamp.today()) - pd.Timedelta(days=SETTLE_DAYS)
+        frames = {}
+        for s in symbols:
+            cov, (new_lo, new_hi) = spans[s]
+            if new_hi > settled:
+                # don't mark unsettled days covered past the last bar actually seen
+                seen = [p.index.max() for p in got.get(s, []) if not p.empty]
+                seen += [cov[1]] if cov is not None else []
+                new_hi = min(new_hi, max([settled, new_lo - pd.Timedelta(days=1), *seen]))
+            if s in got or cov is None or (new_lo, new_hi) != cov:
+                df = self._store(s, adjust, got.get(s, []), new_lo, new_hi, keep=cov is not None)
+            else:
+                df = pd.read_parquet(self._paths(s, adjust)[0])
+            df = df.loc[lo:hi]
+            if not df.empty:
+                frames[s] = df
+        return _wide(frames)
+
+    def closes(self, symbols: list[str], start: str | None = None, end: str | None = None,
+               adjust: str = "NONE") -> pd.DataFrame:
+        """Dates x symbols close-only frame, uncached; used to derive adjustment factors."""
+        batch = (list(dict.fromkeys(symbols)), start, end)
+        got = self._fetch_all([batch], adjust, fields=["Close"])
+        return pd.DataFrame({s: pd.concat(f)["Close"] for s, f in got.items()}).sort_index()
+
     def constituents(self, index_symbol: str, date: str):
-        nd = self._api()
+        nd = self._api
         members = nd.members(index_symbol, asof=date, include_delisted=True)
         return list(members)
+
+    def index_membership(self, symbols: list[str], index_symbol: str, start: str | None = None,
+                         end: str | None = None) -> pd.DataFrame:
+        """Dates x symbols boolean frame of historical ``index_symbol`` membership."""
+        nd = self._api
+
+        def one(symbol):
+            df = nd.index_constituent_timeseries(symbol, index_symbol, start_date=start,
+                                                 end_date=end, timeseriesformat="pandas-dataframe")
+            s = df.iloc[:, 0].astype(bool)
+            s.index = pd.DatetimeIndex(s.index).tz_localize(None)
+            return s
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            series = list(pool.map(one, symbols))
+        self._count(fetch_calls=len(symbols))
+        if not series:
+            return pd.DataFrame(index=pd.DatetimeIndex([]), dtype=bool)
+        return pd.concat(dict(zip(symbols, series)), axis=1).sort_index().fillna(False).astype(bool)
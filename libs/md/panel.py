@@ -0,0 +1,81 @@
+"""Dense fields x dates x symbols container for market data.
+
+One contiguous float array replaces the wide ``(symbol, field)`` MultiIndex
+frame: field lookups and date slices are zero-copy views, and conversion to and
+from the wide frame is explicit.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True, eq=False)
+class Panel:
+    values: np.ndarray          # (fields, dates, symbols)
+    fields: tuple[str, ...]
+    dates: pd.DatetimeIndex
+    symbols: pd.Index
+
+    def __post_init__(self) -> None:
+        expected = (len(self.fields), len(self.dates), len(self.symbols))
+        if self.values.shape != expected:
+            raise ValueError(f"values shape {self.values.shape} != {expected}")
+
+    @classmethod
+    def from_frame(cls, ohlcv: pd.DataFrame, fields: Iterable[str] | None = None,
+                   dtype=np.float64) -> Panel:
+        """Build from a wide ``(symbol, field)`` frame."""
+        symbols = pd.Index(ohlcv.columns.get_level_values(0).unique())
+        fields = tuple(fields or ohlcv.columns.get_level_values(1).unique())
+        values = np.empty((len(fields), len(ohlcv), len(symbols)), dtype=dtype)
+        for i, f in enumerate(fields):
+            values[i] = ohlcv.xs(f, axis=1, level=1).reindex(columns=symbols).to_numpy(dtype)
+        return cls(values, fields, pd.DatetimeIndex(ohlcv.index), symbols)
+
+    @classmethod
+    def from_long(cls, long: pd.DataFrame, fields: Iterable[str], dtype=np.float64) -> Panel:
+        """Build from a long ``date, symbol, <fields>`` frame without a wide pivot."""
+        fields = tuple(fields)
+        d_codes, dates = pd.factorize(long["date"], sort=True)
+        s_codes, symbols = pd.factorize(long["symbol"].astype(str), sort=True)
+        values = np.full((len(fields), len(dates), len(symbols)), np.nan, dtype=dtype)
+        for i, f in enumerate(fields):
+            values[i, d_codes, s_codes] = long[f].to_numpy(dtype)
+        return cls(values, fields, pd.DatetimeIndex(dates), pd.Index(symbols))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Back to the wide ``(symbol, field)`` frame the legacy code expects."""
+        cols = pd.MultiIndex.from_product([self.symbols, self.fields])
+        data = self.values.transpose(1, 2, 0).reshape(len(self.dates), -1)
+        return pd.DataFrame(data, index=self.dates, columns=cols)
+
+    def field(self, name: str) -> np.ndarray:
+        """Zero-copy ``(dates, symbols)`` view of one field."""
+        return self.values[self.fields.index(name)]
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """One field as a dates x symbols frame sharing the panel's memory."""
+        return pd.DataFrame(self.field(name), index=self.dates, columns=self.symbols, copy=False)
+
+    def slice(self, start=None, end=None) -> Panel:
+        """Zero-copy date slice (inclusive, label based)."""
+        sl = self.dates.slice_indexer(start, end)
+        return Panel(self.values[:, sl], self.fields, self.dates[sl], self.symbols)
+
+    def select(self, symbols: Iterable[str]) -> Panel:
+        """Copy of the panel restricted to ``symbols`` that are present, in that order."""
+        idx = self.symbols.get_indexer(list(symbols))
+        idx = idx[idx >= 0]
+        return Panel(self.values[:, :, idx], self.fields, self.dates, self.symbols[idx])
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+
+def as_panel(data: Panel | pd.DataFrame, fields: Iterable[str] | None = None) -> Panel:
+    """Accept either a ``Panel`` or a wide ``(symbol, field)`` frame."""
+    return data if isinstance(data, Panel) else Panel.from_frame(data, fields)
@@ -0,0 +1,371 @@
+"""Partitioned silver OHLCV store.
+
+Bars live in long format (one row per date/symbol, one column per field) under
+``data/silver/ohlcv/symbol=<sym>/year=<yyyy>/part-0.parquet``. Reads push the
+symbol/date filters and the field selection down to pyarrow, then pivot back to
+the wide ``(symbol, field)`` frame the strategies expect.
+
+Bars are stored unadjusted. ``adjustments.parquet`` next to the store holds one
+row per (symbol, event date) with the step factor each adjust mode applies to
+the bars before that date; reads rebuild any mode with one multiplication.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import json
+import operator
+import os
+import urllib.parse as urlparse
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from libs.md.panel import Panel
+from libs.utils import metrics
+
+SILVER = Path("data/silver")
+STORE = SILVER / "ohlcv"
+LEGACY = SILVER / "ohlcv.parquet"
+MANIFEST = SILVER / "manifest.json"
+ADJUSTMENTS = SILVER / "adjustments.parquet"
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+ADJUST_MODES = ["CAPITAL", "CASHDIVIDENDS", "TOTALRETURN"]
+ADJUST = "CASHDIVIDENDS"  # what readers get by default; "NONE" for raw bars
+PRICES = ["Open", "High", "Low", "Close"]
+READ_SECONDS = metrics.histogram("parquet_read_seconds", "Parquet scans, by source", ["source"])
+
+_FS = pafs.LocalFileSystem(use_mmap=True)   # scans map the files instead of copying into buffers
+_PARTITIONING = ds.partitioning(
+    pa.schema([("symbol", pa.string()), ("year", pa.int32())]), flavor="hive"
+)
+
+
+def _partition_dir(root: Path, symbol: str, year: int) -> Path:
+    return root / f"symbol={urlparse.quote(symbol, safe='')}" / f"year={year}"
+
+
+def to_long(ohlcv: pd.DataFrame) -> pd.DataFrame:
+    """Wide ``(symbol, field)`` frame -> long ``date, symbol, <fields>`` frame."""
+    frames = []
+    for sym in ohlcv.columns.get_level_values(0).unique():
+        df = ohlcv[sym].dropna(how="all")
+        if df.empty:
+            continue
+        df = df.reindex(columns=[f for f in FIELDS if f in df.columns]).astype("float64")
+        df.index = pd.DatetimeIndex(df.index, name="date")
+        frames.append(df.reset_index().assign(symbol=str(sym)))
+    if not frames:
+        return pd.DataFrame(columns=["date", "symbol", *FIELDS])
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_wide(long: pd.DataFrame, fields: list[str] | None = None) -> pd.DataFrame:
+    """Long ``date, symbol, <fields>`` frame -> wide ``(symbol, field)`` frame."""
+    fields = fields or [f for f in FIELDS if f in long.columns]
+    if long.empty:
+        return pd.DataFrame(
+            index=pd.DatetimeIndex([]), columns=pd.MultiIndex.from_tuples([], names=[None, None])
+        )
+    long = long.assign(symbol=long["symbol"].astype(str))
+    wide = long.set_index(["date", "symbol"])[fields].unstack("symbol")
+    wide.columns = wide.columns.swaplevel(0, 1)
+    syms = sorted(long["symbol"].unique())
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([syms, fields]))
+    wide.index = pd.DatetimeIndex(wide.index).rename(None)
+    return wide.sort_index()
+
+
+def _write_partition(path: Path, df: pd.DataFrame) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    out = path / "part-0.parquet"
+    tmp = path / f".part-0.{os.getpid()}.tmp"
+    table = pa.Table.from_pandas(df.drop(columns=["symbol", "year"]), preserve_index=False)
+    pq.write_table(table, tmp)
+    os.replace(tmp, out)
+
+
+def write_ohlcv(ohlcv: pd.DataFrame, root: Path = STORE) -> list[str]:
+    """Write a wide OHLCV frame into the store, replacing the touched partitions.
+
+    Returns the symbols written.
+    """
+    return write_long(to_long(ohlcv), root)
+
+
+def write_long(long: pd.DataFrame, root: Path = STORE) -> list[str]:
+    """``write_ohlcv`` for bars already in long ``date, symbol, <fields>`` form."""
+    if long.empty:
+        return []
+    long = long.assign(year=long["date"].dt.year)
+    for (sym, year), part in long.groupby(["symbol", "year"], sort=False):
+        _write_partition(_partition_dir(root, sym, int(year)), part.sort_values("date"))
+    return sorted(long["symbol"].unique())
+
+
+def merge_ohlcv(ohlcv: pd.DataFrame, root: Path = STORE) -> list[str]:
+    """Merge new bars into the store; later rows win on duplicate dates.
+
+    Each touched partition is rewritten through a temp file + ``os.replace``, so
+    readers never see a half-written partition and re-running a merge is a no-op.
+    Returns the symbols that received rows.
+    """
+    long = to_long(ohlcv)
+    if long.empty:
+        return []
+    long["year"] = long["date"].dt.year
+    for (sym, year), part in long.groupby(["symbol", "year"], sort=False):
+        path = _partition_dir(root, sym, int(year))
+        existing = path / "part-0.parquet"
+        if existing.exists():
+            old = pd.read_parquet(existing).assign(symbol=sym, year=year)
+            part = pd.concat([old, part], ignore_index=True).drop_duplicates("date", keep="last")
+        _write_partition(path, part.sort_values("date"))
+    return sorted(long["symbol"].unique())
+
+
+def _symbol_files(symbol: str, root: Path) -> list[Path]:
+    folder = root / f"symbol={urlparse.quote(symbol, safe='')}"
+    return sorted(folder.glob("year=*/part-0.parquet"))
+
+
+def symbol_stats(symbol: str, root: Path = STORE) -> dict:
+    """Row count, last date and content checksum of one symbol's partitions."""
+    files = _symbol_files(symbol, root)
+    digest = hashlib.sha256()
+    rows = 0
+    for f in files:
+        digest.update(f.read_bytes())
+        rows += pq.read_metadata(f).num_rows
+    last = pd.read_parquet(files[-1], columns=["date"])["date"].max() if files else None
+    return {
+        "last_date": None if last is None else str(last.date()),
+        "rows": rows,
+        "checksum": digest.hexdigest(),
+    }
+
+
+def read_manifest(path: Path = MANIFEST) -> dict:
+    if not path.exists():
+        return {"symbols": {}}
+    return json.loads(path.read_text())
+
+
+def update_manifest(symbols: Iterable[str], root: Path = STORE, path: Path = MANIFEST,
+                    **extra) -> dict:
+    """Refresh the manifest entries of ``symbols`` and record them as this run's changes.
+
+    ``version`` hashes every symbol's checksum, so downstream stages can tell
+    whether anything in the store changed by comparing a single string.
+    """
+    manifest = read_manifest(path)
+    entries = manifest.setdefault("symbols", {})
+    changed = sorted(symbols)
+    for sym in changed:
+        entries[sym] = symbol_stats(sym, root)
+    digest = hashlib.sha256()
+    for sym in sorted(entries):
+        digest.update(f"{sym}:{entries[sym]['checksum']}".encode())
+    factors = _adjustments_path(root)
+    if factors.exists():  # adjusted views change with the factor table too
+        digest.update(factors.read_bytes())
+    manifest.update(extra, changed=changed, version=digest.hexdigest()[:16])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+    return manifest
+
+
+def last_dates(root: Path = STORE, path: Path = MANIFEST) -> dict[str, pd.Timestamp]:
+    """Last stored bar date per symbol, from the manifest or by scanning the store."""
+    entries = read_manifest(path)["symbols"]
+    if entries:
+        return {s: pd.Timestamp(e["last_date"]) for s, e in entries.items() if e["last_date"]}
+    out = {}
+    for sym in list_symbols(root):
+        files = _symbol_files(sym, root)
+        if files:
+            out[sym] = pd.read_parquet(files[-1], columns=["date"])["date"].max()
+    return out
+
+
+def _adjustments_path(root: Path) -> Path:
+    return Path(root).parent / ADJUSTMENTS.name
+
+
+def adjustment_steps(raw: pd.DataFrame, adjusted: dict[str, pd.DataFrame],
+                     tol: float = 1e-9) -> pd.DataFrame:
+    """Event table from raw and adjusted closes (dates x symbols frames).
+
+    The step at date ``d`` is ``cum(d_prev) / cum(d)`` with ``cum = adjusted / raw``;
+    it does not depend on later events, so overlapping fetches agree.
+    """
+    steps = {}
+    for mode in ADJUST_MODES:
+        cum = adjusted[mode].reindex_like(raw) / raw
+        steps[mode] = cum.ffill().shift(1) / cum
+    stacked = pd.concat({m: s.stack() for m, s in steps.items()}, axis=1).fillna(1.0)
+    stacked = stacked[(stacked - 1.0).abs().gt(tol).any(axis=1)]
+    stacked.index = stacked.index.set_names(["date", "symbol"])
+    out = stacked.reset_index()
+    return out.assign(symbol=out["symbol"].astype(str))[["date", "symbol", *ADJUST_MODES]]
+
+
+def read_adjustments(symbols: Iterable[str] | None = None, root: Path = STORE) -> pd.DataFrame:
+    path = _adjustments_path(root)
+    if not path.exists():
+        return pd.DataFrame(columns=["date", "symbol", *ADJUST_MODES])
+    flt = None if symbols is None else ds.field("symbol").isin(list(symbols))
+    return pq.read_table(path, filters=flt).to_pandas()
+
+
+def merge_adjustments(events: pd.DataFrame, root: Path = STORE) -> list[str]:
+    """Merge event rows into the factor table; returns symbols whose events changed."""
+    path = _adjustments_path(root)
+    old = read_adjustments(root=root)
+    key = ["symbol", "date"]
+    new = events.drop_duplicates(key, keep="last").set_index(key)[ADJUST_MODES]
+    prev = old.set_index(key)[ADJUST_MODES].reindex(new.index).to_numpy(np.float64)
+    differs = ~np.isclose(new.to_numpy(np.float64), prev).all(axis=1)  # NaN prev: new event
+    if not differs.any():
+        return []
+    merged = (pd.concat([old, events], ignore_index=True) if len(old) else events)
+    merged = (merged.drop_duplicates(key, keep="last")
+              .sort_values(key, ignore_index=True)[["date", "symbol", *ADJUST_MODES]])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pq.write_table(pa.Table.from_pandas(merged, preserve_index=False), tmp)
+    os.replace(tmp, path)
+    return sorted(set(new.index[differs].get_level_values("symbol")))
+
+
+def _apply_adjustments(long: pd.DataFrame, adjust: str, root: Path) -> pd.DataFrame:
+    """Back-adjust a long frame in place of its price (and volume) columns."""
+    if adjust == "NONE" or long.empty:
+        return long
+    if adjust not in ADJUST_MODES:
+        raise ValueError(f"adjust must be NONE or one of {ADJUST_MODES}, got {adjust!r}")
+    events = read_adjustments(long["symbol"].unique(), root)
+    if events.empty:
+        return long
+    # cumulative factor for bars before each event: reverse cumprod within a symbol
+    events = events.sort_values(["symbol", "date"], ascending=False, ignore_index=True)
+    modes = [adjust] if adjust == "CAPITAL" else [adjust, "CAPITAL"]   # CAPITAL also scales volume
+    cum = events.groupby("symbol", sort=False)[modes].cumprod()
+    cats = pd.Index(sorted(set(events["symbol"]) | set(long["symbol"].astype(str))))
+    def keys(df):
+        days = df["date"].to_numpy("datetime64[D]").astype(np.int64)
+        return cats.get_indexer(df["symbol"].astype(str)) * (1 << 32) + days
+    ev_key = keys(events)[::-1]
+    price_f = np.append(cum[adjust].to_numpy()[::-1], 1.0)
+    vol_f = np.append(cum["CAPITAL"].to_numpy()[::-1], 1.0)
+    bar_key = keys(long)
+    pos = np.searchsorted(ev_key, bar_key, side="right")  # first event strictly after the bar
+    same = np.append(ev_key // (1 << 32), -1)[pos] == bar_key // (1 << 32)
+    pos = np.where(same, pos, len(ev_key))
+    long = long.copy()
+    for f in PRICES:
+        if f in long:
+            long[f] = long[f].to_numpy() * price_f[pos]
+    if "Volume" in long:
+        long["Volume"] = long["Volume"].to_numpy() / vol_f[pos]
+    return long
+
+
+def list_symbols(root: Path = STORE) -> list[str]:
+    if not root.exists():
+        return []
+    return sorted(
+        urlparse.unquote(p.name.partition("=")[2])
+        for p in root.iterdir() if p.is_dir() and p.name.startswith("symbol=")
+    )
+
+
+def _read_legacy(symbols, fields, start, end) -> pd.DataFrame:
+    ohlcv = pd.read_parquet(LEGACY)
+    if symbols is not None:
+        ohlcv = ohlcv.loc[:, ohlcv.columns.get_level_values(0).isin(list(symbols))]
+    if fields is not None:
+        ohlcv = ohlcv.loc[:, ohlcv.columns.get_level_values(1).isin(list(fields))]
+    return ohlcv.loc[start:end]
+
+
+def read_ohlcv(
+    symbols: Iterable[str] | None = None,
+    fields: Iterable[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    root: Path = STORE,
+    adjust: str = ADJUST,
+) -> pd.DataFrame:
+    """Read bars as a wide ``(symbol, field)`` frame.
+
+    Only the requested symbol/year partitions and field columns are touched.
+    Falls back to the legacy ``ohlcv.parquet`` (already adjusted) when the store
+    has not been built.
+    """
+    symbols = None if symbols is None else list(symbols)
+    fields = list(fields) if fields is not None else list(FIELDS)
+    if not root.exists() and root == STORE and LEGACY.exists():
+        return _read_legacy(symbols, fields, start, end)
+    return to_wide(read_long(symbols, fields, start, end, root, adjust), fields)
+
+
+def read_panel(
+    symbols: Iterable[str] | None = None,
+    fields: Iterable[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    root: Path = STORE,
+    dtype=np.float64,
+    adjust: str = ADJUST,
+) -> Panel:
+    """Like ``read_ohlcv`` but scatters straight into a dense ``Panel``."""
+    symbols = None if symbols is None else list(symbols)
+    fields = list(fields) if fields is not None else list(FIELDS)
+    if not root.exists() and root == STORE and LEGACY.exists():
+        return Panel.from_frame(_read_legacy(symbols, fields, start, end), fields, dtype)
+    return Panel.from_long(read_long(symbols, fields, start, end, root, adjust), fields, dtype)
+
+
+def read_long(
+    symbols: Iterable[str] | None = None,
+    fields: Iterable[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    root: Path = STORE,
+    adjust: str = ADJUST,
+) -> pd.DataFrame:
+    """Bars in long ``date, symbol, <fields>`` form, with the same pushdown as ``read_ohlcv``.
+
+    ``adjust`` is ``NONE`` or one of ``ADJUST_MODES``, applied from the factor table.
+    """
+    symbols = None if symbols is None else list(symbols)
+    fields = list(fields) if fields is not None else list(FIELDS)
+    if not root.exists() and root == STORE and LEGACY.exists():
+        return to_long(_read_legacy(symbols, fields, start, end))
+    if not root.exists():
+        raise FileNotFoundError(f"No OHLCV store at {root}")
+    conds = []
+    if symbols is not None:
+        conds.append(ds.field("symbol").isin(symbols))
+    if start is not None:
+        ts = pd.Timestamp(start)
+        conds += [ds.field("year") >= ts.year, ds.field("date") >= ts.to_pydatetime()]
+    if end is not None:
+        ts = pd.Timestamp(end)
+        conds += [ds.field("year") <= ts.year, ds.field("date") <= ts.to_pydatetime()]
+
+    dataset = ds.dataset(str(root), format="parquet", partitioning=_PARTITIONING, filesystem=_FS)
+    flt = functools.reduce(operator.and_, conds) if conds else None
+    with READ_SECONDS.time(source="silver"):
+        table = dataset.to_table(columns=["date", "symbol", *fields], filter=flt)
+    metrics.BYTES_READ.inc(table.nbytes, source="silver")
+    long = table.to_pandas()
+    return _apply_adjustments(long, adjust, root)
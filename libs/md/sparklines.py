@@ -0,0 +1,89 @@
+"""Downsampled close series for sparklines, precomputed into gold after ingest.
+
+Each symbol's trailing ``SPARK_DAYS`` of closes is reduced to ``SPARK_POINTS``
+with Largest-Triangle-Three-Buckets, which keeps the peaks and troughs a
+sparkline needs instead of every n-th bar. Stored as one long
+``symbol, date, c`` parquet with the as-of date and settings in the schema
+metadata, so the API serves a whole portfolio from one small cached table.
+"""
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.md.panel import Panel
+from libs.md.silver import STORE, read_panel
+
+GOLD = Path("data/gold"); SPARKLINES = GOLD / "sparklines.parquet"
+POINTS = int(os.getenv("SPARK_POINTS", "64"))
+DAYS = int(os.getenv("SPARK_DAYS", "183"))   # calendar days, ~6 months
+
+
+def lttb(y: np.ndarray, n: int, x: np.ndarray | None = None) -> np.ndarray:
+    """Indices of the ``n`` points Largest-Triangle-Three-Buckets keeps (first and last
+    included)."""
+    m = len(y)
+    if n >= m:
+        return np.arange(m)
+    if n < 3:
+        return np.array([0, m - 1][:max(n, 0)])
+    x = np.arange(m, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    # bucket i: [edges[i], edges[i+1])
+    edges = (np.arange(n - 1) * (m - 2) / (n - 2)).astype(np.int64) + 1
+    edges[-1] = m - 1
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else m
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def build_sparklines(panel: Panel, points: int = POINTS) -> pd.DataFrame:
+    """Long ``symbol, date, c`` frame with at most ``points`` rows per symbol."""
+    close = panel.field("Close")
+    frames = []
+    for j, s in enumerate(panel.symbols):
+        ok = np.flatnonzero(np.isfinite(close[:, j]))
+        if not len(ok):
+            continue
+        keep = ok[lttb(close[ok, j], points, x=ok)]
+        frames.append(pd.DataFrame({"symbol": s, "date": panel.dates[keep], "c": close[keep, j]}))
+    if not frames:
+        return pd.DataFrame({"symbol": pd.Series(dtype=str),
+                             "date": pd.Series(dtype="datetime64[ns]"),
+                             "c": pd.Series(dtype=np.float64)})
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_sparklines(asof, root: Path = STORE, path: Path = SPARKLINES, points: int = POINTS,
+                     days: int = DAYS) -> Path:
+    """Rebuild the sparkline table from the last ``days`` of the store up to ``asof``."""
+    asof = pd.Timestamp(asof).normalize()
+    panel = read_panel(fields=["Close"], start=asof - pd.Timedelta(days=days), end=asof, root=root)
+    table = pa.Table.from_pandas(build_sparklines(panel, points), preserve_index=False)
+    info = {"asof": str(asof.date()), "points": points, "days": days}
+    meta = {b"sparklines": json.dumps(info).encode()}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **meta})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def read_sparklines(path: Path = SPARKLINES) -> tuple[dict, pd.DataFrame] | None:
+    if not path.exists():
+        return None
+    table = pq.read_table(path, memory_map=True)
+    return json.loads(table.schema.metadata[b"sparklines"]), table.to_pandas()
@@ -0,0 +1,166 @@
+"""Point-in-time index membership as a packed date x symbol bitmap.
+
+Rows are only kept where membership changes, so an index with ~20 changes a
+year over 10 years is a few hundred rows of ``ceil(symbols / 8)`` bytes.
+Lookups are as-of: a date uses the last row on or before it. Persisted in gold
+as one parquet per index (boolean columns, which parquet bit-packs) with the
+index name and valid-through date in the schema metadata.
+"""
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+GOLD = Path("data/gold"); MEMBERSHIP = GOLD / "membership"
+SCAN_FREQ = os.getenv("MEMBERSHIP_SCAN_FREQ", "MS")   # first build: constituent snapshots this often
+
+
+@dataclass(frozen=True, eq=False)
+class Membership:
+    index: str
+    dates: pd.DatetimeIndex     # change dates, ascending
+    symbols: pd.Index
+    bits: np.ndarray            # (dates, ceil(symbols / 8)) uint8, np.packbits rows
+    asof: pd.Timestamp | None = None  # last date the bitmap is known to be valid for
+
+    @classmethod
+    def from_frame(cls, index: str, frame: pd.DataFrame, asof=None) -> Membership:
+        """From a dates x symbols boolean frame; unchanged consecutive rows are dropped."""
+        frame = frame.sort_index().fillna(False).astype(bool)
+        rows = frame.to_numpy()
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]).any(axis=1)
+        dates = pd.DatetimeIndex(frame.index)
+        asof = pd.Timestamp(asof) if asof is not None else (dates[-1] if len(dates) else None)
+        return cls(index, dates[keep], pd.Index(frame.columns.astype(str)),
+                   np.packbits(rows[keep], axis=1), asof)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._unpack(self.bits), index=self.dates, columns=self.symbols)
+
+    def _unpack(self, bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits, axis=1, count=len(self.symbols)).astype(bool)
+
+    def _rows(self, dates) -> np.ndarray:
+        """As-of membership rows for ``dates``; all False before the first change."""
+        pos = self.dates.searchsorted(pd.DatetimeIndex(dates), side="right") - 1
+        if not len(self.dates):
+            return np.zeros((len(pos), len(self.symbols)), dtype=bool)
+        rows = self._unpack(self.bits[np.maximum(pos, 0)])
+        rows[pos < 0] = False
+        return rows
+
+    def members(self, asof) -> list[str]:
+        return self.symbols[self._rows([pd.Timestamp(asof)])[0]].tolist()
+
+    def mask(self, dates: Iterable, symbols: Iterable[str] | None = None) -> pd.DataFrame:
+        """Boolean dates x symbols frame (e.g. a backtest ``universe``); unknown symbols are
+        False."""
+        dates = pd.DatetimeIndex(dates)
+        rows = self._rows(dates)
+        if symbols is None:
+            return pd.DataFrame(rows, index=dates, columns=self.symbols)
+        symbols = pd.Index(symbols)
+        pos = self.symbols.get_indexer(symbols)
+        out = np.where(pos >= 0, rows[:, np.maximum(pos, 0)], False)
+        return pd.DataFrame(out, index=dates, columns=symbols)
+
+    def ever(self, start=None, end=None) -> list[str]:
+        """Symbols that were members at any point in ``[start, end]``."""
+        def pos(d):
+            return self.dates.searchsorted(pd.Timestamp(d), side="right")
+        lo = 0 if start is None else max(pos(start) - 1, 0)
+        hi = len(self.dates) if end is None else pos(end)
+        if hi <= lo:
+            return []
+        return self.symbols[self._unpack(self.bits[lo:hi]).any(axis=0)].tolist()
+
+    def with_snapshot(self, date, members: Iterable[str]) -> Membership:
+        """Append one day's constituent list; a no-op row (no change) only moves ``asof``."""
+        date = pd.Timestamp(date).normalize()
+        if self.asof is not None and date <= self.asof:
+            raise ValueError(f"{self.index} membership is already valid through {self.asof.date()}")
+        members = pd.Index(members).astype(str)
+        symbols = self.symbols.append(members.difference(self.symbols))
+        rows = np.pad(self._unpack(self.bits), ((0, 0), (0, len(symbols) - len(self.symbols))))
+        row = symbols.isin(members)
+        dates = self.dates
+        if not len(rows) or (rows[-1] != row).any():
+            rows = np.vstack([rows, row[None]])
+            dates = dates.append(pd.DatetimeIndex([date]))
+        return Membership(self.index, dates, symbols, np.packbits(rows, axis=1), date)
+
+
+def _path(index: str, root: Path) -> Path:
+    return Path(root) / f"{quote(index, safe='')}.parquet"
+
+
+def save_membership(m: Membership, root: Path = MEMBERSHIP) -> Path:
+    path = _path(m.index, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame = m.to_frame()
+    frame.index.name = "date"
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    info = {"index": m.index, "asof": str(m.asof.date()) if m.asof else None}
+    meta = {b"membership": json.dumps(info).encode()}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **meta})
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def load_membership(index: str, root: Path = MEMBERSHIP) -> Membership | None:
+    path = _path(index, root)
+    if not path.exists():
+        return None
+    table = pq.read_table(path)
+    meta = json.loads(table.schema.metadata[b"membership"])
+    return Membership.from_frame(index, table.to_pandas(), asof=meta["asof"])
+
+
+def past_constituents(index: str, client, start, end, freq: str = SCAN_FREQ) -> set[str]:
+    """Every symbol listed in ``index`` on a ``freq`` schedule over ``[start, end]``.
+
+    Names that joined and left between two snapshots are missed; the schedule only
+    has to find who to ask about, the per-symbol timeseries then gives exact dates.
+    """
+    found: set[str] = set()
+    for d in pd.date_range(pd.Timestamp(start).normalize(), end, freq=freq):
+        found.update(client.constituents(index, str(d.date())))
+    return found
+
+
+def update_membership(index: str, asof, client, start, candidates: Iterable[str] = (),
+                      root: Path = MEMBERSHIP) -> Membership:
+    """Bring the stored bitmap for ``index`` up to ``asof``.
+
+    The first run builds the full history from Norgate's per-symbol constituent
+    timeseries over the current members, everyone on a monthly (``SCAN_FREQ``)
+    constituent snapshot since ``start`` and ``candidates`` (e.g. symbols already
+    in silver), so names that left before the first ingest are in the bitmap too.
+    Later runs append today's constituent list, one call.
+    """
+    asof = pd.Timestamp(asof).normalize()
+    m = load_membership(index, root)
+    if m is not None and m.asof is not None and asof <= m.asof:
+        return m
+    current = client.constituents(index, str(asof.date()))
+    if m is None:
+        past = past_constituents(index, client, start, asof)
+        symbols = sorted(set(current) | past | set(candidates))
+        frame = client.index_membership(symbols, index, start=str(pd.Timestamp(start).date()),
+                                        end=str(asof.date()))
+        m = Membership.from_frame(index, frame, asof=asof)
+    else:
+        m = m.with_snapshot(asof, current)
+    save_membership(m, root)
+    return m
@@ -1,3 +1,215 @@
-from functools import lru_cache
-def cached(maxsize: int = 32):
-    return lru_cache(maxsize=maxsize)
+"""DataFrame-aware memoization.
+
+``cached`` keys each call on content fingerprints of its arguments, so pandas and
+NumPy inputs memoize safely. Fingerprinting reads every byte of the inputs, so
+it only pays for expensive functions; callers that can name their inputs more
+cheaply pass ``key=``. Entries are evicted by total bytes rather than by count,
+and can optionally spill to a parquet/pickle tier on disk that survives process
+restarts. The disk directory is created private, and pickles are only loaded
+from a directory nobody else can write to. Cached values are shared: callers
+must not mutate them.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+def _update(h, obj: Any) -> None:
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"df")
+        _update(h, obj.index)
+        _update(h, obj.columns)
+        for i in range(obj.shape[1]):
+            _update(h, obj.iloc[:, i].to_numpy())
+    elif isinstance(obj, pd.Series):
+        h.update(b"s")
+        _update(h, obj.name)
+        _update(h, obj.index)
+        _update(h, obj.to_numpy())
+    elif isinstance(obj, pd.Index):
+        h.update(b"ix")
+        if isinstance(obj, pd.MultiIndex):
+            for level in range(obj.nlevels):
+                _update(h, obj.get_level_values(level))
+        else:
+            _update(h, obj.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"nd{obj.dtype.str}{obj.shape}".encode())
+        if obj.dtype.hasobject:
+            h.update(pickle.dumps(obj.tolist(), protocol=4))
+        else:
+            h.update(np.ascontiguousarray(obj).view(np.uint8).data)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update(h, item)
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k in sorted(obj, key=repr):
+            _update(h, k)
+            _update(h, obj[k])
+    elif obj is None or isinstance(obj, (str, bytes, int, float, bool, np.generic)):
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    else:
+        h.update(pickle.dumps(obj, protocol=4))
+
+
+def fingerprint(obj: Any) -> str:
+    """Stable content hash of (nested) Python, NumPy and pandas objects."""
+    h = hashlib.blake2b(digest_size=16)
+    _update(h, obj)
+    return h.hexdigest()
+
+
+def nbytes(obj: Any) -> int:
+    """Approximate in-memory size of a cached value."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=False))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(nbytes(x) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(nbytes(k) + nbytes(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class MemoCache:
+    """Byte-bounded LRU with an optional on-disk tier."""
+
+    def __init__(self, max_bytes: int = 256 << 20, maxsize: int | None = None,
+                 disk_dir: str | Path | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.maxsize = maxsize
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._data: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0, "disk_writes": 0}
+
+    def _disk_paths(self, key: str) -> tuple[Path, Path]:
+        return self.disk_dir / f"{key}.parquet", self.disk_dir / f"{key}.pkl"
+
+    def _private(self, path: Path) -> bool:
+        """``path`` and its directory belong to us and are not group/world writable."""
+        getuid = getattr(os, "getuid", None)
+        for p in (self.disk_dir, path):
+            st = p.stat()
+            if st.st_mode & 0o022 or (getuid is not None and st.st_uid != getuid()):
+                return False
+        return True
+
+    def _load_disk(self, key: str) -> Any:
+        if self.disk_dir is None:
+            return _MISSING
+        pq_path, pkl_path = self._disk_paths(key)
+        try:
+            if pq_path.exists():
+                return pd.read_parquet(pq_path)
+            if pkl_path.exists() and self._private(pkl_path):
+                return pickle.loads(pkl_path.read_bytes())
+        except Exception:
+            return _MISSING
+        return _MISSING
+
+    def _store_disk(self, key: str, value: Any) -> None:
+        """DataFrames go to parquet; anything parquet can't hold is pickled."""
+        self.disk_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        pq_path, pkl_path = self._disk_paths(key)
+        tmp = pq_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            if not isinstance(value, pd.DataFrame):
+                raise TypeError
+            value.to_parquet(tmp)
+            out = pq_path
+        except Exception:
+            tmp.write_bytes(pickle.dumps(value, protocol=4))
+            out = pkl_path
+        os.replace(tmp, out)
+        self.stats["disk_writes"] += 1
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._data[key][0]
+        value = self._load_disk(key)
+        if value is not _MISSING:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            self.put(key, value, spill=False)
+            return value
+        with self._lock:
+            self.stats["misses"] += 1
+        return default
+
+    def put(self, key: str, value: Any, spill: bool = True) -> None:
+        size = nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._data.pop(key)[1]
+            if size <= self.max_bytes:
+                self._data[key] = (value, size)
+                self.bytes += size
+            while self._data and (self.bytes > self.max_bytes
+                                  or (self.maxsize is not None and len(self._data) > self.maxsize)):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.stats["evictions"] += 1
+        if spill and self.disk_dir is not None:
+            self._store_disk(key, value)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._data), "bytes": self.bytes,
+                    "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+def cached(maxsize: int | None = 32, *, max_bytes: int = 256 << 20,
+           disk_dir: str | Path | None = None, key: Callable[..., Any] | None = None) -> Callable:
+    """Memoize a function on content fingerprints of its arguments.
+
+    ``key(*args, **kwargs)``, when given, replaces the fingerprinted arguments
+    with something cheap that identifies them (a data version, a date); it is
+    fingerprinted in their place. The wrapped function exposes ``cache`` (the
+    ``MemoCache``), ``cache_info()`` and ``cache_clear()``.
+    """
+    def deco(func: Callable) -> Callable:
+        cache = MemoCache(max_bytes=max_bytes, maxsize=maxsize, disk_dir=disk_dir)
+        qualname = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            ident = key(*args, **kwargs) if key is not None else (args, kwargs)
+            k = fingerprint((qualname, ident))
+            value = cache.get(k)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.put(k, value)
+            return value
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return deco
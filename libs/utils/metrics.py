@@ -0,0 +1,272 @@
+"""Process-wide counters, gauges and latency histograms in the Prometheus text format.
+
+Hot paths record into module-level metrics, declared next to the code that uses
+them. Declaring the same name again returns the existing metric:
+
+    FETCH = metrics.histogram("upstream_request_seconds", "Upstream call latency", ["upstream"])
+    with FETCH.time(upstream="norgate"):
+        ...
+
+Components that already keep a ``stats`` dict expose it with ``collect`` rather
+than counting twice. ``render()`` is what the API serves on ``/metrics``.
+Pipelines wrap ``main`` in ``run(name)``, which prints a per-run summary and,
+under ``pipelines.dag`` (``METRICS_OUT``), writes it as JSON for the run log.
+"""
+from __future__ import annotations
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt(v: float) -> str:
+    v = float(v)
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return str(int(v)) if v.is_integer() and abs(v) < 1e15 else repr(v)
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Iterable[tuple[str, str]]) -> str:
+    body = ",".join(f'{k}="{_esc(v)}"' for k, v in pairs)
+    return "{" + body + "}" if body else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[k]) for k in self.labels)
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in sorted(items):
+            yield self.name, tuple(zip(self.labels, key)), v
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + n
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, v: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(v)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, v: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, v)
+        with self._lock:
+            h = self._values.get(key)
+            if h is None:
+                h = self._values[key] = {"counts": [0] * (len(self.buckets) + 1),
+                                         "sum": 0.0, "max": 0.0}
+            h["counts"][i] += 1
+            h["sum"] += v
+            h["max"] = max(h["max"], v)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        with self._lock:
+            items = [(k, {**h, "counts": list(h["counts"])}) for k, h in self._values.items()]
+        for key, h in sorted(items):
+            pairs = tuple(zip(self.labels, key))
+            total = 0
+            for le, c in zip((*self.buckets, math.inf), h["counts"]):
+                total += c
+                yield f"{self.name}_bucket", (*pairs, ("le", _fmt(le))), total
+            yield f"{self.name}_sum", pairs, h["sum"]
+            yield f"{self.name}_count", pairs, total
+
+    def summary(self) -> dict[tuple[str, ...], dict]:
+        """count / sum / max and bucket-interpolated p50 and p95 per label set."""
+        out = {}
+        with self._lock:
+            items = [(k, {**h, "counts": list(h["counts"])}) for k, h in self._values.items()]
+        for key, h in items:
+            n = sum(h["counts"])
+            out[key] = {"count": n, "sum": round(h["sum"], 6), "max": round(h["max"], 6),
+                        **{f"p{int(q * 100)}": round(self._quantile(h, q, n), 6)
+                           for q in (0.5, 0.95)}}
+        return out
+
+    def _quantile(self, h: dict, q: float, n: int) -> float:
+        rank, seen = q * n, 0
+        for i, c in enumerate(h["counts"]):
+            if c and seen + c >= rank:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else h["max"]
+                return min(lo + (hi - lo) * (rank - seen) / c, h["max"])
+            seen += c
+        return 0.0
+
+
+class _Collected(_Metric):
+    """Values read from ``fn()`` (label tuple -> value) at scrape time."""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str], fn: Callable[[], dict],
+                 kind: str) -> None:
+        super().__init__(name, help, labels)
+        self.fn, self.kind = fn, kind
+
+    def samples(self) -> Iterator[tuple[str, tuple, float]]:
+        for key, v in sorted(self.fn().items()):
+            key = key if isinstance(key, tuple) else (key,)
+            yield self.name, tuple(zip(self.labels, map(str, key))), float(v)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, help: str, labels: Iterable[str], **kw) -> _Metric:
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labels, **kw)
+            elif type(m) is not cls or m.labels != tuple(labels):
+                raise ValueError(f"metric {name} already registered as {m.kind}{m.labels}")
+            return m
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def collect(self, name: str, help: str, labels: Iterable[str], fn: Callable[[], dict],
+                kind: str = "counter") -> None:
+        """Expose an existing stats source; registering a name again replaces its source."""
+        with self._lock:
+            self._metrics[name] = _Collected(name, help, labels, fn, kind)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for m in metrics:
+            lines += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}"]
+            lines += [f"{name}{_labels(pairs)} {_fmt(v)}" for name, pairs, v in m.samples()]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON-able view: counter/gauge values and histogram summaries, keyed ``name{labels}``."""
+        out = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            if isinstance(m, Histogram):
+                for key, s in m.summary().items():
+                    out[m.name + _labels(zip(m.labels, key))] = s
+            else:
+                for name, pairs, v in m.samples():
+                    out[name + _labels(pairs)] = v
+        return dict(sorted(out.items()))
+
+    def clear(self) -> None:
+        """Zero every recorded value (collected sources are left alone)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            if not isinstance(m, _Collected):
+                m.clear()
+
+
+REGISTRY = Registry()
+counter, gauge, histogram = REGISTRY.counter, REGISTRY.gauge, REGISTRY.histogram
+collect = REGISTRY.collect
+render, snapshot = REGISTRY.render, REGISTRY.snapshot
+
+UPSTREAM_SECONDS = histogram("upstream_request_seconds",
+                             "Latency of calls to external data/broker APIs", ["upstream"])
+UPSTREAM_CALLS = counter("upstream_calls_total", "Calls to external data/broker APIs",
+                         ["upstream", "status"])
+BYTES_READ = counter("bytes_read_total", "Bytes read, by source (decoded Arrow size for parquet)",
+                     ["source"])
+
+
+@contextmanager
+def run(name: str, out: str | Path | None = None) -> Iterator[None]:
+    """Per-run summary of everything recorded while the block ran.
+
+    Printed to stderr at the end; also written as JSON to ``out`` (default:
+    ``$METRICS_OUT``, which ``pipelines.dag`` sets per stage).
+    """
+    REGISTRY.clear()
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        summary = {"run": name, "ok": ok, "seconds": round(time.perf_counter() - t0, 4),
+                   "metrics": snapshot()}
+        out = out or os.getenv("METRICS_OUT")
+        if out:
+            Path(out).parent.mkdir(parents=True, exist_ok=True)
+            Path(out).write_text(json.dumps(summary, indent=2))
+        print(f"[metrics] {name}: {summary['seconds']:.3f}s", file=sys.stderr)
+        for k, v in summary["metrics"].items():
+            if isinstance(v, dict):
+                print(f"  {k}: n={v['count']} sum={v['sum']:.4f}s "
+                      f"p50={v['p50']:.4f}s p95={v['p95']:.4f}s", file=sys.stderr)
+            elif v:
+                print(f"  {k}: {_fmt(v)}", file=sys.stderr)
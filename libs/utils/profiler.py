@@ -0,0 +1,77 @@
+"""Opt-in sampling profiler of the whole process around a request or pipeline step.
+
+A background thread snapshots every other thread's Python stack each
+``interval`` seconds (``sys._current_frames``). No tracing hook is installed,
+so code runs at full speed between samples. It is a process profile: whatever
+else runs meanwhile (other requests, the stream hub, warmup) is sampled too,
+so each stack is rooted at its thread's name. The result is folded stacks
+(``thread;outer;inner;leaf count`` lines), which flamegraph.pl and speedscope
+read, and ``top()`` gives a quick self/total table.
+
+    with SamplingProfiler() as prof:
+        handler()
+    Path("out.folded").write_text(prof.folded())
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+from collections import Counter
+
+INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1e3
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(tid, f"thread-{tid}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> SamplingProfiler:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> SamplingProfiler:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(s)} {n}\n" for s, n in self.stacks.most_common())
+
+    def top(self, n: int = 20) -> list[tuple[str, int, int]]:
+        """``(function, self samples, total samples)``, most self time first."""
+        own, total = Counter(), Counter()
+        for stack, c in self.stacks.items():
+            own[stack[-1]] += c
+            for f in set(stack):
+                total[f] += c
+        return [(f, c, total[f]) for f, c in own.most_common(n)]
@@ -0,0 +1,46 @@
+"""Memory-mapped array bundles for sharing read-only data with worker processes.
+
+The parent writes each array once as ``.npy`` (under ``/dev/shm`` when available,
+so it stays in RAM); workers map the files read-only and share the page cache
+instead of each unpickling its own copy.
+"""
+from __future__ import annotations
+import contextlib
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+_BASE = "/dev/shm" if Path("/dev/shm").is_dir() else None
+
+
+def share_arrays(arrays: dict[str, np.ndarray]) -> dict:
+    """Write ``arrays`` to a fresh directory and return a picklable spec."""
+    root = Path(tempfile.mkdtemp(prefix="ait-shm-", dir=_BASE))
+    files = {}
+    for i, (key, arr) in enumerate(arrays.items()):
+        path = root / f"{i}.npy"
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=arr.dtype, shape=arr.shape)
+        out[...] = arr
+        out.flush()
+        files[key] = str(path)
+    return {"root": str(root), "files": files}
+
+
+def attach_arrays(spec: dict) -> dict[str, np.ndarray]:
+    return {key: np.load(path, mmap_mode="r") for key, path in spec["files"].items()}
+
+
+def release(spec: dict) -> None:
+    shutil.rmtree(spec["root"], ignore_errors=True)
+
+
+@contextlib.contextmanager
+def shared_arrays(arrays: dict[str, np.ndarray]) -> Iterator[dict]:
+    spec = share_arrays(arrays)
+    try:
+        yield spec
+    finally:
+        release(spec)
@@ -0,0 +1,138 @@
+"""Vectorized top-k rebalancing backtest over a precomputed score matrix.
+
+Selection is done for every rebalance date at once from the full-history score
+matrix; the cash/positions ledger then steps from one rebalance to the next,
+valuing each holding period with a single price-matrix x shares product.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+@dataclass
+class BacktestCfg:
+    cash: float = 100_000.0
+    top_frac: float = 0.05
+    rebalance_every: int = 21       # trading days between rebalances
+    cost_bps: float = 5.0           # commission, per unit traded
+    slippage_bps: float = 5.0       # execution slippage, per unit traded
+    signal_lag: int = 1             # trade at close t on scores from t - lag
+
+
+@dataclass
+class BacktestResult:
+    equity: pd.Series
+    returns: pd.Series
+    turnover: pd.Series             # traded value / pre-trade equity, per rebalance
+    costs: pd.Series
+    weights: pd.DataFrame           # target weights at each rebalance
+    stats: dict = field(default_factory=dict)
+
+
+def top_k_mask(scores: np.ndarray, top_frac: float) -> np.ndarray:
+    """Row-wise top ``max(1, int(top_frac * n_valid))`` mask, matching ``MomoTrend.score``."""
+    s = np.where(np.isnan(scores), -np.inf, scores)
+    n_valid = (~np.isnan(scores)).sum(axis=1)
+    k = np.where(n_valid > 0, np.maximum(1, (top_frac * np.maximum(1, n_valid)).astype(int)), 0)
+    kmax = int(k.max(initial=0))
+    mask = np.zeros(scores.shape, dtype=bool)
+    if kmax == 0:
+        return mask
+    order = np.argsort(-s, axis=1, kind="stable")[:, :kmax]
+    np.put_along_axis(mask, order, np.arange(kmax)[None, :] < k[:, None], axis=1)
+    return mask
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    idx = np.where(np.isnan(x), 0, np.arange(len(x))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return x[idx, np.arange(x.shape[1])[None, :]]
+
+
+def perf_stats(equity: pd.Series, turnover: pd.Series, costs: pd.Series, initial: float) -> dict:
+    rets = equity.pct_change().fillna(equity.iloc[0] / initial - 1.0)
+    years = max(len(rets) / TRADING_DAYS, 1e-9)
+    total = float(equity.iloc[-1] / initial - 1.0)
+    vol = float(rets.std() * np.sqrt(TRADING_DAYS)) if len(rets) > 1 else 0.0
+    dd = equity / np.maximum(equity.cummax(), initial) - 1.0
+    return {
+        "start": str(equity.index[0].date()),
+        "end": str(equity.index[-1].date()),
+        "final_equity": float(equity.iloc[-1]),
+        "total_return": total,
+        "cagr": float((1.0 + total) ** (1.0 / years) - 1.0),
+        "ann_vol": vol,
+        "sharpe": float(rets.mean() * TRADING_DAYS / vol) if vol > 0 else 0.0,
+        "max_drawdown": float(dd.min()),
+        "rebalances": int(len(turnover)),
+        "avg_turnover": float(turnover.mean()) if len(turnover) else 0.0,
+        "ann_turnover": float(turnover.sum() / years),
+        "total_costs": float(costs.sum()),
+    }
+
+
+def run_backtest(scores: pd.DataFrame, close: pd.DataFrame, start=None, end=None,
+                 cfg: BacktestCfg | None = None, universe: pd.DataFrame | None = None
+                 ) -> BacktestResult:
+    """Backtest an equal-weight top-k portfolio rebalanced every ``rebalance_every`` days.
+
+    ``scores`` and ``close`` are aligned dates x symbols frames covering the warm-up
+    history; ``universe`` is an optional boolean mask of tradable names per date.
+    """
+    cfg = cfg or BacktestCfg()
+    close = close.reindex(index=scores.index, columns=scores.columns)
+    dates = scores.index
+    sl = dates.slice_indexer(start, end)
+    first = max(sl.start or 0, cfg.signal_lag)
+    last = (sl.stop or len(dates)) - 1
+    if last <= first:
+        raise ValueError("backtest window is empty after the signal lag")
+
+    px = close.to_numpy(np.float64)
+    px_ff = _ffill(px)
+    s = scores.to_numpy(np.float64)
+    if universe is not None:
+        u = universe.reindex(index=dates, columns=scores.columns, fill_value=False).to_numpy(bool)
+        s = np.where(u, s, np.nan)
+    s = np.where(np.isnan(px), np.nan, s)  # only rank names that trade today
+
+    reb = np.arange(first, last + 1, cfg.rebalance_every)
+    sel = top_k_mask(s[reb - cfg.signal_lag], cfg.top_frac) & ~np.isnan(px[reb])
+    n_sel = sel.sum(axis=1, keepdims=True)
+    weights = np.divide(sel, n_sel, out=np.zeros(sel.shape), where=n_sel > 0)
+
+    cost_rate = (cfg.cost_bps + cfg.slippage_bps) / 1e4
+    equity = np.empty(last - first + 1)
+    turnover = np.empty(len(reb)); costs = np.empty(len(reb))
+    shares = np.zeros(px.shape[1]); cash = cfg.cash
+    bounds = np.append(reb, last + 1)
+    for i, t in enumerate(reb):
+        p = px_ff[t]
+        held = np.nan_to_num(shares * p)
+        pre = cash + held.sum()
+        target = weights[i] * pre
+        traded = np.abs(target - held).sum()
+        costs[i] = traded * cost_rate
+        turnover[i] = traded / pre if pre > 0 else 0.0
+        post = pre - costs[i]
+        shares = np.divide(weights[i] * post, p, out=np.zeros_like(p), where=weights[i] > 0)
+        cash = post - weights[i].sum() * post
+        seg = slice(t, bounds[i + 1])
+        equity[seg.start - first:seg.stop - first] = cash + np.nan_to_num(px_ff[seg]) @ shares
+
+    idx = dates[first:last + 1]
+    eq = pd.Series(equity, index=idx, name="equity")
+    to = pd.Series(turnover, index=dates[reb], name="turnover")
+    co = pd.Series(costs, index=dates[reb], name="costs")
+    return BacktestResult(
+        equity=eq,
+        returns=eq.pct_change().fillna(eq.iloc[0] / cfg.cash - 1.0).rename("returns"),
+        turnover=to,
+        costs=co,
+        weights=pd.DataFrame(weights, index=dates[reb], columns=scores.columns),
+        stats=perf_stats(eq, to, co, cfg.cash),
+    )
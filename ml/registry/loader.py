@@ -1,13 +1,138 @@
-import yaml, importlib
+"""Strategy registry: YAML specs indexed once, models cached per ``name@version``.
+
+Specs live at ``ml/registry/<name>/<version>.yaml`` (one immutable file per
+version); the legacy flat ``ml/registry/<name>.yaml`` is still picked up.
+Resolving a ref is a dict lookup plus one ``stat`` of the spec file, which is
+what drives hot reload when a spec is edited in place.
+"""
+import copy
+import importlib
+import re
+import threading
 from pathlib import Path
 
+import yaml
+
 REGISTRY_PATH = Path(__file__).parent
 
+
+def _version_key(version: str) -> tuple:
+    """Numeric parts compare as numbers; a tag (``rc1``) sorts before its release, ``post``
+    after."""
+    parts = re.findall(r"\d+|[^\d.]+", str(version))
+    key = [(2, int(p), "") if p.isdigit() else (3 if p == "post" else 0, 0, p) for p in parts]
+    return (*key, (1, 0, ""))
+
+
+class Registry:
+    def __init__(self, root: Path = REGISTRY_PATH):
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._index: dict[str, dict[str, dict]] = {}
+        self._models: dict[str, tuple[int, object]] = {}
+        self.scan()
+
+    def _read(self, path: Path) -> dict:
+        spec = yaml.safe_load(path.read_text())
+        spec["version"] = str(spec["version"])
+        return spec
+
+    def scan(self) -> None:
+        """(Re)build the index from disk; raises on conflicting or misplaced specs."""
+        index: dict[str, dict[str, dict]] = {}
+        paths = sorted(self.root.glob("*.yaml")) + sorted(self.root.glob("*/*.yaml"))
+        for path in paths:
+            spec = self._read(path)
+            name, version = spec["name"], spec["version"]
+            if path.parent != self.root and (path.parent.name, path.stem) != (name, version):
+                raise ValueError(f"{path} declares {name}@{version}; "
+                                 f"expected {path.parent.name}@{path.stem}")
+            if version in index.get(name, {}):
+                raise ValueError(f"Duplicate registry entry {name}@{version} in {path}")
+            index.setdefault(name, {})[version] = {
+                "path": path, "mtime": path.stat().st_mtime_ns, "spec": spec,
+            }
+        with self._lock:
+            self._index = index
+
+    def names(self) -> list[str]:
+        return sorted(self._index)
+
+    def versions(self, name: str) -> list[str]:
+        return sorted(self._index.get(name, {}), key=_version_key)
+
+    def resolve(self, name: str, version: str | None = None) -> str:
+        """Canonical ``name@version`` for ``name``, ``name@version`` or latest version."""
+        if version is None:
+            name, _, version = name.partition("@")
+        for attempt in range(2):
+            versions = self._index.get(name, {})
+            if versions and (not version or version in versions):
+                return f"{name}@{version or self.versions(name)[-1]}"
+            if attempt == 0:
+                self.scan()  # a new spec file may have been added since the last scan
+        raise KeyError(f"Unknown strategy {name}@{version}" if version
+                       else f"Unknown strategy {name}")
+
+    def _entry(self, ref: str) -> dict:
+        name, _, version = ref.partition("@")
+        for attempt in range(2):
+            entry = self._index.get(name, {}).get(version)
+            try:
+                mtime = entry["path"].stat().st_mtime_ns if entry is not None else None
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None:
+                break
+            if attempt == 0:
+                self.scan()  # the spec file was deleted or moved since the last scan
+        else:
+            raise KeyError(f"Unknown strategy {ref}")
+        if mtime != entry["mtime"]:
+            with self._lock:
+                spec = self._read(entry["path"])
+                entry = {"path": entry["path"], "mtime": mtime, "spec": spec}
+                self._index[name][version] = entry
+        return entry
+
+    def spec(self, ref: str) -> dict:
+        return copy.deepcopy(self._entry(self.resolve(ref))["spec"])
+
+    def token(self, ref: str) -> tuple[str, int]:
+        """Changes whenever the spec behind ``ref`` is edited; for cache keys."""
+        ref = self.resolve(ref)
+        return ref, self._entry(ref)["mtime"]
+
+    def model(self, ref: str):
+        """Shared model instance for ``ref`` plus a copy of its spec."""
+        ref = self.resolve(ref)
+        entry = self._entry(ref)
+        cached = self._models.get(ref)
+        if cached is None or cached[0] != entry["mtime"]:
+            with self._lock:
+                cached = self._models.get(ref)
+                if cached is None or cached[0] != entry["mtime"]:
+                    spec = entry["spec"]
+                    artifact = spec["artifact"].replace("/", ".").removesuffix(".py")
+                    module = importlib.import_module(artifact)
+                    cls = getattr(module, spec["entrypoint"])
+                    cached = (entry["mtime"], cls(spec.get("params", {})))
+                    self._models[ref] = cached
+        return cached[1], copy.deepcopy(entry["spec"])
+
+
+_REGISTRY: Registry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> Registry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = Registry()
+    return _REGISTRY
+
+
 def load_model(name: str, version: str | None = None):
-    spec_path = REGISTRY_PATH / f"{name}.yaml"
-    spec = yaml.safe_load(spec_path.read_text())
-    if version and version != spec["version"]:
-        raise ValueError(f"Expected {version}, found {spec['version']}")
-    module = importlib.import_module(spec["artifact"].replace("/", ".").removesuffix(".py"))
-    cls = getattr(module, spec["entrypoint"])
-    return cls(spec.get("params", {})), spec
+    return get_registry().model(get_registry().resolve(name, version))
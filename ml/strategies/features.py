@@ -0,0 +1,32 @@
+"""Lazily computed rolling features of one close array, reused across configs.
+
+A ``FeatureBank`` computes each (kind, window) once, so scoring many strategy
+configs on the same data only pays for the distinct windows. Banks can be built
+from precomputed arrays, e.g. memory-mapped ones shared with worker processes.
+"""
+from __future__ import annotations
+import numpy as np
+from ml.strategies.rolling import pct_change, rolling_mean, rolling_std, rolling_sum
+
+
+class FeatureBank:
+    def __init__(self, close: np.ndarray, arrays: dict[str, np.ndarray] | None = None):
+        self.close = close
+        self.arrays: dict[str, np.ndarray] = dict(arrays or {})
+
+    def _get(self, key: str, fn) -> np.ndarray:
+        if key not in self.arrays:
+            self.arrays[key] = fn()
+        return self.arrays[key]
+
+    def pct_change(self, periods: int) -> np.ndarray:
+        return self._get(f"ret:{periods}", lambda: pct_change(self.close, periods))
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        return self._get(f"ma:{window}", lambda: rolling_mean(self.close, window))
+
+    def ret_sum(self, window: int) -> np.ndarray:
+        return self._get(f"retsum:{window}", lambda: rolling_sum(self.pct_change(1), window))
+
+    def ret_std(self, window: int) -> np.ndarray:
+        return self._get(f"retstd:{window}", lambda: rolling_std(self.pct_change(1), window))
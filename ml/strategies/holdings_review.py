@@ -1,29 +1,152 @@
+"""Keep / watch / replace review of held symbols.
+
+Only the held columns and the trailing ``WINDOW`` rows are read: the latest
+50/200-day MAs and 63/126-day returns need nothing older. Drawdown is measured
+from the all-time high, a per-symbol running max that ``HoldingsReviewer``
+computes once per symbol and carries forward when the panel grows by new dates.
+
+Replacement candidates are ranked by score minus a penalty for correlation
+with what the portfolio keeps, looked up in the EWMA matrix kept in gold.
+"""
+from __future__ import annotations
+import os
+import threading
+from typing import Iterable, Mapping
+
+import numpy as np
 import pandas as pd
+from libs.md.covariance import EwmCov
+from libs.md.panel import Panel, as_panel
+
+MA_FAST, MA_SLOW = 50, 200
+R3M, R6M = 63, 126
+WINDOW = max(MA_SLOW, R6M + 1)
+CORR_PENALTY = float(os.getenv("REPLACE_CORR_PENALTY", "1.0"))  # in cross-sectional score std units
+POOL = 50
+# online features ``action`` needs
+KEYS = [f"ma:{MA_FAST}", f"ma:{MA_SLOW}", f"ret:{R3M}", f"ret:{R6M}"]
+
+
+def action(trend_ok: bool, r3: float, r6: float, drawdown: float) -> str:
+    score = int(trend_ok) + int(r3 > 0) + int(r6 > 0)   # ints: numpy bools would add as logical or
+    if score == 3 and drawdown > -0.2: return "KEEP"
+    elif score >= 1:                   return "WATCH"
+    else:                              return "REPLACE"
+
+
+class HoldingsReviewer:
+    """Review engine over one close panel; safe to share between threads.
+
+    ``prev`` is the reviewer of an earlier load of the same store. When this
+    panel extends its dates, running maxes are advanced over the new rows only.
+    A symbol whose close on the last shared date changed (an adjustment event
+    rescales every earlier bar) is recomputed from its full history instead.
+    """
+
+    def __init__(self, ohlcv: Panel | pd.DataFrame, prev: HoldingsReviewer | None = None) -> None:
+        self.panel = as_panel(ohlcv, fields=["Close"])
+        self.close = self.panel.field("Close")
+        self._cols = {s: i for i, s in enumerate(self.panel.symbols)}
+        self._peak = np.full(len(self._cols), np.nan)
+        self._known = np.zeros(len(self._cols), dtype=bool)
+        self._lock = threading.Lock()
+        if prev is not None:
+            self._carry(prev)
+
+    def _carry(self, prev: HoldingsReviewer) -> None:
+        m = len(prev.panel.dates)
+        if not m or m > len(self.panel.dates) or not self.panel.dates[:m].equals(prev.panel.dates):
+            return
+        with prev._lock:
+            j = np.flatnonzero(prev._known)
+            peak = prev._peak[j]
+        i = self.panel.symbols.get_indexer(prev.panel.symbols[j])
+        ok = i >= 0
+        i, j, peak = i[ok], j[ok], peak[ok]
+        same = self.close[m - 1, i] == prev.close[m - 1, j]   # False for NaN: recompute those
+        i, peak = i[same], peak[same]
+        if m < len(self.panel.dates):
+            peak = np.fmax(peak, np.fmax.reduce(self.close[m:, i], axis=0))
+        self._peak[i] = peak
+        self._known[i] = True
+
+    def _peaks(self, idx: np.ndarray) -> np.ndarray:
+        with self._lock:
+            miss = np.unique(idx[~self._known[idx]])
+            if len(miss) and len(self.panel.dates):
+                self._peak[miss] = np.fmax.reduce(self.close[:, miss], axis=0)
+                self._known[miss] = True
+            return self._peak[idx]
+
+    def metrics(self, symbols: Iterable[str]) -> pd.DataFrame:
+        """Latest trend/return/drawdown metrics, one row per known symbol."""
+        syms = list(dict.fromkeys(s for s in symbols if s in self._cols))
+        idx = np.array([self._cols[s] for s in syms], dtype=np.intp)
+        tail = self.close[-WINDOW:, idx].astype(np.float64, copy=False)
+        n = len(tail)
+        nan = np.full(len(idx), np.nan)
+
+        def mean(w):
+            return tail[-w:].mean(axis=0) if n >= w else nan
+
+        def ret(p):
+            return tail[-1] / tail[-1 - p] - 1.0 if n > p else nan
+
+        last = tail[-1] if n else nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = {"trend_ok": mean(MA_FAST) > mean(MA_SLOW), "r3m": ret(R3M), "r6m": ret(R6M),
+                   "drawdown": last / self._peaks(idx) - 1.0}
+        return pd.DataFrame(out, index=pd.Index(syms, name="symbol"))
+
+    def _items(self, symbols: Iterable[str]) -> dict[str, dict]:
+        as_of = str(self.panel.dates[-1].date())
+        items = {}
+        for s, trend_ok, r3, r6, ddown in self.metrics(symbols).itertuples():
+            trend_ok, r3, r6, ddown = bool(trend_ok), float(r3), float(r6), float(ddown)
+            items[s] = {"symbol": s, "as_of": as_of, "action": action(trend_ok, r3, r6, ddown),
+                        "metrics": {"trend_ok": trend_ok, "r3m": r3, "r6m": r6, "drawdown": ddown}}
+        return items
+
+    def review(self, portfolio_symbols: list[str]) -> list[dict]:
+        items = self._items(portfolio_symbols)
+        return [dict(items[s]) for s in portfolio_symbols if s in items]
+
+    def review_many(self, portfolios: Mapping[str, list[str]]) -> dict[str, list[dict]]:
+        """Review every portfolio from one metrics pass over the union of their symbols."""
+        items = self._items(s for syms in portfolios.values() for s in syms)
+        return {k: [dict(items[s]) for s in syms if s in items] for k, syms in portfolios.items()}
+
+
+def review_holdings(ohlcv: Panel | pd.DataFrame, portfolio_symbols: list[str],
+                    benchmark: str = "SPY") -> list[dict]:
+    return HoldingsReviewer(ohlcv).review(portfolio_symbols)
+
+
+def replacement_candidates(scores: pd.Series, held: Iterable[str], keep: Iterable[str] = (),
+                           cov: EwmCov | None = None, k: int = 3, penalty: float = CORR_PENALTY,
+                           pool: int = POOL) -> list[str]:
+    """Best ``k`` names not held, by standardised score minus ``penalty`` x their highest
+    positive correlation with ``keep`` and the names already picked.
 
-def review_holdings(ohlcv: pd.DataFrame, portfolio_symbols: list[str], benchmark: str = "SPY") -> list[dict]:
-    close = ohlcv.xs("Close", axis=1, level=1)
-    syms = [s for s in portfolio_symbols if s in close.columns]
-    out = []
-
-    ma50 = close.rolling(50).mean()
-    ma200 = close.rolling(200).mean()
-    r3m = close.pct_change(63)
-    r6m = close.pct_change(126)
-    dd = (close / close.cummax() - 1.0)
-
-    last = close.index[-1]
-    for s in syms:
-        ok_trend = bool(ma50[s].iloc[-1] > ma200[s].iloc[-1])
-        r3, r6 = float(r3m[s].iloc[-1]), float(r6m[s].iloc[-1])
-        ddown = float(dd[s].iloc[-1])
-        score = (ok_trend) + (r3 > 0) + (r6 > 0)
-        if score == 3 and ddown > -0.2: action = "KEEP"
-        elif score >= 1:                 action = "WATCH"
-        else:                            action = "REPLACE"
-        out.append({
-            "symbol": s,
-            "as_of": str(last.date()),
-            "action": action,
-            "metrics": {"trend_ok": ok_trend, "r3m": r3, "r6m": r6, "drawdown": ddown}
-        })
-    return out
+    Only the ``pool`` best-scored names are considered, so a request reads a
+    ``pool x (len(keep) + k)`` block of ``cov``. Without ``cov`` (or with a zero
+    penalty) this is plain score order.
+    """
+    scores = scores.dropna()
+    held = set(held)
+    ranked = scores.sort_values(ascending=False, kind="stable")
+    names = [s for s in ranked.index[:pool + len(held)] if s not in held][:pool]
+    if not names or cov is None or not penalty:
+        return names[:k]
+    std = scores.std()
+    z = (ranked[names].to_numpy(np.float64) - scores.mean()) / (std if std > 0 else 1.0)
+    keep = [s for s in keep if s in cov.symbols]
+    worst = np.fmax(cov.corr(names, keep), 0.0).max(axis=1) if keep else np.zeros(len(names))
+    picks: list[int] = []
+    for _ in range(min(k, len(names))):
+        adj = z - penalty * worst
+        adj[picks] = -np.inf
+        i = int(np.argmax(adj))
+        picks.append(i)
+        worst = np.fmax(worst, np.nan_to_num(cov.corr(names, [names[i]])[:, 0]))
+    return [names[i] for i in picks]
@@ -1,6 +1,12 @@
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
+from libs.md.panel import Panel, as_panel
+from libs.utils import metrics
+from ml.strategies.features import FeatureBank
+from ml.strategies.online import OnlineFeatures
+
+SCORE_SECONDS = metrics.histogram("model_score_seconds", "Strategy scoring", ["model", "mode"])
 
 @dataclass
 class MomoTrendCfg:
@@ -10,33 +16,90 @@ class MomoTrendCfg:
     vol_norm_window: int = 14
     top_frac: float = 0.05
 
+def _universe(universe: pd.DataFrame, dates, symbols) -> np.ndarray:
+    """Boolean membership aligned to ``dates`` x ``symbols``; missing entries are False."""
+    return universe.reindex(index=dates, columns=symbols, fill_value=False).to_numpy(bool)
+
 class MomoTrend:
     def __init__(self, params: dict | None = None):
         self.cfg = MomoTrendCfg(**params) if params else MomoTrendCfg()
 
-    def score(self, ohlcv: pd.DataFrame) -> dict:
-        close = ohlcv.xs("Close", axis=1, level=1).copy()
-        ret = close.pct_change()
+    def prepare(self, bank: FeatureBank) -> dict[str, np.ndarray | list[np.ndarray]]:
+        """Pull every rolling feature this config needs from ``bank``.
+
+        ``"rets"`` holds one array per lookback, as the bank hands them out (stacking
+        would copy shared, memory-mapped windows).
+        """
+        return {
+            "rets": [bank.pct_change(lb) for lb in self.cfg.lookbacks],
+            "ma_f": bank.rolling_mean(self.cfg.ma_fast),
+            "ma_s": bank.rolling_mean(self.cfg.ma_slow),
+            "vol": bank.ret_std(self.cfg.vol_norm_window),
+            "ret_sum": bank.ret_sum(21),
+        }
+
+    def _components(self, close: np.ndarray, bank: FeatureBank | None = None
+                    ) -> dict[str, np.ndarray]:
+        """Full-history (dates x symbols) score components for a dense close array."""
+        f = self.prepare(bank or FeatureBank(close))
+        rel = sum(f["rets"]) / len(f["rets"])
+
+        trend_ok = (f["ma_f"] > f["ma_s"]).astype(close.dtype)
+
+        vol = f["vol"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            voladj = np.clip(f["ret_sum"] / np.where(vol == 0, np.nan, vol), -5, 5)
+
+        composite = 0.5 * rel + 0.3 * trend_ok + 0.2 * voladj
+        return {"rel": rel, "trend_ok": trend_ok, "voladj": voladj, "composite": composite}
+
+    def composite(self, ohlcv: Panel | pd.DataFrame, bank: FeatureBank | None = None,
+                  universe: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Composite score for every date (dates x symbols), e.g. for backtests.
+
+        Pass a ``FeatureBank`` over the same close to reuse windows across configs;
+        ``universe`` (dates x symbols booleans) blanks out non-members.
+        """
+        panel = as_panel(ohlcv, fields=["Close"])
+        comp = self._components(panel.field("Close"), bank)["composite"]
+        if universe is not None:
+            comp = np.where(_universe(universe, panel.dates, panel.symbols), comp, np.nan)
+        return pd.DataFrame(comp, index=panel.dates, columns=panel.symbols, copy=False)
+
+    def score(self, ohlcv: Panel | pd.DataFrame, universe: pd.DataFrame | None = None) -> dict:
+        with SCORE_SECONDS.time(model="momo_trend", mode="batch"):
+            panel = as_panel(ohlcv, fields=["Close"])
+            return self._ranked(self._components(panel.field("Close")), panel.dates[-1:],
+                                panel.symbols, universe)
 
-        rels = [(close / close.shift(lb) - 1.0) for lb in self.cfg.lookbacks]
-        rel = sum(rels) / len(rels)
+    def score_latest(self, state: OnlineFeatures, universe: pd.DataFrame | None = None) -> dict:
+        """``score`` from an online feature state at its last bar; no history is read."""
+        with SCORE_SECONDS.time(model="momo_trend", mode="online"):
+            bank = state.bank()
+            return self._ranked(self._components(bank.close, bank), [state.asof], state.symbols,
+                                universe)
 
-        ma_f = close.rolling(self.cfg.ma_fast).mean()
-        ma_s = close.rolling(self.cfg.ma_slow).mean()
-        trend_ok = (ma_f > ma_s).astype(float)
+    def composite_latest(self, bank: FeatureBank) -> np.ndarray:
+        """Composite of the last row of ``bank``, e.g. a ``LatestBank`` of a few symbols' peeked
+        features."""
+        return self._components(bank.close, bank)["composite"][-1]
 
-        vol = ret.rolling(self.cfg.vol_norm_window).std()
-        voladj = (ret.rolling(21).sum() / (vol.replace(0, np.nan))).clip(-5,5)
+    def buy(self, score: pd.Series) -> list[str]:
+        """Buy signals from scores already sorted best first."""
+        return score.index[:max(1, int(self.cfg.top_frac * max(1, score.size)))].tolist()
 
-        composite = (0.5 * rel + 0.3 * trend_ok + 0.2 * voladj)
-        score = composite.iloc[-1].dropna().sort_values(ascending=False)
+    def _ranked(self, c: dict[str, np.ndarray], last_date, syms: pd.Index,
+                universe: pd.DataFrame | None) -> dict:
+        last = c["composite"][-1]
+        if universe is not None:  # rank point-in-time members only
+            last = np.where(_universe(universe, last_date, syms)[0], last, np.nan)
+        score = pd.Series(last, index=syms).dropna().sort_values(ascending=False)
 
-        top_n = max(1, int(self.cfg.top_frac * max(1, score.size)))
-        buy_syms = score.index[:top_n].tolist()
+        buy_syms = self.buy(score)
 
         explain = {
-            "rel_momentum": rel.iloc[-1].to_dict(),
-            "trend_ok": trend_ok.iloc[-1].to_dict(),
-            "voladj": voladj.iloc[-1].to_dict()
+            "rel_momentum": dict(zip(syms, c["rel"][-1].tolist())),
+            "trend_ok": dict(zip(syms, c["trend_ok"][-1].tolist())),
+            "voladj": dict(zip(syms, c["voladj"][-1].tolist()))
         }
         return {"scores": score, "signals": {"buy": buy_syms}, "explain": explain}
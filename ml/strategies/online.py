@@ -0,0 +1,316 @@
+"""Online rolling state: the latest value of each rolling feature, one bar at a time.
+
+Per symbol it keeps a ring buffer of the last ``depth`` closes, running sums
+and NaN counts for moving averages and return sums, windowed Welford mean/M2
+for return std, and the running max of close. ``advance`` folds in one bar in
+O(symbols x features) whatever the history length, and the values match the
+batch ``FeatureBank`` to floating-point tolerance, NaN rules included (a window
+holding any NaN is NaN). Keys follow ``FeatureBank``: ``ret:<p>``, ``ma:<w>``,
+``retsum:<w>``, ``retstd:<w>``.
+
+States persist under ``data/gold/online/<name>.npz``; one is only rebuilt from
+full history when the keys it was built for no longer cover what is asked.
+Symbols whose history before ``asof`` the state never saw (added to silver
+with a backfill) are replayed from their own full history first.
+"""
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from libs.md.panel import Panel
+from ml.strategies.features import FeatureBank
+
+GOLD = Path("data/gold"); ONLINE = GOLD / "online"
+KINDS = ("ret", "ma", "retsum", "retstd")
+
+
+def _parse(key: str) -> tuple[str, int]:
+    kind, _, n = key.partition(":")
+    if kind not in KINDS or not n.isdigit() or int(n) < 1:
+        raise ValueError(f"unknown online feature {key!r}")
+    return kind, int(n)
+
+
+class LatestBank(FeatureBank):
+    """``FeatureBank`` over one row (the latest bar); every feature is precomputed."""
+
+    def _get(self, key: str, fn) -> np.ndarray:
+        try:
+            return self.arrays[key]
+        except KeyError:
+            raise KeyError(f"online state has no {key!r}; rebuild it with that key") from None
+
+
+class _Recorder(FeatureBank):
+    def __init__(self) -> None:
+        super().__init__(np.zeros((1, 1)))
+        self.keys: list[str] = []
+
+    def _get(self, key: str, fn) -> np.ndarray:
+        self.keys.append(key)
+        return self.close
+
+
+def feature_keys(model) -> list[str]:
+    """The feature keys ``model.prepare(bank)`` pulls."""
+    rec = _Recorder()
+    model.prepare(rec)
+    return sorted(set(rec.keys))
+
+
+class OnlineFeatures:
+    def __init__(self, keys: Iterable[str], symbols: Iterable[str] = (), ddof: int = 1) -> None:
+        self.keys = tuple(sorted(set(keys)))
+        self.specs = {k: _parse(k) for k in self.keys}
+        lags = [n + (kind in ("retsum", "retstd")) for kind, n in self.specs.values()]
+        self.depth = max([1, *lags]) + 1
+        self.ddof = ddof
+        self.symbols = pd.Index([])
+        self.asof: pd.Timestamp | None = None
+        self.rows = 0
+        self.pos = self.depth - 1       # ring slot of the newest close
+        self.state: dict[str, np.ndarray] = {name: np.empty((self.depth, 0) if name == "buf" else 0)
+                                             for name, _ in self._fills()}
+        self.grow(symbols)
+
+    def _fills(self) -> list[tuple[str, float]]:
+        """Every state array and the value a newly seen symbol starts with."""
+        out = [("buf", np.nan), ("peak", np.nan), ("close", np.nan)]
+        for k, (kind, n) in self.specs.items():
+            out.append((f"val:{k}", np.nan))
+            if kind == "ma" or kind == "retsum":
+                out += [(f"sum:{k}", 0.0), (f"nans:{k}", n)]
+            elif kind == "retstd":
+                out += [(f"n:{k}", 0.0), (f"mean:{k}", 0.0), (f"m2:{k}", 0.0), (f"nans:{k}", n)]
+        return out
+
+    def grow(self, symbols: Iterable[str]) -> None:
+        new = pd.Index(list(symbols)).difference(self.symbols)
+        if not len(new):
+            return
+        for name, fill in self._fills():
+            a = self.state[name]
+            pad = np.full(a.shape[:-1] + (len(new),), fill, dtype=np.float64)
+            self.state[name] = np.concatenate([a, pad], axis=-1)
+        self.symbols = self.symbols.append(new) if len(self.symbols) else new
+
+    def _step(self, x: np.ndarray, cols: np.ndarray | None = None) -> dict[str, np.ndarray]:
+        """State arrays after adding close row ``x``; nothing is written.
+
+        With ``cols``, ``x`` holds just those symbols and so does the result.
+        """
+        s = self.state if cols is None else {k: v[..., cols] for k, v in self.state.items()}
+
+        def lag(k: int) -> np.ndarray:      # close k bars before the one being added (k >= 1)
+            return s["buf"][(self.pos - (k - 1)) % self.depth]
+
+        out = {"peak": np.fmax(s["peak"], x), "close": x}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = x / lag(1) - 1.0
+            for k, (kind, n) in self.specs.items():
+                if kind == "ret":
+                    out[f"val:{k}"] = x / lag(n) - 1.0
+                    continue
+                new, old = (x, lag(n)) if kind == "ma" else (r, lag(n) / lag(n + 1) - 1.0)
+                nan_new, nan_old = np.isnan(new), np.isnan(old)
+                nans = out[f"nans:{k}"] = s[f"nans:{k}"] + nan_new - nan_old
+                if kind != "retstd":
+                    total = out[f"sum:{k}"] = (s[f"sum:{k}"] + np.where(nan_new, 0.0, new)
+                                               - np.where(nan_old, 0.0, old))
+                    val = total / n if kind == "ma" else total
+                    out[f"val:{k}"] = np.where(nans == 0, val, np.nan)
+                    continue
+                # windowed Welford over the finite returns: add the newest, drop the one leaving
+                cnt, mean, m2 = s[f"n:{k}"] + ~nan_new, s[f"mean:{k}"], s[f"m2:{k}"]
+                d = np.where(nan_new, 0.0, new - mean)
+                mean = mean + np.where(nan_new, 0.0, d / cnt)
+                m2 = m2 + np.where(nan_new, 0.0, d * (new - mean))
+                cnt = cnt - ~nan_old
+                d = np.where(nan_old, 0.0, old - mean)
+                mean = np.where(cnt > 0, mean - np.where(nan_old, 0.0, d / cnt), 0.0)
+                m2 = np.where(cnt > 0, m2 - np.where(nan_old, 0.0, d * (old - mean)), 0.0)
+                out[f"n:{k}"], out[f"mean:{k}"], out[f"m2:{k}"] = cnt, mean, m2
+                std = np.sqrt(np.maximum(m2 / (n - self.ddof), 0.0))
+                out[f"val:{k}"] = np.where(nans == 0, std, np.nan)
+        return out
+
+    def _row(self, close: pd.Series | np.ndarray, grow: bool = True) -> np.ndarray:
+        if isinstance(close, pd.Series):
+            if grow:
+                self.grow(close.index)
+            return close.reindex(self.symbols).to_numpy(np.float64)
+        return np.asarray(close, dtype=np.float64)
+
+    def peek(self, close: pd.Series | np.ndarray, cols: np.ndarray | None = None
+             ) -> dict[str, np.ndarray]:
+        """Latest features as if ``close`` were the next bar, without advancing (unknown symbols
+        are ignored).
+
+        ``cols`` (positions in ``symbols``) limits the work to those symbols; ``close``
+        is then an array of just their closes.
+        """
+        if cols is None:
+            out = self._step(self._row(close, grow=False))
+        else:
+            out = self._step(np.asarray(close, dtype=np.float64),
+                             np.asarray(cols, dtype=np.intp))
+        return {"close": out["close"], "peak": out["peak"],
+                **{k: out[f"val:{k}"] for k in self.keys}}
+
+    def advance(self, date, close: pd.Series | np.ndarray) -> None:
+        """Fold in one bar; ``close`` is a Series by symbol or an array in ``symbols`` order."""
+        date = pd.Timestamp(date)
+        if self.asof is not None and date <= self.asof:
+            raise ValueError(f"online state is already at {self.asof.date()}")
+        x = self._row(close)
+        self.state.update(self._step(x))
+        self.pos = (self.pos + 1) % self.depth
+        self.state["buf"][self.pos] = x
+        self.asof, self.rows = date, self.rows + 1
+
+    def _rescale(self, close: np.ndarray) -> None:
+        """Back-adjustment rescales a symbol's whole history: follow it in the price-level state."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = close / self.state["buf"][self.pos]
+        changed = np.isfinite(ratio) & (ratio != 1.0)
+        if not changed.any():
+            return
+        f = np.where(changed, ratio, 1.0)
+        for name in ("buf", "peak", "close"):
+            self.state[name] = self.state[name] * f
+        for k, (kind, _) in self.specs.items():
+            if kind == "ma":
+                self.state[f"sum:{k}"] = self.state[f"sum:{k}"] * f
+                self.state[f"val:{k}"] = self.state[f"val:{k}"] * f
+
+    def unseen(self, panel: Panel) -> pd.Index:
+        """Symbols of ``panel`` (read from ``asof``) whose earlier bars the state never saw.
+
+        That is symbols new to the state, and known ones with no close at ``asof``
+        where the panel now has one (history backfilled since the last run).
+        """
+        if self.asof is None:
+            return pd.Index([])
+        new = panel.symbols.difference(self.symbols)
+        if len(panel.dates) and panel.dates[0] == self.asof:
+            held = panel.symbols.intersection(self.symbols)
+            now = panel.field("Close")[0, panel.symbols.get_indexer(held)]
+            then = self.state["close"][self.symbols.get_indexer(held)]
+            new = new.append(held[np.isnan(then) & np.isfinite(now)])
+        return new
+
+    def backfill(self, history: Panel) -> int:
+        """Replace the state of ``history``'s symbols with a replay of their bars up to ``asof``.
+
+        Returns how many symbols were replayed. The replay runs on ``history``'s
+        own dates, aligned so its last bar is the state's ``asof``.
+        """
+        hist = history.slice(end=self.asof)
+        if self.asof is None or not len(hist.dates):
+            return 0
+        fresh = OnlineFeatures(self.keys, hist.symbols, self.ddof)
+        fresh.update(hist)
+        if fresh.asof < self.asof:
+            fresh.advance(self.asof, np.full(len(fresh.symbols), np.nan))
+        self.grow(hist.symbols)
+        cols = self.symbols.get_indexer(fresh.symbols)
+        shift = (self.pos - fresh.pos) % self.depth
+        for name, a in fresh.state.items():
+            self.state[name][..., cols] = np.roll(a, shift, axis=0) if name == "buf" else a
+        return len(cols)
+
+    def update(self, panel: Panel,
+               on_row: Callable[[pd.Timestamp, dict], None] | None = None) -> int:
+        """Advance over the panel's bars after ``asof``; returns how many were added.
+
+        If the panel includes the ``asof`` bar and a symbol's close there moved
+        (an adjustment event), that symbol's price-level state is rescaled first.
+        """
+        self.grow(panel.symbols)
+        idx = self.symbols.get_indexer(panel.symbols)
+        close = panel.field("Close")
+
+        def row(t):
+            x = np.full(len(self.symbols), np.nan)
+            x[idx] = close[t]
+            return x
+
+        start = 0
+        if self.asof is not None:
+            start = panel.dates.searchsorted(self.asof, side="right")
+            if start and panel.dates[start - 1] == self.asof:
+                self._rescale(row(start - 1))
+        for t in range(start, len(panel.dates)):
+            self.advance(panel.dates[t], row(t))
+            if on_row is not None:
+                on_row(panel.dates[t], self.values())
+        return len(panel.dates) - start
+
+    def values(self) -> dict[str, np.ndarray]:
+        s = self.state
+        return {"close": s["close"], "peak": s["peak"], **{k: s[f"val:{k}"] for k in self.keys}}
+
+    def bank(self) -> LatestBank:
+        v = self.values()
+        return LatestBank(v["close"][None], {k: v[k][None] for k in self.keys})
+
+
+def _path(name: str, root: Path) -> Path:
+    return Path(root) / f"{name}.npz"
+
+
+def save_online(st: OnlineFeatures, name: str, root: Path = ONLINE) -> Path:
+    path = _path(name, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"keys": list(st.keys), "ddof": st.ddof, "pos": st.pos, "rows": st.rows,
+            "asof": str(st.asof.date()) if st.asof is not None else None}
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, symbols=np.asarray(st.symbols, dtype=str), meta=json.dumps(meta),
+             **{f"state/{k}": v for k, v in st.state.items()})
+    os.replace(tmp, path)
+    return path
+
+
+def load_online(name: str, keys: Iterable[str] = (), root: Path = ONLINE) -> OnlineFeatures | None:
+    """The stored state, or None when missing or not built for every one of ``keys``."""
+    path = _path(name, root)
+    if not path.exists():
+        return None
+    with np.load(path) as z:
+        meta = json.loads(str(z["meta"]))
+        if not set(keys) <= set(meta["keys"]):
+            return None
+        st = OnlineFeatures(meta["keys"], ddof=meta["ddof"])
+        st.symbols = pd.Index(z["symbols"].tolist())
+        st.state = {k.removeprefix("state/"): z[k] for k in z.files if k.startswith("state/")}
+    st.pos, st.rows = meta["pos"], meta["rows"]
+    st.asof = pd.Timestamp(meta["asof"]) if meta["asof"] else None
+    return st
+
+
+def update_online(name: str, keys: Iterable[str], read_closes: Callable[..., Panel],
+                  root: Path = ONLINE, on_row: Callable[[pd.Timestamp, dict], None] | None = None
+                  ) -> tuple[OnlineFeatures, bool]:
+    """Bring state ``name`` up to the newest bar; True when it had to be rebuilt.
+
+    ``read_closes(start, symbols=None)`` returns a close ``Panel`` from ``start``
+    (None: full history), so a daily run reads the stored as-of bar plus the new
+    ones, and the full history only of symbols the state has not seen before.
+    """
+    keys = list(keys)
+    st = load_online(name, keys, root)
+    rebuilt = st is None
+    if rebuilt:
+        st = OnlineFeatures(keys)
+    panel = read_closes(st.asof)
+    unseen = st.unseen(panel)
+    if len(unseen):
+        st.backfill(read_closes(None, unseen))
+    st.update(panel, on_row)
+    save_online(st, name, root)
+    return st, rebuilt
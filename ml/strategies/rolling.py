@@ -0,0 +1,50 @@
+"""Rolling primitives over dense ``(dates, symbols)`` arrays.
+
+NaN semantics follow pandas ``rolling(window)`` with ``min_periods=window``: a
+window containing any NaN yields NaN. Sums accumulate in float64 whatever the
+input dtype. Nothing here is memoized: each kernel is one pass over the array,
+about what hashing it for a cache key would cost. Strategies share windows
+through ``FeatureBank``, which keys them by name.
+"""
+import numpy as np
+
+def shift(x: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan, dtype=np.result_type(x.dtype, np.float32))
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+def pct_change(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / shift(x, periods) - 1.0
+
+def _windowed(x: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Trailing window sums of ``x`` and counts of NaNs, via float64 cumsums."""
+    nan = np.isnan(x)
+    cs = np.cumsum(np.where(nan, 0.0, x), axis=0, dtype=np.float64)
+    cn = np.cumsum(nan, axis=0, dtype=np.int64)
+    sums = cs.copy(); nans = cn.copy()
+    sums[window:] -= cs[:-window]; nans[window:] -= cn[:-window]
+    sums[:window - 1] = np.nan
+    nans[:window - 1] = 1
+    return sums, nans
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    sums, nans = _windowed(x, window)
+    sums[nans > 0] = np.nan
+    return sums.astype(x.dtype, copy=False)
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return rolling_sum(x, window) / window
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    # centre each column first so the sum-of-squares identity doesn't cancel
+    finite = ~np.isnan(x)
+    centre = np.where(finite, x, 0.0).sum(axis=0) / np.maximum(finite.sum(axis=0), 1)
+    xc = x - centre
+    s1, nans = _windowed(xc, window)
+    s2, _ = _windowed(xc * xc, window)
+    with np.errstate(invalid="ignore"):
+        var = (s2 - s1 * s1 / window) / (window - ddof)
+    var[nans > 0] = np.nan
+    return np.sqrt(np.maximum(var, 0.0)).astype(x.dtype, copy=False)
@@ -0,0 +1,128 @@
+"""Intraday scoring of provisional bars on top of the end-of-day online state.
+
+``StreamScorer`` holds the latest price of each symbol for the session after
+the state's as-of date. A batch of feed events peeks the online features of
+just the symbols it touches (``OnlineFeatures.peek`` with ``cols``), rescores
+and reviews those, re-ranks the cached score vector, and returns events for
+what changed. Nothing here reads history.
+
+When a bar arrives for a later session, the previous session's provisional
+prices are dropped and scoring starts again from the state's last bar. Only
+the daily pipeline advances the state; the stream hub rebuilds its scorer when
+the persisted state changes.
+"""
+from __future__ import annotations
+import math
+import time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from libs.md.feeds import Bar
+from ml.strategies.holdings_review import MA_FAST, MA_SLOW, R3M, R6M, action
+from ml.strategies.online import LatestBank, OnlineFeatures
+
+
+def _num(x) -> float | None:
+    x = float(x)
+    return x if math.isfinite(x) else None
+
+
+class StreamScorer:
+    def __init__(self, state: OnlineFeatures, model, ref: str,
+                 universe: pd.DataFrame | None = None) -> None:
+        self.state, self.model, self.ref = state, model, ref
+        self._cols = {s: i for i, s in enumerate(state.symbols)}
+        if universe is None:
+            self.member = np.ones(len(state.symbols), dtype=bool)
+        else:
+            self.member = universe.reindex(index=[state.asof], columns=state.symbols,
+                                           fill_value=False).to_numpy(bool)[0]
+        self.session: pd.Timestamp | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        """Back to the state's last bar: no provisional prices."""
+        v = self.state.values()
+        self.close = v["close"].copy()
+        self.live = np.zeros(len(self.close), dtype=bool)
+        self.composite = self.model.composite_latest(self.state.bank())
+        self.actions = [action(*m) for m in zip(*self._metrics(v, np.arange(len(self.close))))]
+        self.buy = self.model.buy(self.scores())
+
+    @staticmethod
+    def _metrics(v: dict[str, np.ndarray], idx: np.ndarray) -> tuple[np.ndarray, ...]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (v[f"ma:{MA_FAST}"][idx] > v[f"ma:{MA_SLOW}"][idx], v[f"ret:{R3M}"][idx],
+                    v[f"ret:{R6M}"][idx], v["close"][idx] / v["peak"][idx] - 1.0)
+
+    def scores(self) -> pd.Series:
+        """Provisional scores of members, best first."""
+        ok = self.member & np.isfinite(self.composite)
+        scores = pd.Series(self.composite[ok], index=self.state.symbols[ok])
+        return scores.sort_values(ascending=False)
+
+    def _roll(self, session: pd.Timestamp) -> list[dict]:
+        events = []
+        if self.session is not None and self.live.any():
+            self._reset()
+            events.append({"type": "session", "closed": str(self.session.date()),
+                           "asof": str(self.state.asof.date())})
+        self.session = session
+        return events
+
+    def apply(self, bars: Iterable[Bar]) -> list[dict]:
+        """Fold in a batch of bars (the last price per symbol wins); events for what changed."""
+        last: dict[int, Bar] = {}
+        events: list[dict] = []
+        for bar in bars:
+            j = self._cols.get(bar.symbol)
+            if j is None or (self.state.asof is not None and bar.session <= self.state.asof):
+                continue          # unknown symbol, or a session the end-of-day state already has
+            if self.session is None or bar.session > self.session:
+                events += self._score(last)
+                events += self._roll(bar.session)
+                last = {}
+            elif bar.session < self.session:
+                continue
+            last[j] = bar
+        events += self._score(last)
+        if last:
+            lat = round((time.perf_counter() - min(b.recv for b in last.values())) * 1e3, 3)
+            for e in events:
+                e["latency_ms"] = lat
+        return events
+
+    def _score(self, last: dict[int, Bar]) -> list[dict]:
+        if not last:
+            return []
+        cols = np.fromiter(last, dtype=np.intp, count=len(last))
+        self.close[cols] = [b.close for b in last.values()]
+        self.live[cols] = True
+        v = self.state.peek(self.close[cols], cols)
+        bank = LatestBank(v["close"][None], {k: v[k][None] for k in self.state.keys})
+        self.composite[cols] = self.model.composite_latest(bank)
+        metrics = self._metrics(v, np.arange(len(cols)))
+        scores = self.scores()
+        rank = pd.Series(np.arange(1, len(scores) + 1), index=scores.index)
+        events = []
+        for i, (j, bar) in enumerate(last.items()):
+            s, m = self.state.symbols[j], tuple(a[i] for a in metrics)
+            act = action(*m)
+            events.append({"type": "score", "symbol": s, "ts": bar.ts.isoformat(),
+                           "close": bar.close, "score": _num(self.composite[j]),
+                           "rank": int(rank[s]) if s in rank.index else None, "action": act,
+                           "metrics": {"trend_ok": bool(m[0]), "r3m": _num(m[1]),
+                                       "r6m": _num(m[2]), "drawdown": _num(m[3])}})
+            if act != self.actions[j]:
+                events.append({"type": "action", "symbol": s, "ts": bar.ts.isoformat(),
+                               "from": self.actions[j], "to": act})
+                self.actions[j] = act
+        buy = self.model.buy(scores)
+        if buy != self.buy:
+            events.append({"type": "signals", "strategy": self.ref, "buy": buy,
+                           "added": [s for s in buy if s not in self.buy],
+                           "removed": [s for s in self.buy if s not in buy]})
+            self.buy = buy
+        return events
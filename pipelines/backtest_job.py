@@ -1,10 +1,48 @@
+import json
+import os
 from pathlib import Path
 import pandas as pd
+from libs.md.silver import read_panel
+from libs.md.universe import load_membership
+from libs.utils import metrics
+from ml.backtest.engine import BacktestCfg, run_backtest
 from ml.registry.loader import load_model
 
-def backtest(strategy: str, start: str, end: str, cash: float = 100_000.0):
+GOLD = Path("data/gold"); BACKTESTS = GOLD / "backtests"
+INDEX = os.getenv("UNIVERSE_INDEX", "^SPX")
+
+def backtest(strategy: str, start: str, end: str, cash: float = 100_000.0, **cfg):
     name, _, ver = strategy.partition("@")
-    model, _ = load_model(name, ver or None)
-    ohlcv = pd.read_parquet(Path("data/silver/ohlcv.parquet"))
-    top = model.score(ohlcv)["signals"]["buy"]
-    return {"symbols": top, "note": "placeholder backtest"}
+    model, spec = load_model(name, ver or None)
+    # full history up to `end` so rolling windows are warm on the first trading day
+    panel = read_panel(fields=["Close"], end=end)
+    scores = model.composite(panel)
+    # point-in-time index members only, when the membership bitmap has been built
+    membership = load_membership(INDEX)
+    universe = membership.mask(panel.dates, panel.symbols) if membership is not None else None
+    cfg = BacktestCfg(cash=cash, top_frac=model.cfg.top_frac, **cfg)
+    res = run_backtest(scores, panel.frame("Close"), start=start, end=end, cfg=cfg,
+                       universe=universe)
+
+    BACKTESTS.mkdir(parents=True, exist_ok=True)
+    tag = f"{name}@{spec['version']}_{res.stats['start']}_{res.stats['end']}"
+    curve = pd.concat([res.equity, res.returns], axis=1).join(
+        pd.concat([res.turnover, res.costs], axis=1))
+    curve.to_parquet(BACKTESTS / f"{tag}_equity.parquet")
+    res.weights.to_parquet(BACKTESTS / f"{tag}_weights.parquet")
+    stats = {"strategy": f"{name}@{spec['version']}", **res.stats, "cfg": vars(cfg),
+             "universe": INDEX if membership is not None else None}
+    (BACKTESTS / f"{tag}_stats.json").write_text(json.dumps(stats, indent=2))
+    return stats
+
+def main():
+    stats = backtest(
+        os.getenv("BT_STRATEGY", "momo_trend@0.1.0"),
+        start=os.getenv("BT_START", "2016-01-01"),
+        end=os.getenv("BT_END") or None,
+    )
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    with metrics.run("backtest"):
+        main()
@@ -1,22 +1,75 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from libs.md.silver import read_panel
+from libs.utils import metrics
+from ml.strategies.online import OnlineFeatures, load_online, save_online
+from ml.strategies.rolling import pct_change, rolling_mean, rolling_std
 
 SILVER = Path("data/silver")
 GOLD = Path("data/gold"); GOLD.mkdir(parents=True, exist_ok=True)
+FEATURES = GOLD / "features_daily.parquet"
+KEYS = ["ret:21", "ret:63", "ret:126", "ma:50", "ma:200", "retstd:14"]
+NAMES = ["ret_21", "ret_63", "ret_126", "ma50_gt_ma200", "vol14"]
 
-def main():
-    ohlcv = pd.read_parquet(SILVER / "ohlcv.parquet")
-    close = ohlcv.xs("Close", axis=1, level=1)
+def _row(v: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """One day of features from online state values (same columns as the batch path)."""
+    return {
+        "ret_21": v["ret:21"], "ret_63": v["ret:63"], "ret_126": v["ret:126"],
+        "ma50_gt_ma200": (v["ma:50"] > v["ma:200"]).astype(int),
+        "vol14": v["retstd:14"],
+    }
+
+def batch(panel) -> pd.DataFrame:
+    close = panel.field("Close")
     feats = {
-        "ret_21": close.pct_change(21),
-        "ret_63": close.pct_change(63),
-        "ret_126": close.pct_change(126),
-        "ma50_gt_ma200": (close.rolling(50).mean() > close.rolling(200).mean()).astype(int),
-        "vol14": close.pct_change().rolling(14).std(),
+        "ret_21": pct_change(close, 21),
+        "ret_63": pct_change(close, 63),
+        "ret_126": pct_change(close, 126),
+        "ma50_gt_ma200": (rolling_mean(close, 50) > rolling_mean(close, 200)).astype(int),
+        "vol14": rolling_std(pct_change(close), 14),
     }
-    feat_df = pd.concat(feats, axis=1).dropna(how="all")
-    feat_df.to_parquet(GOLD / "features_daily.parquet")
-    print("features written:", GOLD / "features_daily.parquet")
+    frames = {k: pd.DataFrame(v, index=panel.dates, columns=panel.symbols)
+              for k, v in feats.items()}
+    return pd.concat(frames, axis=1).dropna(how="all")
+
+def _frame(rows: dict[pd.Timestamp, dict], symbols: pd.Index) -> pd.DataFrame:
+    index = pd.DatetimeIndex(list(rows))
+    frames = {k: pd.DataFrame([r[k] for r in rows.values()], index=index, columns=symbols)
+              for k in NAMES}
+    return pd.concat(frames, axis=1).dropna(how="all")
+
+def main():
+    """Append the days since the last run from the online state; full rebuild on first run or
+    new keys."""
+    def read(start, symbols=None):
+        return read_panel(symbols, fields=["Close"], start=start, root=SILVER / "ohlcv")
+    state = load_online("features", KEYS)
+    if state is None or not FEATURES.exists():
+        panel = read(None)
+        feat_df = batch(panel)
+        state = OnlineFeatures(KEYS)
+        state.update(panel)
+        note = "rebuilt"
+    else:
+        rows, panel, feat_df = {}, read(state.asof), None
+        unseen = state.unseen(panel)
+        # backfilled symbols: their past rows from the batch path, their state replayed
+        if len(unseen):
+            history = read(None, unseen)
+            state.backfill(history)
+            feat_df = (pd.read_parquet(FEATURES).combine_first(batch(history.slice(end=state.asof)))
+                       .reindex(columns=pd.MultiIndex.from_product([NAMES, state.symbols])))
+        state.update(panel, on_row=lambda d, v: rows.__setitem__(d, _row(v)))
+        if rows:
+            stored = feat_df if feat_df is not None else pd.read_parquet(FEATURES)
+            feat_df = pd.concat([stored, _frame(rows, state.symbols)])
+        note = f"+{len(rows)} days" + (f", {len(unseen)} symbols backfilled" if len(unseen) else "")
+    if feat_df is not None:
+        feat_df.to_parquet(FEATURES)
+    save_online(state, "features")
+    print("features written:", FEATURES, f"({note})")
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("features"):
+        main()
@@ -0,0 +1,241 @@
+"""Content-hashed DAG runner for the daily pipeline (``make daily``).
+
+Each stage is a ``pipelines.*`` module run as its own process. It declares the
+artifacts it reads and writes and the stages it runs after. A stage is skipped
+when the digest of its inputs (plus the source of its module and every local
+module it imports, transitively) matches its last successful run and its
+outputs still exist. Stages whose dependencies are done
+run in parallel. Every run appends one record to ``data/runs/daily.jsonl``:
+status, wall time and the stage process's peak RSS (``wait4`` rusage) per
+stage. Stage output goes to ``data/runs/<run id>/<stage>.log``.
+
+Inputs are file paths, directories (every file hashed), or ``path#key`` for
+one key of a JSON file. For example, the silver manifest's ``version`` is
+already a content hash of the whole store.
+
+    make daily                      # DAG_FORCE=1 reruns everything
+    python -m pipelines.dag features scores   # just these stages (and nothing upstream)
+"""
+from __future__ import annotations
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+RUNS = Path("data/runs")
+LOG = RUNS / "daily.jsonl"
+STATE = RUNS / "state.json"
+FORCE = os.getenv("DAG_FORCE", "").lower() in ("1", "true")
+WORKERS = int(os.getenv("DAG_WORKERS", "0"))     # 0: every ready stage at once
+_SYSTEM = {Path(sysconfig.get_path(k)).resolve()
+           for k in ("stdlib", "platstdlib", "purelib", "platlib")}
+
+
+@dataclass
+class Stage:
+    name: str
+    module: str
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)
+    always: bool = False    # external inputs (e.g. Norgate): no local digest can tell it is current
+
+
+MANIFEST = "data/silver/manifest.json#version"
+DAILY = [
+    Stage("ingest", "pipelines.ingest_norgate", outputs=["data/silver/manifest.json"], always=True),
+    Stage("features", "pipelines.build_features", inputs=[MANIFEST],
+          outputs=["data/gold/features_daily.parquet"], after=["ingest"]),
+    Stage("covariance", "pipelines.update_covariance", inputs=[MANIFEST],
+          outputs=["data/gold/ewm_cov.npz"], after=["ingest"]),
+    # strategies are loaded by path from the registry specs, not imported by the stage
+    Stage("scores", "pipelines.daily_scores",
+          inputs=[MANIFEST, "ml/registry", "ml/strategies", "data/gold/membership"],
+          outputs=["data/gold/scores_latest.parquet"], after=["ingest"]),
+]
+
+
+def _hash_file(h, path: Path) -> None:
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+def digest(spec: str) -> str:
+    """Content digest of one input; missing inputs hash to a fixed marker."""
+    h = hashlib.sha256(spec.encode())
+    path, _, key = spec.partition("#")
+    p = Path(path)
+    if key:
+        h.update(json.dumps(json.loads(p.read_text()).get(key) if p.exists() else None).encode())
+    elif p.is_dir():
+        for f in sorted(q for q in p.rglob("*") if q.is_file() and "__pycache__" not in q.parts):
+            h.update(str(f.relative_to(p)).encode())
+            _hash_file(h, f)
+    elif p.exists():
+        _hash_file(h, p)
+    else:
+        h.update(b"<missing>")
+    return h.hexdigest()[:16]
+
+
+def _find(name: str) -> Path | None:
+    """Source file of module ``name`` on ``sys.path``, located without importing anything."""
+    rel = Path(*name.split("."))
+    for entry in sys.path:
+        base = Path(entry or ".") / rel
+        for path in (base.parent / f"{base.name}.py", base / "__init__.py"):
+            if path.is_file():
+                return path
+        if base.is_dir():       # namespace package: no code of its own
+            return None
+    return None
+
+
+def local_sources(module: str) -> dict[str, Path]:
+    """``module`` and the local (not stdlib or installed) modules it imports, transitively.
+
+    Imports are read from the source, function-level ones included; names
+    that turn out not to be modules (``from x import func``) are ignored.
+    """
+    found: dict[str, Path] = {}
+    todo, seen = [module], set()
+    while todo:
+        name = todo.pop()
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        parts = name.split(".")
+        todo += [".".join(parts[:i]) for i in range(1, len(parts))]   # parent packages run too
+        path = _find(name)
+        if path is None or any(path.resolve().is_relative_to(d) for d in _SYSTEM):
+            continue
+        found[name] = path
+        pkg = name if path.name == "__init__.py" else name.rpartition(".")[0]
+        for node in ast.walk(ast.parse(path.read_bytes())):
+            if isinstance(node, ast.Import):
+                todo += [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ""
+                if node.level:
+                    anchor = pkg.split(".")[:len(pkg.split(".")) - node.level + 1]
+                    base = ".".join([*anchor, base] if base else anchor)
+                todo += [base, *(f"{base}.{a.name}" for a in node.names)]
+    return found
+
+
+def stage_digest(stage: Stage) -> str:
+    h = hashlib.sha256(stage.module.encode())
+    for name, path in sorted(local_sources(stage.module).items()):
+        h.update(name.encode())
+        _hash_file(h, path)
+    for spec in stage.inputs:
+        h.update(digest(spec).encode())
+    return h.hexdigest()[:16]
+
+
+def _run(stage: Stage, logdir: Path) -> dict:
+    """Run one stage in a child process; wall time, the child's peak RSS and its metrics summary."""
+    logdir.mkdir(parents=True, exist_ok=True)
+    summary = logdir / f"{stage.name}.metrics.json"
+    t0 = time.perf_counter()
+    with open(logdir / f"{stage.name}.log", "wb") as log:
+        proc = subprocess.Popen([sys.executable, "-m", stage.module], stdout=log,
+                                stderr=subprocess.STDOUT,
+                                env={**os.environ, "METRICS_OUT": str(summary)})
+        _, status, usage = os.wait4(proc.pid, 0)     # reaped here, so Popen never sees the status
+    code = proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in bytes on macOS, KiB on Linux
+    rss = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    out = {"status": "ran" if code == 0 else "failed", "exit_code": code,
+           "seconds": round(time.perf_counter() - t0, 3), "peak_rss_mb": round(rss, 1)}
+    if summary.exists():   # stages run under libs.utils.metrics.run
+        out["metrics"] = json.loads(summary.read_text())["metrics"]
+    return out
+
+
+def _read_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def run(stages: list[Stage], targets: list[str] | None = None, force: bool = FORCE,
+        workers: int = WORKERS, runs: Path = RUNS) -> dict:
+    """Run ``stages`` (or only ``targets``) in dependency order; returns the run record."""
+    by_name = {s.name: s for s in stages}
+    todo = [by_name[t] for t in targets] if targets else list(stages)
+    names = {s.name for s in todo}
+    deps = {s.name: [d for d in s.after if d in names] for s in todo}
+    state_path, log_path = runs / STATE.name, runs / LOG.name
+    state = _read_state(state_path)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    t0 = time.perf_counter()
+    results: dict[str, dict] = {}
+    pending = {s.name: s for s in todo}
+    running: dict = {}
+
+    def settle(name: str, result: dict, key: str | None = None) -> None:
+        results[name] = result
+        if result["status"] == "ran" and key is not None:
+            state[name] = key
+        rss = f"  {result['peak_rss_mb']:.0f} MB" if "peak_rss_mb" in result else ""
+        print(f"[dag] {name:<12} {result['status']:<8} {result.get('seconds', 0):8.2f}s{rss}",
+              flush=True)
+
+    with ThreadPoolExecutor(max_workers=workers or len(todo) or 1) as pool:
+        while pending or running:
+            progress = True
+            while progress:                 # settle skips/blocks until nothing more becomes ready
+                progress = False
+                for name, stage in list(pending.items()):
+                    if any(d not in results for d in deps[name]):
+                        continue
+                    del pending[name]
+                    progress = True
+                    if any(results[d]["status"] in ("failed", "blocked") for d in deps[name]):
+                        settle(name, {"status": "blocked"})
+                        continue
+                    key = stage_digest(stage)
+                    fresh = all(Path(o).exists() for o in stage.outputs) and state.get(name) == key
+                    if fresh and not (force or stage.always):
+                        settle(name, {"status": "skipped", "seconds": 0.0, "digest": key})
+                        continue
+                    running[pool.submit(_run, stage, runs / run_id)] = (name, key)
+            if not running:
+                if pending:
+                    raise ValueError(f"dependency cycle among {sorted(pending)}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, key = running.pop(fut)
+                settle(name, {**fut.result(), "digest": key}, key)
+
+    record = {"run_id": run_id, "seconds": round(time.perf_counter() - t0, 3),
+              "ok": all(r["status"] in ("ran", "skipped") for r in results.values()),
+              "stages": {s.name: results[s.name] for s in todo}}
+    runs.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+    with open(log_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def main(argv: list[str] | None = None) -> int:
+    record = run(DAILY, targets=(argv if argv is not None else sys.argv[1:]) or None)
+    print(f"[dag] run {record['run_id']} {'ok' if record['ok'] else 'FAILED'} "
+          f"in {record['seconds']:.2f}s (log: {LOG})")
+    return 0 if record["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,137 @@
-import pandas as pd
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from ml.registry.loader import load_model
+
+import pandas as pd
+
+from libs.md.panel import Panel
+from libs.md.silver import read_panel
+from libs.md.universe import load_membership
+from libs.utils import metrics
+from libs.utils.sharedmem import attach_arrays, shared_arrays
+from ml.registry.loader import get_registry, load_model
+from ml.strategies.online import OnlineFeatures, feature_keys, update_online
 
 SILVER = Path("data/silver"); GOLD = Path("data/gold"); GOLD.mkdir(parents=True, exist_ok=True)
+WORKERS = int(os.getenv("SCORES_WORKERS", "0")) or os.cpu_count()
+INDEX = os.getenv("UNIVERSE_INDEX", "^SPX")
+# advance rolling state by the new bars only
+ONLINE = os.getenv("SCORES_ONLINE", "true").lower() == "true"
+
+def run_strategy(name: str, version: str | None = None, ohlcv: Panel | None = None,
+                 universe: pd.DataFrame | None = None,
+                 online: OnlineFeatures | None = None) -> pd.DataFrame:
+    model, spec = load_model(name, version)
+    if online is not None:
+        result = model.score_latest(online, universe=universe)
+    else:
+        if ohlcv is None:
+            ohlcv = read_panel(fields=["Close"], root=SILVER / "ohlcv")
+        result = model.score(ohlcv) if universe is None else model.score(ohlcv, universe=universe)
+    return result["scores"].to_frame(name=f"{name}@{spec['version']}")
+
+def _timed(name: str, version: str | None, ohlcv: Panel | None,
+           universe: pd.DataFrame | None = None, online: OnlineFeatures | None = None
+           ) -> tuple[pd.DataFrame | None, dict]:
+    t0 = time.perf_counter()
+    status = {"strategy": name, "version": version, "ok": True, "error": None}
+    frame = None
+    try:
+        frame = run_strategy(name, version, ohlcv, universe, online)
+        status["symbols"] = int(frame.shape[0])
+    except Exception as e:
+        status.update(ok=False, error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    status["seconds"] = round(time.perf_counter() - t0, 4)
+    return frame, status
+
+# --- worker side: map the shared panel once per process ---
+_PANEL: dict = {}
+
+def _init_worker(spec: dict, fields, dates, symbols) -> None:
+    _PANEL["panel"] = Panel(attach_arrays(spec)["values"], fields, dates, symbols)
+
+def _score_in_worker(name: str, version: str | None, universe: pd.DataFrame | None):
+    return _timed(name, version, _PANEL["panel"], universe)
+
+def score_all(strategies: list[tuple[str, str | None]], panel: Panel, workers: int = WORKERS,
+              universe: pd.DataFrame | None = None) -> tuple[pd.DataFrame, list[dict]]:
+    """Score every strategy on one in-memory panel, in parallel when there are several."""
+    if len(strategies) <= 1 or workers <= 1:
+        results = [_timed(n, v, panel, universe) for n, v in strategies]
+    else:
+        with shared_arrays({"values": panel.values}) as shm:
+            initargs = (shm, panel.fields, panel.dates, panel.symbols)
+            with ProcessPoolExecutor(max_workers=min(workers, len(strategies)),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                futures = [pool.submit(_score_in_worker, n, v, universe) for n, v in strategies]
+                results = []
+                for (n, v), fut in zip(strategies, futures):
+                    try:
+                        results.append(fut.result())
+                    except Exception as e:  # worker died: keep the other strategies
+                        results.append((None, {"strategy": n, "version": v, "ok": False,
+                                               "error": f"{type(e).__name__}: {e}"}))
+    frames = [f for f, _ in results if f is not None]
+    scores = pd.concat(frames, axis=1) if frames else pd.DataFrame(index=panel.symbols)
+    return scores, [s for _, s in results]
+
+def online_keys(strategies: list[tuple[str, str | None]]) -> list[str] | None:
+    """Union of the rolling features the strategies pull, or None if one cannot score online."""
+    keys: set[str] = set()
+    for name, version in strategies:
+        try:
+            model, _ = load_model(name, version)
+        except Exception:  # reported by its own scoring status
+            continue
+        if not hasattr(model, "score_latest"):
+            return None
+        keys.update(feature_keys(model))
+    return sorted(keys)
 
-def run_strategy(name: str, version: str | None = None) -> pd.DataFrame:
-    model, _ = load_model(name, version)
-    ohlcv = pd.read_parquet(SILVER / "ohlcv.parquet")
-    result = model.score(ohlcv)
-    return result["scores"].to_frame(name=f"{name}")
+def score_online(strategies: list[tuple[str, str | None]], state: OnlineFeatures,
+                 universe: pd.DataFrame | None = None) -> tuple[pd.DataFrame, list[dict]]:
+    """Score every strategy from the last row of an online state; cheap, so serial."""
+    results = [_timed(n, v, None, universe, state) for n, v in strategies]
+    frames = [f for f, _ in results if f is not None]
+    scores = pd.concat(frames, axis=1) if frames else pd.DataFrame(index=state.symbols)
+    return scores, [s for _, s in results]
 
 def main():
-    registry_dir = Path("ml/registry")
-    strategies = [p.stem for p in registry_dir.glob("*.yaml")]
-    frames = [run_strategy(name) for name in strategies]
-    df = pd.concat(frames, axis=1)
+    registry = get_registry()
+    strategies = [(name, ver) for name in registry.names() for ver in registry.versions(name)]
+    t0 = time.perf_counter()
+    membership = load_membership(INDEX)
+    keys = online_keys(strategies) if ONLINE else None
+    if keys is not None:  # persisted rolling state, advanced by the bars since its as-of date
+        def read(start, symbols=None):
+            return read_panel(symbols, fields=["Close"], start=start, root=SILVER / "ohlcv")
+        state, _ = update_online("scores", keys, read)
+        universe = membership.mask([state.asof], state.symbols) if membership is not None else None
+        load_s = time.perf_counter() - t0
+        df, statuses = score_online(strategies, state, universe)
+        as_of = state.asof
+    else:
+        panel = read_panel(fields=["Close"], root=SILVER / "ohlcv")
+        universe = (membership.mask(panel.dates[-1:], panel.symbols)
+                    if membership is not None else None)
+        load_s = time.perf_counter() - t0
+        df, statuses = score_all(strategies, panel, universe=universe)
+        as_of = panel.dates[-1] if len(panel.dates) else None
     out = GOLD / "scores_latest.parquet"; df.to_parquet(out)
-    print("scores written:", out)
+    report = {
+        "as_of": str(as_of.date()) if as_of is not None else None,
+        "online": keys is not None,
+        "load_seconds": round(load_s, 4),
+        "total_seconds": round(time.perf_counter() - t0, 4),
+        "strategies": statuses,
+    }
+    (GOLD / "scores_status.json").write_text(json.dumps(report, indent=2))
+    failed = [s["strategy"] for s in statuses if not s["ok"]]
+    print("scores written:", out, f"({len(statuses) - len(failed)} ok, failed: {failed or 'none'})")
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("scores"):
+        main()
@@ -1,21 +1,75 @@
 import os, json
 from datetime import date
 from pathlib import Path
+import pandas as pd
 from libs.md.norgate.client import NorgateClient
+from libs.md.silver import (ADJUST_MODES, adjustment_steps, last_dates, list_symbols,
+                            merge_adjustments, merge_ohlcv, read_manifest, read_ohlcv,
+                            update_manifest)
+from libs.md.sparklines import write_sparklines
+from libs.md.universe import update_membership
+from libs.utils import metrics
 
 DATA = Path("data"); SILVER = DATA / "silver"; SILVER.mkdir(parents=True, exist_ok=True)
 INDEX = os.getenv("UNIVERSE_INDEX", "^SPX")
 START = os.getenv("HIST_START", "2015-01-01")
+FULL = os.getenv("INGEST_FULL", "false").lower() == "true"
+FACTOR_OVERLAP = 10  # calendar days, covers weekends and holiday runs
 
-def main(eod_date: str | None = None):
+def plan_fetches(members: list[str], stored: dict[str, pd.Timestamp], eod_date: str,
+                 full: bool = False) -> dict[str, list[str]]:
+    """Group symbols by the start date they need: new symbols backfill from START,
+    known symbols resume the day after their last stored bar."""
+    end = pd.Timestamp(eod_date)
+    plan: dict[str, list[str]] = {}
+    for sym in members:
+        last = None if full else stored.get(sym)
+        if last is not None and last >= end:
+            continue
+        start = START if last is None else str((last + pd.Timedelta(days=1)).date())
+        plan.setdefault(start, []).append(sym)
+    return plan
+
+def main(eod_date: str | None = None, full: bool = FULL):
     eod_date = eod_date or str(date.today())
     nc = NorgateClient()
-    members = nc.constituents(INDEX, eod_date)
-    bars = nc.bars_eod(members, start=START, end=eod_date, adjust="CASHDIVIDENDS")
-    out = SILVER / "ohlcv.parquet"
-    bars.to_parquet(out)
+    out = SILVER / "ohlcv"
+    membership = update_membership(INDEX, eod_date, nc, start=START, candidates=list_symbols(out))
+    members = membership.members(eod_date)
+    stored = last_dates(out)
+    # past members Norgate had no bars for; not asked again unless INGEST_FULL
+    empty = set() if full else set(read_manifest(SILVER / "manifest.json").get("empty", []))
+    # current members stay fresh; past members (delisted included) are backfilled once
+    symbols = members + [s for s in membership.ever(START)
+                         if s not in stored and s not in members and s not in empty]
+    plan = plan_fetches(symbols, stored, eod_date, full=full)
+    changed: set[str] = set()
+    for start, syms in sorted(plan.items()):
+        # raw bars once; every adjusted view is rebuilt at read time from the factor table
+        bars = nc.bars_eod(syms, start=start, end=eod_date, adjust="NONE")
+        changed.update(merge_ohlcv(bars, out))
+        got = [s for s in syms if not bars.empty and s in bars.columns.get_level_values(0)]
+        if start == START:
+            empty |= {s for s in syms if s not in got and s not in members}
+        empty -= set(got)
+        if not got:
+            continue
+        # reach back past the last stored bar so an event on the first new day has its prior close;
+        # the raw closes are the bars just merged plus that overlap, read back from the store
+        if start != START:
+            since = str((pd.Timestamp(start) - pd.Timedelta(days=FACTOR_OVERLAP)).date())
+        else:
+            since = start
+        raw = read_ohlcv(got, ["Close"], since, eod_date, root=out, adjust="NONE")
+        raw = raw.xs("Close", axis=1, level=1)
+        adjusted = {m: nc.closes(got, since, eod_date, m) for m in ADJUST_MODES}
+        changed.update(merge_adjustments(adjustment_steps(raw, adjusted), out))
+    manifest = update_manifest(changed, out, index=INDEX, asof=eod_date, empty=sorted(empty))
     (SILVER / "universe.json").write_text(json.dumps({"index": INDEX, "asof": eod_date, "count": len(members)}))
-    print(f"written {out}, universe size {len(members)}")
+    write_sparklines(eod_date, out)
+    print(f"written {out}, universe size {len(members)}, "
+          f"{len(changed)} symbols updated in {len(plan)} fetches, version {manifest['version']}")
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("ingest"):
+        main()
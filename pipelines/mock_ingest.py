@@ -1,18 +1,31 @@
 # pipelines/mock_ingest.py
+import os
+from pathlib import Path
+from typing import Iterator
+
 import numpy as np
 import pandas as pd
-from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.md.feeds import synth_session, write_replay
+from libs.md.silver import FIELDS, update_manifest, write_long, write_ohlcv
+from libs.md.sparklines import write_sparklines
 
 DATA = Path("data"); SILVER = DATA / "silver"; SILVER.mkdir(parents=True, exist_ok=True)
 
 SYMS = ["AAPL", "MSFT", "AMZN", "TSLA", "SPY"]
+N_SYMBOLS = int(os.getenv("MOCK_SYMBOLS", "0"))  # >0: synthetic universe of that size
+YEARS = int(os.getenv("MOCK_YEARS", "10"))
+CHUNK = 256  # symbols per generated block / parquet row group
 
-def main():
-    dates = pd.date_range("2023-01-01", periods=300, freq="B")  # 300 business days
-    rng = np.random.default_rng(0)
+def synth_ohlcv(symbols: list[str] = SYMS, periods: int = 300, start: str = "2023-01-01",
+                seed: int = 0) -> pd.DataFrame:
+    dates = pd.date_range(start, periods=periods, freq="B")  # business days
+    rng = np.random.default_rng(seed)
 
     panels = {}
-    for sym in SYMS:
+    for sym in symbols:
         base = 100 + rng.normal(0, 1)  # starting price
         rets = rng.normal(0, 0.01, size=len(dates))  # daily returns ~1%
         prices = base * np.exp(np.cumsum(rets))
@@ -26,10 +39,80 @@ def main():
         panels[sym] = df
 
     # concat into MultiIndex DataFrame: (symbol, field)
-    ohlcv = pd.concat(panels, axis=1)
-    out = SILVER / "ohlcv.parquet"
-    ohlcv.to_parquet(out)
-    print("mock OHLCV written:", out, "shape:", ohlcv.shape)
+    return pd.concat(panels, axis=1)
+
+def synth_long(n_symbols: int, periods: int, start: str = "2000-01-03", seed: int = 0,
+               chunk: int = CHUNK) -> Iterator[pd.DataFrame]:
+    """Long ``date, symbol, <fields>`` bars for ``S00000..``, ``chunk`` symbols at a time.
+
+    Each block has its own seeded generator, so output is deterministic for a
+    given (seed, chunk) and memory stays at one ``periods x chunk`` block. About
+    a fifth of the symbols list part-way through the history.
+    """
+    dates = pd.bdate_range(start, periods=periods)
+    day = np.arange(periods)[:, None]
+    for c0 in range(0, n_symbols, chunk):
+        k = min(chunk, n_symbols - c0)
+        rng = np.random.default_rng([seed, c0 // chunk])
+        noise = rng.standard_normal((periods, k))
+        rets = noise * rng.uniform(0.008, 0.03, k) + rng.normal(3e-4, 2e-4, k)
+        close = rng.uniform(10, 300, k) * np.exp(np.cumsum(rets, axis=0))
+        spread = np.abs(rng.normal(0, 0.005, (periods, k)))
+        block = {
+            "Open": close * (1 + rng.normal(0, 0.002, (periods, k))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(100_000, 5_000_000, (periods, k)).astype(np.float64),
+        }
+        listed = np.where(rng.random(k) < 0.2, rng.integers(0, max(periods // 2, 1), k), 0)
+        live = (day >= listed).ravel()
+        yield pd.DataFrame({
+            "date": np.repeat(dates.values, k)[live],
+            "symbol": pd.Categorical.from_codes(np.tile(np.arange(k), periods)[live],
+                                                [f"S{i:05d}" for i in range(c0, c0 + k)]),
+            **{f: block[f].ravel()[live] for f in FIELDS},
+        })
+
+def write_synth_parquet(path: Path, n_symbols: int, periods: int, **kw) -> int:
+    """Stream ``synth_long`` into one long parquet file, a row group per block; returns rows."""
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    rows, writer = 0, None
+    try:
+        for block in synth_long(n_symbols, periods, **kw):
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def write_synth_store(root: Path, n_symbols: int, periods: int, **kw) -> list[str]:
+    """Stream ``synth_long`` into the partitioned silver store; returns the symbols."""
+    syms = []
+    for block in synth_long(n_symbols, periods, **kw):
+        syms += write_long(block, root)
+    return syms
+
+def main():
+    out = SILVER / "ohlcv"
+    if N_SYMBOLS:
+        periods = YEARS * 252
+        syms = write_synth_store(out, N_SYMBOLS, periods)
+        last = pd.bdate_range("2000-01-03", periods=periods)[-1]
+        update_manifest(syms, out, index="mock", asof=str(last.date()))
+        write_sparklines(last, out)
+        print("mock OHLCV written:", out, f"{len(syms)} symbols x {periods} days")
+        return
+    ohlcv = synth_ohlcv()
+    syms = write_ohlcv(ohlcv, out)
+    update_manifest(syms, out, index="mock", asof=str(ohlcv.index[-1].date()))
+    write_sparklines(ohlcv.index[-1], out)
+    last = ohlcv.xs("Close", axis=1, level=1).iloc[-1]
+    replay = write_replay(synth_session(last, ohlcv.index[-1] + pd.offsets.BDay()))
+    print("mock OHLCV written:", out, "shape:", ohlcv.shape, "| next session replay:", replay)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,97 @@
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from libs.md.panel import Panel
+from libs.md.silver import read_panel
+from libs.utils import metrics
+from libs.utils.sharedmem import attach_arrays, shared_arrays
+from ml.backtest.engine import BacktestCfg, run_backtest
+from ml.registry.loader import load_model
+from ml.strategies.features import FeatureBank
+
+GOLD = Path("data/gold"); SWEEPS = GOLD / "sweeps"
+SPEC = os.getenv("SWEEP_SPEC", "ml/sweeps/momo_trend.yaml")
+WORKERS = int(os.getenv("SWEEP_WORKERS", "0")) or os.cpu_count()
+
+def expand(spec: dict, base: dict) -> list[dict]:
+    """Grid (or a seeded random sample of it) merged over the registry params."""
+    grid = spec["params"]
+    keys = sorted(grid)
+    combos = [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+    combos = [{**base, **c} for c in combos]
+    combos = [c for c in combos if c.get("ma_fast", 0) < c.get("ma_slow", float("inf"))]
+    if spec.get("search", "grid") == "random":
+        n = min(int(spec.get("n_samples", len(combos))), len(combos))
+        combos = random.Random(spec.get("seed", 0)).sample(combos, n)
+    return combos
+
+# --- worker side: attach once per process, then evaluate many configs ---
+_WORKER: dict = {}
+
+def _init_worker(spec: dict, dates, symbols, model_cls) -> None:
+    arrays = attach_arrays(spec)
+    close = arrays.pop("close")
+    _WORKER.update(
+        bank=FeatureBank(close, arrays),
+        panel=Panel(close[None], ("Close",), dates, symbols),
+        model_cls=model_cls,
+    )
+
+def _evaluate(params: dict, bt: dict) -> dict:
+    t0 = time.perf_counter()
+    model = _WORKER["model_cls"](params)
+    panel = _WORKER["panel"]
+    scores = model.composite(panel, _WORKER["bank"])
+    bt = dict(bt)
+    start, end = bt.pop("start", None), bt.pop("end", None)
+    res = run_backtest(scores, panel.frame("Close"), start=start, end=end,
+                       cfg=BacktestCfg(top_frac=model.cfg.top_frac, **bt))
+    return {**res.stats, "seconds": time.perf_counter() - t0}
+
+def run_sweep(spec: dict, panel: Panel, workers: int = WORKERS) -> pd.DataFrame:
+    name, _, ver = spec["strategy"].partition("@")
+    model, registry_spec = load_model(name, ver or None)
+    configs = expand(spec, registry_spec.get("params", {}))
+
+    # every distinct window is computed once here, then shared read-only
+    close = panel.field("Close")
+    bank = FeatureBank(close)
+    for params in configs:
+        type(model)(params).prepare(bank)
+
+    with shared_arrays({"close": close, **bank.arrays}) as shm:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm, panel.dates, panel.symbols, type(model))) as pool:
+            metrics = list(pool.map(_evaluate, configs, itertools.repeat(spec.get("backtest", {}))))
+
+    rows = [{**{k: json.dumps(v) if isinstance(v, list) else v for k, v in params.items()},
+             **m, "params": json.dumps(params)}
+            for params, m in zip(configs, metrics)]
+    return pd.DataFrame(rows).sort_values("sharpe", ascending=False, ignore_index=True)
+
+def main(spec_path: str = SPEC):
+    spec = yaml.safe_load(Path(spec_path).read_text())
+    end = spec.get("backtest", {}).get("end")
+    panel = read_panel(fields=["Close"], end=end)
+    t0 = time.perf_counter()
+    results = run_sweep(spec, panel)
+    SWEEPS.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out = SWEEPS / f"{spec['strategy'].partition('@')[0]}_{stamp}.parquet"
+    results.to_parquet(out)
+    print(f"{len(results)} configs in {time.perf_counter() - t0:.1f}s -> {out}")
+    print(results.head(5)[["params", "sharpe", "cagr", "max_drawdown", "ann_turnover"]].to_string())
+
+if __name__ == "__main__":
+    with metrics.run("sweep"):
+        main(*sys.argv[1:2])
@@ -0,0 +1,16 @@
+from pathlib import Path
+from libs.md.covariance import COVARIANCE, update_covariance
+from libs.md.silver import read_panel
+from libs.utils import metrics
+
+SILVER = Path("data/silver")
+
+def main():
+    c = update_covariance(lambda start: read_panel(fields=["Close"], start=start,
+                                                   root=SILVER / "ohlcv"))
+    asof = c.asof.date() if c.asof is not None else None
+    print(f"covariance through {asof} ({len(c.symbols)} symbols) written:", COVARIANCE)
+
+if __name__ == "__main__":
+    with metrics.run("covariance"):
+        main()
@@ -86,9 +86,15 @@ cleanup() {
 }
 trap cleanup EXIT INT TERM
 
-# Optional: open docs after backend warms up
+# Optional: open docs once the backend reports ready (warmup done)
 if $OPEN_DOCS; then
-  ( sleep 1; if command -v open >/dev/null; then open "http://localhost:${API_PORT}/docs"; fi ) &
+  (
+    for _ in $(seq 1 120); do
+      curl -fs "http://localhost:${API_PORT}/readyz" >/dev/null 2>&1 && break
+      sleep 0.5
+    done
+    if command -v open >/dev/null; then open "http://localhost:${API_PORT}/docs"; fi
+  ) &
 fi
 
 # ---- start frontend ----
@@ -0,0 +1,177 @@
+"""Benchmark suite: wall time and peak traced memory of the hot paths, as JSON.
+
+Runs against a synthetic silver store (``pipelines.mock_ingest.write_synth_store``)
+and the same bars as one long parquet file (``write_synth_parquet``), built once
+per size under ``$BENCH_WORK`` (default: ``<tmp>/ait-bench``) and reused, so
+numbers are comparable across commits. Reports go to ``data/bench/``.
+Each case runs ``BENCH_REPEAT`` times untraced for timing, then once under
+``tracemalloc`` for the memory peak
+(Python and NumPy allocations; Arrow's own memory pool is not traced).
+
+    make bench                                   # defaults: 500 symbols x 10 years
+    BENCH_SYMBOLS=3000 BENCH_YEARS=25 make bench
+    BENCH_BASELINE=data/bench/<earlier>.json make bench   # prints ratios vs. a previous run
+"""
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "data" / "bench"
+WORK = Path(os.getenv("BENCH_WORK") or Path(tempfile.gettempdir()) / "ait-bench")
+SYMBOLS = int(os.getenv("BENCH_SYMBOLS", "500"))
+YEARS = int(os.getenv("BENCH_YEARS", "10"))
+LONG = Path("data/bench_long.parquet")   # relative to the work dir
+REPEAT = int(os.getenv("BENCH_REPEAT", "3"))
+BASELINE = os.getenv("BENCH_BASELINE")
+ONLY = [s for s in os.getenv("BENCH_ONLY", "").split(",") if s]
+
+
+def measure(name: str, fn: Callable[[], object], repeat: int = REPEAT) -> dict:
+    gc.collect()
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):  # pipelines print progress; stdout is the JSON
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name, "repeat": repeat, "first_s": times[0],
+            "median_s": statistics.median(times), "min_s": min(times), "peak_mb": peak / 2**20}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def prepare(work: Path) -> None:
+    """Build the synthetic store + manifest once; everything else runs in ``work``."""
+    from libs.md.silver import update_manifest
+    from pipelines.mock_ingest import write_synth_parquet, write_synth_store
+
+    if not (work / LONG).exists():
+        write_synth_parquet(work / LONG, SYMBOLS, YEARS * 252)
+    store = work / "data/silver/ohlcv"
+    if (work / "data/silver/manifest.json").exists():
+        return
+    t0 = time.perf_counter()
+    syms = write_synth_store(store, SYMBOLS, YEARS * 252)
+    update_manifest(syms, store, path=work / "data/silver/manifest.json", index="bench")
+    print(f"built {SYMBOLS} x {YEARS}y store in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    import pyarrow.parquet as pq
+    from fastapi.testclient import TestClient
+
+    import pipelines.build_features as build_features
+    import pipelines.daily_scores as daily_scores
+    from apps.backend.main import app
+    from libs.md.silver import read_panel
+    from ml.strategies.holdings_review import review_holdings
+    from ml.strategies.momo_trend import MomoTrend
+
+    panel = read_panel(fields=["Close"])
+    held = list(panel.symbols[:: max(1, len(panel.symbols) // 20)][:20])
+    model = MomoTrend()
+    client = TestClient(app)
+    body = {"account_id": "bench", "symbols": held, "benchmark": held[0]}
+    n = len(panel.symbols)
+    batch = {"portfolios": [{"account_id": f"acct{i}",
+                             "symbols": list(panel.symbols[i % n::37][:15])} for i in range(200)]}
+    bars = {"symbol": ",".join(held), "fields": "c"}
+    daily_scores.WORKERS = 1
+
+    def get(path, **kw):
+        r = client.get(path, **kw)
+        r.raise_for_status()
+        return r
+
+    def post(path, **kw):
+        r = client.post(path, **kw)
+        r.raise_for_status()
+        return r
+
+    return {
+        "load_panel_close": lambda: read_panel(fields=["Close"]),
+        "load_panel_ohlcv": lambda: read_panel(),
+        "load_long_parquet": lambda: pq.read_table(LONG),
+        "momo_trend_score": lambda: model.score(panel),
+        "review_holdings": lambda: review_holdings(panel, held, benchmark=held[0]),
+        "build_features": build_features.main,
+        "daily_scores": daily_scores.main,
+        "api_keep_or_replace": lambda: post("/v1/analysis/portfolio/keep_or_replace", json=body),
+        "api_keep_or_replace_batch":
+            lambda: post("/v1/analysis/portfolio/keep_or_replace/batch", json=batch),
+        "api_bars_json": lambda: get("/v1/md/bars", params=bars),
+        "api_bars_arrow": lambda: get("/v1/md/bars", params=bars,
+                                      headers={"Accept": "application/vnd.apache.arrow.stream"}),
+        "api_strategies": lambda: get("/v1/analysis/strategies"),
+    }
+
+
+def compare(results: list[dict], baseline: dict) -> None:
+    base = {r["name"]: r for r in baseline["results"]}
+    for r in results:
+        b = base.get(r["name"])
+        if b:
+            print(f"{r['name']:<24} time x{r['median_s'] / b['median_s']:.2f}  "
+                  f"mem x{r['peak_mb'] / max(b['peak_mb'], 1e-9):.2f}", file=sys.stderr)
+
+
+def main() -> dict:
+    work = WORK / f"work_{SYMBOLS}x{YEARS}"
+    work.mkdir(parents=True, exist_ok=True)
+    os.chdir(work)
+    prepare(work)
+    results = []
+    for name, fn in cases().items():
+        if ONLY and name not in ONLY:
+            continue
+        results.append(measure(name, fn))
+        r = results[-1]
+        print(f"{name:<24} {r['median_s'] * 1e3:9.1f} ms  {r['peak_mb']:8.1f} MB", file=sys.stderr)
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": {"symbols": SYMBOLS, "years": YEARS, "repeat": REPEAT},
+        "env": {"python": platform.python_version(), "numpy": np.__version__,
+                "pandas": pd.__version__, "cpus": os.cpu_count()},
+        "results": results,
+    }
+    stamp = report["timestamp"].replace(":", "").replace("-", "")[:15]
+    OUT.mkdir(parents=True, exist_ok=True)
+    out = OUT / f"bench_{report['commit'] or 'nogit'}_{stamp}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    if BASELINE:
+        compare(results, json.loads(Path(BASELINE).read_text()))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from libs.md.silver import (ADJUST_MODES, adjustment_steps, merge_adjustments, read_adjustments,
+                            read_long, write_ohlcv)
+from pipelines.mock_ingest import synth_ohlcv
+
+RAW = synth_ohlcv(["AAPL", "MSFT"], periods=120, start="2024-01-01")
+SPLIT, DIV = RAW.index[40], RAW.index[80]  # AAPL 2:1 split, MSFT $1 dividend
+
+def vendor_view(mode: str) -> pd.DataFrame:
+    """Back-adjusted bars the way the vendor would serve them for ``mode``."""
+    px = RAW.copy()
+    before_split = px.index < SPLIT
+    for f in ["Open", "High", "Low", "Close"]:
+        px.loc[before_split, ("AAPL", f)] *= 0.5
+    px.loc[before_split, ("AAPL", "Volume")] *= 2
+    if mode != "CAPITAL":
+        prev = RAW.loc[:DIV, ("MSFT", "Close")].iloc[-2]
+        for f in ["Open", "High", "Low", "Close"]:
+            px.loc[px.index < DIV, ("MSFT", f)] *= 1 - 1.0 / prev
+    return px
+
+def closes(frame):
+    return frame.xs("Close", axis=1, level=1)
+
+@pytest.fixture
+def store(tmp_path):
+    root = tmp_path / "silver/ohlcv"
+    write_ohlcv(RAW, root)
+    events = adjustment_steps(closes(RAW), {m: closes(vendor_view(m)) for m in ADJUST_MODES})
+    assert merge_adjustments(events, root) == ["AAPL", "MSFT"]
+    return root
+
+def test_factor_table_is_compact(store):
+    events = read_adjustments(root=store)
+    assert len(events) == 2 and set(events["date"]) == {SPLIT, DIV}
+    assert events.set_index("symbol").loc["AAPL", "CAPITAL"] == pytest.approx(0.5)
+    assert events.set_index("symbol").loc["MSFT", "CAPITAL"] == pytest.approx(1.0)
+
+@pytest.mark.parametrize("mode", ["NONE", *ADJUST_MODES])
+def test_every_mode_is_derived_from_raw_bars(store, mode):
+    got = read_long(root=store, adjust=mode).set_index(["date", "symbol"]).sort_index()
+    want = (RAW if mode == "NONE" else vendor_view(mode)).stack(level=0, future_stack=True)
+    want.index = want.index.set_names(["date", "symbol"])
+    np.testing.assert_allclose(got[want.columns].to_numpy(), want.sort_index().to_numpy(),
+                               rtol=1e-12)
+
+def test_overlapping_fetch_adds_nothing(store):
+    tail = slice(RAW.index[70], None)
+    adjusted = {m: closes(vendor_view(m).loc[tail]) for m in ADJUST_MODES}
+    events = adjustment_steps(closes(RAW.loc[tail]), adjusted)
+    assert merge_adjustments(events, store) == []
+    with pytest.raises(ValueError):
+        read_long(root=store, adjust="SPECIAL")
@@ -0,0 +1,31 @@
+import threading
+import time
+from apps.backend.services.artifacts import ArtifactCache
+
+def test_concurrent_cold_requests_load_once():
+    cache, calls = ArtifactCache(), []
+    def loader():
+        calls.append(1); time.sleep(0.05); return "frame"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", 1, loader)))
+               for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert results == ["frame"] * 8 and len(calls) == 1
+    assert cache.stats["loads"] == 1 and cache.stats["hits"] == 7
+
+def test_version_change_reloads():
+    cache = ArtifactCache()
+    assert cache.get("k", 1, lambda: "a") == "a"
+    assert cache.get("k", 1, lambda: "b") == "a"
+    assert cache.get("k", 2, lambda: "b") == "b"
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ArtifactCache(max_entries=3)
+    for d in range(3):
+        cache.get(("model_scores", "m", d), 1, lambda d=d: d)
+    cache.get(("model_scores", "m", 0), 1, lambda: "reloaded")       # touch 0
+    cache.get(("model_scores", "m", 3), 1, lambda: 3)
+    assert cache.peek(("model_scores", "m", 1)) is None and len(cache._entries) == 3
+    assert cache.get(("model_scores", "m", 0), 1, lambda: "reloaded") == 0
+    assert cache.stats["evictions"] == 1
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from ml.backtest.engine import BacktestCfg, run_backtest, top_k_mask
+
+DATES = pd.bdate_range("2024-01-01", periods=60)
+
+def test_top_k_mask_skips_nan_and_matches_frac():
+    s = np.array([[3.0, np.nan, 1.0, 2.0], [np.nan] * 4])
+    np.testing.assert_array_equal(top_k_mask(s, 0.5), [[True, False, False, False], [False] * 4])
+
+def test_ledger_tracks_held_asset_with_costs():
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (60, 3)), axis=0)),
+                         index=DATES, columns=["A", "B", "C"])
+    scores = pd.DataFrame(0.0, index=DATES, columns=close.columns); scores["B"] = 1.0
+    cfg = BacktestCfg(cash=1000.0, top_frac=0.1, rebalance_every=5, cost_bps=10, slippage_bps=0)
+    res = run_backtest(scores, close, cfg=cfg)
+    # buys B once on day 1 (cost 1.0), then never trades again
+    expected = (1000.0 - 1.0) * close["B"].iloc[1:] / close["B"].iloc[1]
+    np.testing.assert_allclose(res.equity, expected)
+    assert res.turnover.iloc[0] == 1.0 and (res.turnover.iloc[1:] == 0).all()
+    assert res.stats["total_costs"] == 1.0 and res.stats["rebalances"] == 12
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from libs.utils.cache import MemoCache, cached, fingerprint
+
+def test_fingerprint_tracks_content_not_identity():
+    df = pd.DataFrame(np.arange(12.0).reshape(4, 3), columns=list("abc"))
+    assert fingerprint(df) == fingerprint(df.copy())
+    changed = df.copy(); changed.iloc[2, 1] = -1.0
+    assert fingerprint(df) != fingerprint(changed)
+    assert fingerprint(df["a"].to_numpy()) != fingerprint(df["a"].to_numpy().astype("float32"))
+
+def test_evicts_by_bytes_and_counts():
+    cache = MemoCache(max_bytes=2 * 8000 + 100)
+    for i in range(3):
+        cache.put(str(i), np.zeros(1000))
+    assert cache.get("0", None) is None
+    assert cache.get("2") is not None
+    info = cache.info()
+    assert info["evictions"] == 1 and info["entries"] == 2 and info["hits"] == 1
+
+def test_cached_reuses_results_and_disk_tier(tmp_path):
+    calls = []
+    def rolling(df, window):
+        calls.append(window); return df.rolling(window).mean()
+    df = pd.DataFrame({"x": np.arange(50.0)})
+    f = cached(disk_dir=tmp_path)(rolling)
+    pd.testing.assert_frame_equal(f(df, 5), f(df.copy(), 5))
+    assert calls == [5]
+    g = cached(disk_dir=tmp_path)(rolling)  # fresh process-level cache, same disk tier
+    pd.testing.assert_frame_equal(g(df, 5), df.rolling(5).mean())
+    assert calls == [5] and g.cache_info()["disk_hits"] == 1
+
+def test_explicit_key_skips_fingerprinting_the_data():
+    calls = []
+    def score(panel, version):
+        calls.append(version); return panel.sum()
+    f = cached(key=lambda panel, version: version)(score)
+    big = np.ones(10)
+    assert f(big, "v1") == 10 and f(np.zeros(10), "v1") == 10   # same version: same entry
+    assert f(big, "v2") == 10 and calls == ["v1", "v2"]
+
+def test_pickles_in_a_shared_directory_are_not_loaded(tmp_path):
+    shared = tmp_path / "shared"
+    MemoCache(disk_dir=shared).put("k", {"a": 1})
+    assert MemoCache(disk_dir=shared).get("k") == {"a": 1}
+    shared.chmod(0o777)
+    assert MemoCache(disk_dir=shared).get("k", None) is None
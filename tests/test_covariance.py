@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import libs.md.covariance as covariance
+from libs.md.covariance import (EwmCov, load_covariance, panel_returns, save_covariance,
+                                update_covariance)
+from libs.md.panel import Panel
+from ml.strategies.holdings_review import replacement_candidates
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=300)
+
+def returns():
+    r = panel_returns(Panel.from_frame(OHLCV, fields=["Close"]))
+    r.iloc[:40, 1] = np.nan   # a late listing
+    return r
+
+def recursive(r: pd.DataFrame, halflife: float) -> tuple[np.ndarray, np.ndarray]:
+    lam = 0.5 ** (1 / halflife)
+    n = r.shape[1]
+    s, w = np.zeros((n, n)), np.zeros((n, n))
+    for row in r.to_numpy():
+        m = np.isfinite(row).astype(float)
+        x = np.nan_to_num(row)
+        s = lam * s + (1 - lam) * np.outer(x, x)
+        w = lam * w + (1 - lam) * np.outer(m, m)
+    return s, w
+
+def test_block_update_matches_daily_recursion_and_increments():
+    r = returns()
+    full = EwmCov.empty(halflife=20).update(r)
+    s, w = recursive(r, 20)
+    np.testing.assert_allclose(full.s, s, rtol=1e-10, atol=1e-18)
+    np.testing.assert_allclose(full.w, w, rtol=1e-10)
+    inc = EwmCov.empty(halflife=20).update(r.iloc[:250]).update(r.iloc[240:])   # overlap is skipped
+    assert inc.asof == r.index[-1]
+    pd.testing.assert_frame_equal(inc.frame(), full.frame(), rtol=1e-10)
+    grown = EwmCov.empty(halflife=20).update(r.iloc[:250, :3]).update(r.iloc[250:])
+    assert list(grown.symbols) == list(r.columns[:3]) + sorted(r.columns[3:])
+    corr = full.frame(corr=True)
+    np.testing.assert_allclose(np.diagonal(corr), 1.0)
+    assert np.isnan(full.corr(["AAPL"], ["NOPE"])).all()
+
+def test_update_reads_only_new_bars(tmp_path):
+    panel = Panel.from_frame(OHLCV, fields=["Close"])
+    path, starts = tmp_path / "gold/ewm_cov.npz", []
+    def read_closes(start):
+        starts.append(start)
+        return panel.slice(start, OHLCV.index[200]) if len(starts) == 1 else panel.slice(start)
+    first = update_covariance(read_closes, path, halflife=30)
+    assert starts == [None] and first.asof == OHLCV.index[200]
+    second = update_covariance(read_closes, path, halflife=30)
+    assert starts[1] == OHLCV.index[200] and second.asof == OHLCV.index[-1]
+    want = EwmCov.empty(halflife=30).update(panel_returns(panel))
+    loaded = load_covariance(path)
+    np.testing.assert_allclose(loaded.s, want.s, rtol=1e-10, atol=1e-18)
+    assert loaded.asof == want.asof and list(loaded.symbols) == list(want.symbols)
+
+def test_replacements_avoid_names_correlated_with_kept_holdings(tmp_path):
+    rng = np.random.default_rng(0)
+    base = rng.normal(0, 0.01, (250, 1))
+    twin = base + rng.normal(0, 0.001, (250, 1))
+    r = pd.DataFrame(np.hstack([base, twin, rng.normal(0, 0.01, (250, 3))]),
+                     index=pd.bdate_range("2024-01-01", periods=250),
+                     columns=["KEEP", "TWIN", "X", "Y", "Z"])
+    cov = load_covariance(save_covariance(EwmCov.empty().update(r), tmp_path / "c.npz"))
+    scores = pd.Series({"KEEP": 0.0, "TWIN": 3.0, "X": 2.9, "Y": 2.8, "Z": -1.0, "OUT": np.nan})
+    held = ["KEEP", "OUT"]
+    assert replacement_candidates(scores, held, keep=["KEEP"]) == ["TWIN", "X", "Y"]
+    assert replacement_candidates(scores, held, keep=["KEEP"], cov=cov) == ["X", "Y", "TWIN"]
+    unpenalized = replacement_candidates(scores, held, keep=["KEEP"], cov=cov, penalty=0)
+    assert unpenalized == ["TWIN", "X", "Y"]
+
+def test_new_symbol_is_unknown_until_it_has_enough_overlap():
+    r = returns()
+    # two shared days
+    c = EwmCov.empty(halflife=63).update(r.iloc[:250, :3]).update(r.iloc[250:252])
+    old, new = list(r.columns[:3]), list(r.columns[3:])
+    assert np.isnan(c.corr(new, old)).all() and np.isnan(c.corr(new)).all()
+    scores = pd.Series(1.0, index=r.columns)
+    # no penalty from noise
+    assert replacement_candidates(scores, old, keep=old, cov=c, k=len(new)) == new
+    c = c.update(r.iloc[252:])   # 48 shared days
+    assert np.isfinite(c.corr(new, list(r.columns[:3]))).all()
+
+def test_idle_symbols_are_pruned_on_save(tmp_path, monkeypatch):
+    r = returns()
+    r.iloc[200:, 2] = np.nan   # delisted after 200 days
+    c = EwmCov.empty(halflife=20).update(r.iloc[:150]).update(r.iloc[150:])
+    assert c.idle.tolist() == [0, 0, len(r) - 200, 0, 0]
+    assert c.prune(len(r) - 200) is c
+    pruned = c.prune(80)
+    assert list(pruned.symbols) == list(r.columns.drop(r.columns[2]))
+    pd.testing.assert_frame_equal(pruned.frame(), c.frame().drop(index=r.columns[2],
+                                                                 columns=r.columns[2]))
+    ohlcv = OHLCV.copy()
+    ohlcv.loc[ohlcv.index[201:], (r.columns[2], "Close")] = np.nan
+    panel = Panel.from_frame(ohlcv, fields=["Close"])
+    monkeypatch.setattr(covariance, "PRUNE_HALFLIVES", 4)
+    saved = update_covariance(lambda start: panel.slice(start), tmp_path / "c.npz", halflife=20)
+    assert r.columns[2] not in saved.symbols
+    np.testing.assert_array_equal(load_covariance(tmp_path / "c.npz").idle, saved.idle)
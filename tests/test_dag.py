@@ -0,0 +1,80 @@
+import json
+import pytest
+from pipelines.dag import Stage, run
+
+STAGE = """import json, pathlib, time
+src = pathlib.Path({src!r}); out = pathlib.Path({out!r})
+time.sleep({sleep})
+{body}
+out.write_text(src.read_text() + "+{name}")
+"""
+
+def toy(tmp_path, name, src, out, sleep=0.0, body=""):
+    source = STAGE.format(src=src, out=out, sleep=sleep, name=name, body=body)
+    (tmp_path / f"toy_{name}.py").write_text(source)
+    return f"toy_{name}"
+
+@pytest.fixture
+def stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "raw.txt").write_text("v1")
+    return [
+        Stage("ingest", toy(tmp_path, "ingest", "raw.txt", "silver.txt"), inputs=["raw.txt"],
+              outputs=["silver.txt"]),
+        Stage("a", toy(tmp_path, "a", "silver.txt", "a.txt", sleep=0.5), inputs=["silver.txt"],
+              outputs=["a.txt"], after=["ingest"]),
+        Stage("b", toy(tmp_path, "b", "silver.txt", "b.txt", sleep=0.5), inputs=["silver.txt"],
+              outputs=["b.txt"], after=["ingest"]),
+    ]
+
+def statuses(record):
+    return {k: v["status"] for k, v in record["stages"].items()}
+
+def rerun(tmp_path, stages, **kw):
+    return statuses(run(stages, runs=tmp_path / "runs", **kw))
+
+def test_skips_unchanged_inputs_and_runs_independent_stages_in_parallel(tmp_path, stages):
+    first = run(stages, runs=tmp_path / "runs", workers=4)
+    assert first["ok"] and statuses(first) == {"ingest": "ran", "a": "ran", "b": "ran"}
+    assert (tmp_path / "a.txt").read_text() == "v1+ingest+a"
+    assert first["stages"]["a"]["peak_rss_mb"] > 0
+    a, b = first["stages"]["a"]["seconds"], first["stages"]["b"]["seconds"]
+    # a and b overlapped
+    assert first["seconds"] < first["stages"]["ingest"]["seconds"] + a + b - 0.3
+
+    assert rerun(tmp_path, stages) == {"ingest": "skipped", "a": "skipped", "b": "skipped"}
+    (tmp_path / "b.txt").unlink()                     # missing output reruns just that stage
+    assert rerun(tmp_path, stages) == {"ingest": "skipped", "a": "skipped", "b": "ran"}
+    (tmp_path / "raw.txt").write_text("v2")
+    assert rerun(tmp_path, stages) == {"ingest": "ran", "a": "ran", "b": "ran"}
+    log = [json.loads(line) for line in (tmp_path / "runs/daily.jsonl").read_text().splitlines()]
+    assert len(log) == 4 and (tmp_path / "b.txt").read_text() == "v2+ingest+b"
+
+def test_failure_blocks_dependents_and_is_retried(tmp_path, stages):
+    failing = toy(tmp_path, "ingest", "raw.txt", "silver.txt", body="raise SystemExit(3)")
+    stages[0] = Stage("ingest", failing, inputs=["raw.txt"], outputs=["silver.txt"])
+    record = run(stages, runs=tmp_path / "runs")
+    assert not record["ok"] and record["stages"]["ingest"]["exit_code"] == 3
+    assert statuses(record) == {"ingest": "failed", "a": "blocked", "b": "blocked"}
+    assert statuses(run(stages, runs=tmp_path / "runs", targets=["ingest"]))["ingest"] == "failed"
+
+def test_json_key_inputs_ignore_other_keys(tmp_path, stages):
+    (tmp_path / "manifest.json").write_text(json.dumps({"version": "x", "changed": []}))
+    stage = [Stage("ingest", stages[0].module, inputs=["manifest.json#version"],
+                   outputs=["silver.txt"])]
+    assert statuses(run(stage, runs=tmp_path / "runs"))["ingest"] == "ran"
+    (tmp_path / "manifest.json").write_text(json.dumps({"version": "x", "changed": ["AAPL"]}))
+    assert statuses(run(stage, runs=tmp_path / "runs"))["ingest"] == "skipped"
+    assert statuses(run(stage, runs=tmp_path / "runs", force=True))["ingest"] == "ran"
+
+def test_edits_to_imported_local_modules_rerun_the_stage(tmp_path, stages):
+    (tmp_path / "toyhelpers").mkdir()
+    (tmp_path / "toyhelpers/__init__.py").write_text("")
+    (tmp_path / "toyhelpers/fmt.py").write_text("SUFFIX = '+a'\n")
+    uses_helper = toy(tmp_path, "a", "silver.txt", "a.txt", body="from toyhelpers import fmt")
+    stages[1] = Stage("a", uses_helper, inputs=["silver.txt"], outputs=["a.txt"], after=["ingest"])
+    assert rerun(tmp_path, stages)["a"] == "ran"
+    assert rerun(tmp_path, stages)["a"] == "skipped"
+    (tmp_path / "toyhelpers/fmt.py").write_text("SUFFIX = '+A'\n")
+    assert rerun(tmp_path, stages) == {"ingest": "skipped", "a": "ran", "b": "skipped"}
@@ -0,0 +1,16 @@
+import pandas as pd
+from libs.md.panel import Panel
+from ml.strategies.momo_trend import MomoTrend
+from pipelines.daily_scores import score_all
+from pipelines.mock_ingest import synth_ohlcv
+
+def test_parallel_scoring_isolates_failures():
+    panel = Panel.from_frame(synth_ohlcv(periods=260), ["Close"])
+    refs = [("momo_trend", None), ("no_such_strategy", None)]
+    scores, statuses = score_all(refs, panel, workers=2)
+    assert list(scores.columns) == ["momo_trend@0.1.0"]
+    pd.testing.assert_series_equal(scores["momo_trend@0.1.0"], MomoTrend().score(panel)["scores"],
+                                   check_names=False)
+    ok, bad = statuses
+    assert ok["ok"] and ok["seconds"] >= 0 and ok["symbols"] == 5
+    assert not bad["ok"] and "KeyError" in bad["error"]
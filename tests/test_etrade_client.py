@@ -0,0 +1,47 @@
+import threading
+import pytest
+import libs.brokers.etrade.client as etrade
+from libs.brokers.etrade import token_store
+
+TOKENS = {"oauth_token": "rt", "oauth_token_secret": "rts",
+          "access_token": "at", "access_token_secret": "ats"}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ETRADE_CONSUMER_KEY", "key")
+    monkeypatch.setenv("ETRADE_CONSUMER_SECRET", "secret")
+    monkeypatch.setattr(etrade, "_CLIENT", None)
+    token_store.save(TOKENS)
+    yield etrade.get_client()
+    token_store.clear()
+
+def test_tokens_are_served_from_memory_until_saved_or_cleared(client, tmp_path):
+    (tmp_path / "secrets/etrade_token.json").write_text("{}")  # edited behind the store's back
+    assert token_store.load() == TOKENS
+    token_store.save({**TOKENS, "access_token": "at2"})
+    assert token_store.load()["access_token"] == "at2"
+    token_store.clear()
+    assert token_store.load() is None
+
+def test_one_client_with_pooled_sessions_per_token_generation(client):
+    assert etrade.get_client() is client
+    sess = client._signed()
+    assert client._signed() is sess
+    assert sess.get_adapter(client.base) is client._adapter
+
+    token_store.save({**TOKENS, "access_token": "at2"})
+    fresh = client._signed()
+    assert fresh is not sess and fresh.auth.client.resource_owner_key == "at2"
+
+    token_store.clear()
+    with pytest.raises(RuntimeError, match="No E\\*TRADE access token"):
+        client._signed()
+
+def test_threads_get_their_own_session_over_one_pool(client):
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(client._signed())) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len({id(s) for s in sessions}) == 4
+    assert {id(s.get_adapter(client.base)) for s in sessions} == {id(client._adapter)}
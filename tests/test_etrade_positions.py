@@ -0,0 +1,90 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from fastapi.testclient import TestClient
+import libs.brokers.etrade.aio as aio
+from apps.backend.main import app
+from libs.brokers.etrade import token_store
+from libs.brokers.etrade.throttle import TokenBucket
+
+def pos(pid, symbol, qty, price):
+    return {"positionId": pid, "symbolDescription": symbol, "quantity": qty,
+            "marketValue": qty * price, "totalCost": qty * 100.0,
+            "Product": {"symbol": symbol, "securityType": "EQ"}, "Quick": {"lastTrade": price}}
+
+PAGES = {
+    "k1": [[pos(1, "AAPL", 10, 150.0), pos(2, "MSFT", 5, 300.0)],
+           [pos(2, "MSFT", 5, 300.0), pos(3, "TSLA", 2, 200.0)]],  # page 2 repeats MSFT
+    "k2": [[pos(9, "AAPL", 4, 150.0)]],
+    "k3": [],
+}
+
+class Handler(BaseHTTPRequestHandler):
+    requests: list = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        Handler.requests.append((url.path, q, self.headers.get("Authorization", "")))
+        if url.path == "/v1/accounts/list.json":
+            accounts = [{"accountIdKey": k, "accountId": k.upper(), "accountStatus": "ACTIVE"}
+                        for k in PAGES]
+            return self._send({"AccountListResponse": {"Accounts": {"Account": accounts}}})
+        key = url.path.split("/")[3]
+        pages = PAGES[key]
+        if pages == "denied":
+            self.send_response(401); self.end_headers(); return
+        if not pages:
+            self.send_response(204); self.end_headers(); return
+        page = int(q.get("pageNumber", 1))
+        self._send({"PortfolioResponse": {"AccountPortfolio": [
+            {"accountId": key, "totalPages": len(pages), "Position": pages[page - 1]}]}})
+
+    def _send(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ETRADE_CONSUMER_KEY", "key")
+    monkeypatch.setenv("ETRADE_CONSUMER_SECRET", "secret")
+    token_store.save({"access_token": "at", "access_token_secret": "ats"})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    Handler.requests = []
+    monkeypatch.setattr(aio, "_CLIENT", aio.AsyncETradeClient(base=f"http://127.0.0.1:{httpd.server_port}"))
+    monkeypatch.setattr(aio, "BUCKET", TokenBucket(rate=1000, burst=100))
+    yield Handler
+    httpd.shutdown()
+    token_store.clear()
+
+def test_positions_fan_out_follows_pages_and_dedupes(server):
+    r = TestClient(app).get("/v1/brokers/etrade/positions")
+    assert r.status_code == 200
+    body = r.json()
+    rows = {p["symbol"]: p for p in body["positions"]}
+    assert rows["AAPL"]["quantity"] == 14 and rows["AAPL"]["accounts"] == ["k1", "k2"]
+    assert rows["MSFT"]["quantity"] == 5 and rows["MSFT"]["market_value"] == 1500
+    assert body["symbols"] == ["AAPL", "MSFT", "TSLA"]
+    assert [a["positions"] for a in body["accounts"]] == [3, 1, 0]   # the page-2 repeat counts once
+
+    pages = sorted((p, q.get("pageNumber", "1")) for p, q, _ in server.requests if "portfolio" in p)
+    assert pages == [(f"/v1/accounts/{k}/portfolio.json", n)
+                     for k, n in [("k1", "1"), ("k1", "2"), ("k2", "1"), ("k3", "1")]]
+    assert all(auth.startswith("OAuth ") and 'oauth_token="at"' in auth
+               for _, _, auth in server.requests)
+
+def test_upstream_status_passes_through(server, monkeypatch):
+    monkeypatch.setitem(PAGES, "k2", "denied")
+    r = TestClient(app).get("/v1/brokers/etrade/positions")
+    assert r.status_code == 401 and "E*TRADE API error 401" in r.json()["detail"]
@@ -0,0 +1,111 @@
+import gc
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import libs.brokers.etrade.client as etrade
+from libs.brokers.etrade import throttle, token_store
+from libs.brokers.etrade.throttle import BrokerCache, TokenBucket
+
+def test_cache_coalesces_concurrent_misses_then_serves_hits():
+    cache, calls = BrokerCache(ttl=60), []
+
+    def fetch():
+        calls.append(1); time.sleep(0.1); return {"n": len(calls)}
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: cache.get("k", fetch), range(8)))
+    assert calls == [1] and all(r == {"n": 1} for r in results)
+    assert cache.get("k", fetch) == {"n": 1}
+    assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 7 and cache.stats["hits"] == 1
+
+def test_stale_entries_are_served_while_refreshing():
+    cache, values = BrokerCache(ttl=0.0, stale_ttl=60), iter([1, 2])
+    assert cache.get("k", lambda: next(values)) == 1
+    assert cache.get("k", lambda: next(values)) == 1  # stale, refresh scheduled
+    cache._refresher.shutdown(wait=True)
+    assert cache._entries["k"][1] == 2 and cache.stats["refreshes"] == 1
+
+def test_expired_entries_are_pruned_and_size_is_bounded():
+    cache = BrokerCache(ttl=0.0, stale_ttl=0.0, max_entries=3)
+    for k in range(10):
+        cache.get(k, lambda k=k: k)
+    assert list(cache._entries) == [9]            # everything older had expired
+    cache.ttl = 60
+    for k in "abcd":
+        cache.get(k, lambda k=k: k)
+    assert list(cache._entries) == ["b", "c", "d"] and cache.stats["evictions"] == 2
+
+def test_token_bucket_spaces_calls_past_the_burst():
+    bucket = TokenBucket(rate=50, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0] and waits[2] == pytest.approx(0.02, abs=5e-3)
+    assert waits[3] == pytest.approx(0.04, abs=5e-3) and bucket.stats["throttled"] == 2
+
+class Handler(BaseHTTPRequestHandler):
+    hits = 0
+    limited = 0  # answer this many requests with 429 first
+
+    def do_GET(self):
+        Handler.hits += 1
+        if Handler.limited:
+            Handler.limited -= 1
+            self.send_response(429); self.send_header("Retry-After", "0"); self.end_headers()
+            return
+        time.sleep(0.05)
+        data = json.dumps({"AccountListResponse": {"Accounts": {"Account": []}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ETRADE_CONSUMER_KEY", "key")
+    monkeypatch.setenv("ETRADE_CONSUMER_SECRET", "secret")
+    monkeypatch.setattr(etrade, "BUCKET", TokenBucket(rate=1000, burst=100))
+    token_store.save({"access_token": "at", "access_token_secret": "ats"})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    Handler.hits, Handler.limited = 0, 0
+    c = etrade.ETradeClient()
+    c.base = f"http://127.0.0.1:{httpd.server_port}"
+    yield c
+    httpd.shutdown()
+    token_store.clear()
+
+def test_dashboard_burst_makes_one_upstream_call(client):
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(lambda _: client.list_accounts(), range(6)))
+    assert Handler.hits == 1
+    assert client.stats()["cache"]["coalesced"] == 5
+
+def test_rate_limited_calls_are_retried_not_failed(client):
+    Handler.limited = 2
+    assert client.list_accounts() == {"AccountListResponse": {"Accounts": {"Account": []}}}
+    assert Handler.hits == 3 and etrade.BUCKET.stats["retries"] == 2
+
+def test_persistent_errors_carry_the_upstream_status(client, monkeypatch):
+    monkeypatch.setattr(throttle, "BACKOFF", 0.0)
+    monkeypatch.setattr(etrade, "RETRIES", 1)
+    Handler.limited = 5
+    with pytest.raises(etrade.ETradeAPIError) as err:
+        client.list_accounts()
+    assert err.value.status_code == 429 and Handler.hits == 2
+
+def test_cache_metric_sums_the_live_clients_only(client):
+    gc.collect()
+    before = etrade._cache_stats().get("hits", 0)
+    other = etrade.ETradeClient()
+    other.cache.stats["hits"] += 10
+    assert etrade._cache_stats()["hits"] == before + 10
+    del other
+    gc.collect()
+    assert etrade._cache_stats().get("hits", 0) == before
@@ -0,0 +1,64 @@
+import pandas as pd
+from fastapi.testclient import TestClient
+from apps.backend.main import app
+from libs.md.panel import Panel
+from libs.md.silver import write_ohlcv
+from ml.strategies.holdings_review import HoldingsReviewer, review_holdings
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=320)
+
+def full_history(close: pd.DataFrame, syms):
+    """The original whole-panel computation, read at the last row."""
+    c = close[syms]
+    return pd.DataFrame({
+        "trend_ok": c.rolling(50).mean().iloc[-1] > c.rolling(200).mean().iloc[-1],
+        "r3m": c.pct_change(63, fill_method=None).iloc[-1],
+        "r6m": c.pct_change(126, fill_method=None).iloc[-1],
+        "drawdown": (c / c.cummax() - 1.0).iloc[-1],
+    })
+
+def test_tail_window_matches_full_history():
+    panel = Panel.from_frame(OHLCV, fields=["Close"])
+    syms = ["MSFT", "AAPL", "SPY"]
+    got = HoldingsReviewer(panel).metrics(syms + ["NOPE"])
+    want = full_history(panel.frame("Close"), syms)
+    assert list(got.index) == syms
+    pd.testing.assert_frame_equal(got, want, check_names=False, rtol=1e-12)
+    review = review_holdings(panel, ["AAPL", "NOPE", "MSFT"])
+    assert [r["symbol"] for r in review] == ["AAPL", "MSFT"]
+
+def test_running_max_carries_over_new_dates_and_adjustments():
+    close = OHLCV.xs("Close", axis=1, level=1)
+    old = HoldingsReviewer(Panel.from_frame(OHLCV.iloc[:300], fields=["Close"]))
+    old.metrics(close.columns)          # fill every running max
+    grown = OHLCV.copy()
+    grown.loc[:, ("AAPL", "Close")] *= 0.5   # an adjustment rescales all of AAPL's history
+    new = HoldingsReviewer(Panel.from_frame(grown, fields=["Close"]), prev=old)
+    assert new._known.sum() == len(close.columns) - 1 and not new._known[new._cols["AAPL"]]
+    want = full_history(grown.xs("Close", axis=1, level=1), list(close.columns))
+    pd.testing.assert_series_equal(new.metrics(close.columns)["drawdown"], want["drawdown"],
+                                   check_names=False, rtol=1e-12)
+
+def test_batch_equals_single_reviews():
+    reviewer = HoldingsReviewer(OHLCV)
+    portfolios = {"a": ["AAPL", "MSFT"], "b": ["MSFT", "SPY", "XXX"], "c": []}
+    batch = reviewer.review_many(portfolios)
+    assert batch == {k: reviewer.review(v) for k, v in portfolios.items()}
+
+def test_batch_endpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_ohlcv(OHLCV, tmp_path / "data/silver/ohlcv")
+    client = TestClient(app)
+    accounts = [{"account_id": f"acct{i}", "symbols": syms}
+                for i, syms in enumerate([["AAPL"], ["MSFT", "SPY"], ["AAPL", "MSFT"]])]
+    r = client.post("/v1/analysis/portfolio/keep_or_replace/batch", json={"portfolios": accounts})
+    assert r.status_code == 200
+    body = r.json()
+    assert [a["account_id"] for a in body["accounts"]] == ["acct0", "acct1", "acct2"]
+    for acct in accounts:
+        single = client.post("/v1/analysis/portfolio/keep_or_replace", json=acct).json()
+        got = next(a for a in body["accounts"] if a["account_id"] == acct["account_id"])
+        assert got["items"] == single["items"] and body["as_of"] == single["as_of"]
+    assert client.post("/v1/analysis/portfolio/keep_or_replace/batch",
+                       json={"portfolios": accounts, "strategy": "nope@1"}).status_code == 404
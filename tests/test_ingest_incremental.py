@@ -0,0 +1,131 @@
+import json
+import pandas as pd
+import pytest
+import pipelines.ingest_norgate as ingest
+from libs.md.silver import read_ohlcv
+from libs.md.universe import load_membership
+from pipelines.mock_ingest import synth_ohlcv
+
+FULL = synth_ohlcv(["AAPL", "MSFT", "TSLA"], periods=300, start="2024-01-01")
+
+class FakeNorgate:
+    # shared by the instances ingest creates; reset per test by ``fake_state``
+    calls: list = []
+    members = ["AAPL", "MSFT"]
+
+    def constituents(self, index_symbol, date):
+        return list(self.members)
+
+    def bars_eod(self, symbols, start=None, end=None, adjust="CASHDIVIDENDS"):
+        FakeNorgate.calls.append((tuple(symbols), start, end))
+        return FULL.loc[start:end, symbols]
+
+    def closes(self, symbols, start=None, end=None, adjust="NONE"):
+        FakeNorgate.calls.append(("closes", adjust))
+        return FULL.loc[start:end, symbols].xs("Close", axis=1, level=1)
+
+    def index_membership(self, symbols, index_symbol, start=None, end=None):
+        return pd.DataFrame(True, index=FULL.loc[start:end].index, columns=symbols)
+
+@pytest.fixture(autouse=True)
+def fake_state(monkeypatch):
+    monkeypatch.setattr(FakeNorgate, "calls", [])
+    monkeypatch.setattr(FakeNorgate, "members", ["AAPL", "MSFT"])
+
+def test_incremental_fetches_only_missing_bars(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, "NorgateClient", FakeNorgate)
+    monkeypatch.setattr(ingest, "START", "2024-01-01")
+    d1, d2 = str(FULL.index[249].date()), str(FULL.index[-1].date())
+
+    ingest.main(d1)
+    FakeNorgate.calls.clear()
+    monkeypatch.setattr(FakeNorgate, "members", ["AAPL", "MSFT", "TSLA"])
+    ingest.main(d2)
+
+    next_day = str((FULL.index[249] + pd.Timedelta(days=1)).date())
+    bars = [c for c in FakeNorgate.calls if c[0] != "closes"]
+    assert sorted(bars) == [
+        (("AAPL", "MSFT"), next_day, d2),
+        (("TSLA",), "2024-01-01", d2),
+    ]
+    # raw closes come from the merged bars; only the adjusted views are fetched, once per chunk
+    fetched = sorted(c[1] for c in FakeNorgate.calls if c[0] == "closes")
+    assert fetched == sorted(ingest.ADJUST_MODES * 2)
+    manifest = json.loads((tmp_path / "data/silver/manifest.json").read_text())
+    assert manifest["changed"] == ["AAPL", "MSFT", "TSLA"]
+    assert {e["last_date"] for e in manifest["symbols"].values()} == {d2}
+    assert manifest["symbols"]["AAPL"]["rows"] == 300
+
+    FakeNorgate.calls.clear()
+    version = manifest["version"]
+    ingest.main(d2)
+    manifest = json.loads((tmp_path / "data/silver/manifest.json").read_text())
+    assert FakeNorgate.calls == [] and manifest["changed"] == []
+    assert manifest["version"] == version
+
+class SplitNorgate(FakeNorgate):
+    """A 2:1 split on bar 256 (the second run's first bar) in every adjusted view, not in raw."""
+
+    def closes(self, symbols, start=None, end=None, adjust="NONE"):
+        close = super().closes(symbols, start, end, adjust)
+        return close.mul((close.index >= FULL.index[256]) * 0.5 + 0.5, axis=0)
+
+def test_incremental_adjustment_factors_use_stored_raw_closes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, "NorgateClient", SplitNorgate)
+    monkeypatch.setattr(ingest, "START", "2024-01-01")
+    ingest.main(str(FULL.index[255].date()))
+    ingest.main(str(FULL.index[-1].date()))
+    got = read_ohlcv(["AAPL"], ["Close"], root=tmp_path / "data/silver/ohlcv", adjust="CAPITAL")
+    want = SplitNorgate().closes(["AAPL"], adjust="CAPITAL")["AAPL"]
+    pd.testing.assert_series_equal(got[("AAPL", "Close")], want, check_names=False,
+                                   check_freq=False, rtol=1e-9)
+
+class GoneNorgate(FakeNorgate):
+    """GONE was in the index but Norgate has no bars for it."""
+
+    def bars_eod(self, symbols, start=None, end=None, adjust="CASHDIVIDENDS"):
+        FakeNorgate.calls.append((tuple(symbols), start, end))
+        return FULL.loc[start:end, [s for s in symbols if s != "GONE"]]
+
+def test_past_members_without_data_are_not_fetched_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, "NorgateClient", GoneNorgate)
+    monkeypatch.setattr(ingest, "START", "2024-01-01")
+    monkeypatch.setattr(GoneNorgate, "members", ["AAPL", "GONE"])
+    ingest.main(str(FULL.index[200].date()))
+    monkeypatch.setattr(GoneNorgate, "members", ["AAPL"])
+    FakeNorgate.calls.clear()
+    ingest.main(str(FULL.index[250].date()))
+    # now a past member: one backfill attempt
+    assert any("GONE" in c[0] for c in FakeNorgate.calls)
+    manifest = json.loads((tmp_path / "data/silver/manifest.json").read_text())
+    assert manifest["empty"] == ["GONE"]
+    FakeNorgate.calls.clear()
+    ingest.main(str(FULL.index[-1].date()))
+    assert not any("GONE" in c[0] for c in FakeNorgate.calls)
+
+class PastNorgate(FakeNorgate):
+    """TSLA was in the index for the first 100 bars only, before anything was ingested."""
+
+    def constituents(self, index_symbol, date):
+        return list(self.members) + (["TSLA"] if pd.Timestamp(date) < FULL.index[100] else [])
+
+    def index_membership(self, symbols, index_symbol, start=None, end=None):
+        frame = super().index_membership(symbols, index_symbol, start, end)
+        if "TSLA" in frame:
+            frame["TSLA"] = frame.index < FULL.index[100]
+        return frame
+
+def test_first_ingest_finds_and_fetches_past_members(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, "NorgateClient", PastNorgate)
+    monkeypatch.setattr(ingest, "START", "2024-01-01")
+    ingest.main(str(FULL.index[-1].date()))
+    assert any("TSLA" in c[0] for c in FakeNorgate.calls if c[0] != "closes")
+    membership = load_membership(ingest.INDEX, tmp_path / "data/gold/membership")
+    assert membership.members(FULL.index[50]) == ["AAPL", "MSFT", "TSLA"]
+    assert membership.members(FULL.index[-1]) == ["AAPL", "MSFT"]
+    got = read_ohlcv(["TSLA"], ["Close"], root=tmp_path / "data/silver/ohlcv")
+    assert len(got) == len(FULL)
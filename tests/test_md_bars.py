@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+import pyarrow as pa
+from fastapi.testclient import TestClient
+import apps.backend.services.marketdata_svc.api as md
+from apps.backend.main import app
+from libs.md.silver import merge_adjustments, write_ohlcv
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=260)
+
+class FakeNorgate:
+    def bars_eod(self, symbols, start=None, end=None, adjust="CASHDIVIDENDS"):
+        return OHLCV.loc[start:end, ["SPY"]].rename(columns={"SPY": symbols[0]}, level=0)
+
+class DownNorgate:
+    def bars_eod(self, symbols, start=None, end=None, adjust="CASHDIVIDENDS"):
+        raise ConnectionError("NDU not running")
+
+def test_columnar_bars_local_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_ohlcv(OHLCV[["AAPL", "MSFT"]], tmp_path / "data/silver/ohlcv")
+    monkeypatch.setattr(md, "_NORGATE", FakeNorgate())
+    client = TestClient(app)
+    start = str(OHLCV.index[-20].date())
+    r = client.get("/v1/md/bars",
+                   params={"symbol": "AAPL,MSFT,QQQ", "fields": "c,v", "start": start})
+    body = r.json()
+    assert r.status_code == 200 and body["fields"] == ["c", "v"]
+    assert body["source"] == {"silver": ["AAPL", "MSFT"], "norgate": ["QQQ"], "failed": []}
+    msft = OHLCV.loc[start:, ("MSFT", "Close")].tolist()
+    assert body["series"]["MSFT"]["c"] == pytest.approx(msft, rel=1e-12)
+    assert len(body["series"]["QQQ"]["ts"]) == 20 and "o" not in body["series"]["AAPL"]
+
+    r = client.get("/v1/md/bars", params={"symbol": ["AAPL", "MSFT"], "fields": "c"},
+                   headers={"Accept": md.ARROW_MIME})
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert r.headers["content-type"] == md.ARROW_MIME
+    assert table.column_names == ["symbol", "ts", "c"] and table.num_rows == 2 * len(OHLCV)
+
+def test_norgate_failure_serves_what_silver_has(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_ohlcv(OHLCV[["AAPL"]], tmp_path / "data/silver/ohlcv")
+    monkeypatch.setattr(md, "_NORGATE", DownNorgate())
+    client = TestClient(app)
+    r = client.get("/v1/md/bars", params={"symbol": "AAPL,QQQ", "fields": "c"})
+    assert r.status_code == 200
+    assert r.json()["source"] == {"silver": ["AAPL"], "norgate": [], "failed": ["QQQ"]}
+    r = client.get("/v1/md/bars", params={"symbol": "QQQ"})
+    assert r.status_code == 502 and "NDU not running" in r.json()["detail"]
+
+def test_any_adjust_mode_is_served_locally(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "data/silver/ohlcv"
+    write_ohlcv(OHLCV[["AAPL"]], root)
+    split = OHLCV.index[100]
+    merge_adjustments(pd.DataFrame({"date": [split], "symbol": ["AAPL"], "CAPITAL": [0.5],
+                                    "CASHDIVIDENDS": [0.5], "TOTALRETURN": [0.5]}), root)
+    monkeypatch.setattr(md, "_NORGATE", None)  # any Norgate call would fail here
+    client = TestClient(app)
+    for adjust, factor in [("NONE", 1.0), ("TOTALRETURN", 0.5)]:
+        body = client.get("/v1/md/bars", params={"symbol": "AAPL", "fields": "c", "adjust": adjust,
+                                                 "end": str(OHLCV.index[99].date())}).json()
+        assert body["source"]["silver"] == ["AAPL"]
+        want = (OHLCV[("AAPL", "Close")].iloc[:100] * factor).tolist()
+        assert body["series"]["AAPL"]["c"] == pytest.approx(want)
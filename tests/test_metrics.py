@@ -0,0 +1,66 @@
+import json
+import time
+from fastapi.testclient import TestClient
+import apps.backend.main as main
+from apps.backend.services import artifacts
+from libs.md.silver import write_ohlcv
+from libs.utils.metrics import Registry, run
+from libs.utils.profiler import SamplingProfiler
+from pipelines.mock_ingest import synth_ohlcv
+
+def test_prometheus_text_and_summaries():
+    reg = Registry()
+    calls = reg.counter("calls_total", "Calls", ["upstream", "status"])
+    calls.inc(upstream="norgate", status=200)
+    calls.inc(2, upstream="norgate", status=200)
+    lat = reg.histogram("lat_seconds", "Latency", ["op"], buckets=[0.1, 1.0])
+    for v in (0.05, 0.5, 0.5, 3.0):
+        lat.observe(v, op='say "hi"')
+    reg.collect("cache_total", "Cache", ["event"], lambda: {"hits": 4, "misses": 1})
+    text = reg.render()
+    assert '# TYPE calls_total counter\ncalls_total{upstream="norgate",status="200"} 3\n' in text
+    assert 'lat_seconds_bucket{op="say \\"hi\\"",le="0.1"} 1\n' in text
+    assert 'lat_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 4\n' in text
+    assert 'lat_seconds_count{op="say \\"hi\\"",le' not in text
+    assert 'lat_seconds_sum{op="say \\"hi\\""} 4.05' in text
+    assert 'cache_total{event="hits"} 4\n' in text
+    lat_hi = reg.snapshot()['lat_seconds{op="say \\"hi\\""}']
+    assert lat_hi["count"] == 4 and lat_hi["max"] == 3.0 and 0.1 <= lat_hi["p50"] <= 1.0
+    assert reg.counter("calls_total", "Calls", ["upstream", "status"]) is calls
+
+def test_run_summary_is_written_for_the_dag(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_OUT", str(tmp_path / "stage.metrics.json"))
+    with run("features"):
+        from libs.utils import metrics
+        metrics.BYTES_READ.inc(10, source="silver")
+    summary = json.loads((tmp_path / "stage.metrics.json").read_text())
+    assert summary["ok"] and summary["metrics"]['bytes_read_total{source="silver"}'] == 10
+
+def test_metrics_route_and_profiled_request(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_ohlcv(synth_ohlcv(periods=260), tmp_path / "data/silver/ohlcv")
+    artifacts.CACHE.clear()
+    monkeypatch.setattr(main, "PROFILE", True)
+    client = TestClient(main.app)
+    body = {"account_id": "a", "symbols": ["AAPL", "MSFT"]}
+    r = client.post("/v1/analysis/portfolio/keep_or_replace?profile=1", json=body)
+    assert r.status_code == 200 and r.headers["X-Profile"].endswith(".process.folded")
+    assert (tmp_path / r.headers["X-Profile"]).exists()
+    assert "X-Profile" not in client.post(r.url.path, json=body).headers
+    text = client.get("/metrics").text
+    route = "/v1/analysis/portfolio/keep_or_replace"
+    assert f'http_request_seconds_count{{method="POST",route="{route}",status="200"}}' in text
+    assert 'artifact_load_seconds_count{artifact="ohlcv"}' in text
+    assert 'model_score_seconds_count{model="momo_trend",mode="batch"}' in text
+    assert 'bytes_read_total{source="silver"}' in text
+
+def test_sampling_profiler_sees_the_busy_function():
+    def spin():
+        t = time.perf_counter()
+        while time.perf_counter() - t < 0.2:
+            sum(range(1000))
+    with SamplingProfiler(interval=0.002) as prof:
+        spin()
+    assert prof.samples > 10
+    assert any("spin (test_metrics.py" in f for f, _, _ in prof.top(5))
+    assert "MainThread;" in prof.folded() and "spin (test_metrics.py" in prof.folded()
@@ -0,0 +1,90 @@
+import sys
+import types
+import pandas as pd
+import pytest
+import libs.md.norgate.client as client_mod
+from libs.md.norgate.client import NorgateClient
+from pipelines.mock_ingest import synth_ohlcv
+
+SYMS = ["AAPL", "MSFT", "AMZN", "TSLA", "SPY"]
+FULL = synth_ohlcv(SYMS, periods=300, start="2024-01-01")
+
+@pytest.fixture
+def fake_nd(monkeypatch):
+    nd = types.ModuleType("norgatedata")
+    nd.calls = []
+    nd.published = FULL.index[-1]
+    nd.set_db_path = lambda path: None
+
+    def price_timeseries(symbols, start_date=None, end_date=None, fields=None, adjust=None,
+                         include_delisted=True, dataframe=True):
+        nd.calls.append((tuple(symbols), start_date, end_date, adjust))
+        end = min(pd.Timestamp(end_date), nd.published) if end_date else nd.published
+        return FULL.loc[start_date:end, symbols].copy()
+
+    def index_constituent_timeseries(symbol, indexname, start_date=None, end_date=None,
+                                     timeseriesformat="pandas-dataframe"):
+        idx = FULL.loc[start_date:end_date].index
+        member = (idx >= FULL.index[100]).astype(int) if symbol == "TSLA" else 1
+        return pd.DataFrame({"Index Constituent": member}, index=idx.tz_localize("UTC"))
+
+    nd.price_timeseries = price_timeseries
+    nd.index_constituent_timeseries = index_constituent_timeseries
+    monkeypatch.setitem(sys.modules, "norgatedata", nd)
+    return nd
+
+def test_batches_and_serves_overlaps_from_disk(tmp_path, fake_nd):
+    nc = NorgateClient(cache_dir=tmp_path, batch_size=2, max_workers=3)
+    d = FULL.index
+    a, b, c = str(d[50].date()), str(d[150].date()), str(d[250].date())
+
+    first = nc.bars_eod(SYMS, start=a, end=b)
+    assert sorted(len(call[0]) for call in fake_nd.calls) == [1, 2, 2]
+    pd.testing.assert_frame_equal(first[SYMS], FULL.loc[a:b, SYMS], check_freq=False,
+                                  check_dtype=False)
+
+    fake_nd.calls.clear()
+    inner = nc.bars_eod(["AAPL", "MSFT"], start=str(d[80].date()), end=str(d[120].date()))
+    assert fake_nd.calls == [] and len(inner) == 41
+
+    # only the tail gap goes to Norgate, and only for the cached symbols
+    later = nc.bars_eod(["AAPL", "MSFT", "SPY"], start=a, end=c)
+    next_day = str((d[150] + pd.Timedelta(days=1)).date())
+    assert fake_nd.calls == [(("AAPL", "MSFT"), next_day, c, "CASHDIVIDENDS"),
+                             (("SPY",), next_day, c, "CASHDIVIDENDS")]
+    pd.testing.assert_frame_equal(later["MSFT"], FULL.loc[a:c, "MSFT"], check_freq=False,
+                                  check_dtype=False)
+
+    assert nc.stats == {"hits": 2, "partial": 3, "misses": 5, "fetch_calls": 5,
+                        "fetched_symbols": 8, "fetched_rows": 100 * 3 + 101 * 3 + 101 * 2}
+
+def test_bars_published_after_a_fetch_are_not_served_as_missing(tmp_path, fake_nd, monkeypatch):
+    monkeypatch.setattr(client_mod, "SETTLE_DAYS", 10_000)   # every bar here is still unsettled
+    nc = NorgateClient(cache_dir=tmp_path)
+    d = FULL.index
+    span = {"start": str(d[100].date()), "end": str(d[250].date())}
+    fake_nd.published = d[200]
+    assert nc.bars_eod(["AAPL"], **span).index[-1] == d[200]
+    fake_nd.published = d[-1]
+    fake_nd.calls.clear()
+    got = nc.bars_eod(["AAPL"], **span)
+    assert fake_nd.calls == [(("AAPL",), str((d[200] + pd.Timedelta(days=1)).date()),
+                              str(d[250].date()), "CASHDIVIDENDS")]
+    assert got.index[-1] == d[250] and len(got) == 151
+
+def test_adjust_modes_are_cached_separately(tmp_path, fake_nd):
+    nc = NorgateClient(cache_dir=tmp_path)
+    nc.bars_eod(["AAPL"], start="2024-02-01", end="2024-03-01", adjust="TOTALRETURN")
+    nc.bars_eod(["AAPL"], start="2024-02-01", end="2024-03-01", adjust="CAPITAL")
+    nc.bars_eod(["AAPL"], start="2024-02-01", end="2024-03-01", adjust="CAPITAL")
+    assert [c[3] for c in fake_nd.calls] == ["TOTALRETURN", "CAPITAL"]
+
+    nc = NorgateClient(cache_dir=tmp_path, ttl=0)
+    nc.bars_eod(["AAPL"], start="2024-02-01", end="2024-03-01", adjust="CAPITAL")
+    assert len(fake_nd.calls) == 3
+
+def test_index_membership_frame(tmp_path, fake_nd):
+    client = NorgateClient(cache_dir=tmp_path)
+    m = client.index_membership(["AAPL", "TSLA"], "$SPX", start="2024-01-01")
+    assert m.dtypes.eq(bool).all() and m.index.tz is None
+    assert m["AAPL"].all() and m["TSLA"].sum() == len(FULL) - 100
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+import pipelines.build_features as build_features
+from libs.md.panel import Panel
+from libs.md.silver import merge_ohlcv, write_ohlcv
+from ml.strategies.features import FeatureBank
+from ml.strategies.momo_trend import MomoTrend
+from ml.strategies.online import (OnlineFeatures, feature_keys, load_online, save_online,
+                                  update_online)
+from pipelines.daily_scores import score_all, score_online
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=320)
+OHLCV.iloc[:60, OHLCV.columns.get_loc(("TSLA", "Close"))] = np.nan   # late listing
+OHLCV.iloc[150, OHLCV.columns.get_loc(("MSFT", "Close"))] = np.nan   # missing bar
+PANEL = Panel.from_frame(OHLCV, fields=["Close"])
+KEYS = ["ma:50", "ma:200", "ret:1", "ret:63", "retstd:14", "retsum:21"]
+
+def batch_values(close: np.ndarray) -> dict[str, np.ndarray]:
+    bank = FeatureBank(close)
+    return {"ma:50": bank.rolling_mean(50), "ma:200": bank.rolling_mean(200),
+            "ret:1": bank.pct_change(1), "ret:63": bank.pct_change(63),
+            "retstd:14": bank.ret_std(14), "retsum:21": bank.ret_sum(21),
+            "peak": np.fmax.accumulate(close, axis=0)}
+
+def batch_features(frame: pd.DataFrame) -> pd.DataFrame:
+    panel = Panel.from_frame(frame, fields=["Close"])
+    return build_features.batch(panel.select(sorted(frame.columns.levels[0])))
+
+def test_one_bar_at_a_time_matches_batch():
+    seen = {}
+    st = OnlineFeatures(KEYS)
+    st.update(PANEL, on_row=lambda d, v: seen.__setitem__(d, v))
+    want = batch_values(PANEL.field("Close"))
+    for key, arr in want.items():
+        got = np.array([seen[d][key] for d in PANEL.dates])
+        np.testing.assert_allclose(got, arr, rtol=1e-9, atol=1e-12, err_msg=key)
+
+def test_peek_does_not_advance():
+    st = OnlineFeatures(KEYS)
+    st.update(PANEL.slice(end=PANEL.dates[-2]))
+    nxt = pd.Series(PANEL.field("Close")[-1], index=PANEL.symbols)
+    before = {k: v.copy() for k, v in st.state.items()}
+    peeked = st.peek(nxt)
+    assert all(np.array_equal(before[k], v, equal_nan=True) for k, v in st.state.items())
+    st.advance(PANEL.dates[-1], nxt)
+    for k, v in st.values().items():
+        np.testing.assert_array_equal(peeked[k], v)
+    with pytest.raises(ValueError):
+        st.advance(PANEL.dates[-1], nxt)
+
+def test_persisted_state_follows_adjustments_and_scores_like_batch(tmp_path):
+    model = MomoTrend()
+    keys = feature_keys(model)
+    assert keys == ["ma:200", "ma:50", "ret:126", "ret:21", "ret:63", "retstd:14", "retsum:21"]
+    head = PANEL.slice(end=PANEL.dates[250])
+    update_online("s", keys, lambda start: head, tmp_path)
+    adjusted = PANEL.values.copy()
+    adjusted[0, :, 0] *= 0.5               # a back-adjustment rescales all of AAPL's history
+    full = Panel(adjusted, PANEL.fields, PANEL.dates, PANEL.symbols)
+    st, rebuilt = update_online("s", keys, lambda start: full.slice(start), tmp_path)
+    assert not rebuilt and st.rows == len(PANEL.dates)
+    st = load_online("s", keys, tmp_path)
+    got, want = model.score_latest(st), model.score(full)
+    pd.testing.assert_series_equal(got["scores"], want["scores"], rtol=1e-9)
+    assert got["signals"] == want["signals"]
+    assert load_online("s", keys + ["ma:20"], tmp_path) is None     # config change -> rebuild
+
+def test_backfilled_symbol_is_replayed_before_advancing(tmp_path):
+    model = MomoTrend()
+    keys = feature_keys(model)
+    others = PANEL.select([s for s in PANEL.symbols if s != "AAPL"])
+    first = others.slice(end=PANEL.dates[250])
+    update_online("s", keys, lambda start, symbols=None: first, tmp_path)
+
+    def read(start, symbols=None):   # AAPL lands in silver with its full history
+        return (PANEL if symbols is None else PANEL.select(symbols)).slice(start)
+    st, rebuilt = update_online("s", keys, read, tmp_path)
+    assert not rebuilt and "AAPL" in st.symbols
+    got, want = model.score_latest(st), model.score(PANEL)
+    pd.testing.assert_series_equal(got["scores"].sort_index(), want["scores"].sort_index(),
+                                   rtol=1e-9)
+    assert sorted(got["signals"]["buy"]) == sorted(want["signals"]["buy"])
+
+def test_daily_online_scores_match_full_panel(tmp_path):
+    st = OnlineFeatures(feature_keys(MomoTrend()))
+    st.update(PANEL)
+    save_online(st, "x", tmp_path)
+    online, statuses = score_online([("momo_trend", None)], load_online("x", root=tmp_path))
+    full, _ = score_all([("momo_trend", None)], PANEL, workers=1)
+    assert statuses[0]["ok"]
+    pd.testing.assert_frame_equal(online, full, rtol=1e-9)
+
+def test_build_features_appends_new_days(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build_features, "FEATURES", tmp_path / "features.parquet")
+    monkeypatch.setattr(build_features, "SILVER", tmp_path / "data/silver")
+    frame = synth_ohlcv(periods=300)
+    write_ohlcv(frame.iloc[:280], tmp_path / "data/silver/ohlcv")
+    build_features.main()
+    merge_ohlcv(frame.iloc[280:], tmp_path / "data/silver/ohlcv")
+    build_features.main()
+    got = pd.read_parquet(tmp_path / "features.parquet")
+    want = batch_features(frame)
+    pd.testing.assert_frame_equal(got, want, rtol=1e-9, check_freq=False, check_index_type=False)
+
+def test_build_features_backfills_new_symbol(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build_features, "FEATURES", tmp_path / "features.parquet")
+    monkeypatch.setattr(build_features, "SILVER", tmp_path / "data/silver")
+    frame = synth_ohlcv(periods=300)
+    write_ohlcv(frame.iloc[:280].drop(columns="AAPL", level=0), tmp_path / "data/silver/ohlcv")
+    build_features.main()
+    merge_ohlcv(frame.drop(columns="AAPL", level=0).iloc[280:], tmp_path / "data/silver/ohlcv")
+    merge_ohlcv(frame[["AAPL"]], tmp_path / "data/silver/ohlcv")
+    build_features.main()
+    got = pd.read_parquet(tmp_path / "features.parquet")
+    want = batch_features(frame)
+    pd.testing.assert_frame_equal(got, want, rtol=1e-9, check_like=True, check_freq=False,
+                                  check_index_type=False)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from libs.md.panel import Panel
+from libs.md.silver import read_panel, to_long, write_ohlcv
+from ml.strategies.holdings_review import review_holdings
+from ml.strategies.momo_trend import MomoTrend
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=320)
+
+def test_frame_roundtrip_and_zero_copy_views():
+    panel = Panel.from_frame(OHLCV)
+    pd.testing.assert_frame_equal(panel.to_frame(), OHLCV.astype("float64"), check_freq=False)
+    assert np.shares_memory(panel.field("Close"), panel.values)
+    assert np.shares_memory(panel.frame("Close").to_numpy(), panel.values)
+    assert np.shares_memory(panel.slice(end=OHLCV.index[99]).values, panel.values)
+    long = Panel.from_long(to_long(OHLCV), ["Close"])
+    np.testing.assert_array_equal(long.field("Close"), panel.select(long.symbols).field("Close"))
+
+def test_read_panel_from_store(tmp_path):
+    write_ohlcv(OHLCV, tmp_path)
+    panel = read_panel(["SPY", "AAPL"], fields=["Close"], root=tmp_path, dtype=np.float32)
+    assert panel.values.dtype == np.float32 and list(panel.symbols) == ["AAPL", "SPY"]
+    np.testing.assert_allclose(panel.field("Close")[:, 1], OHLCV[("SPY", "Close")], rtol=1e-6)
+
+def test_strategies_accept_panel():
+    panel = Panel.from_frame(OHLCV, fields=["Close"])
+    model = MomoTrend()
+    pd.testing.assert_series_equal(model.score(panel)["scores"], model.score(OHLCV)["scores"])
+    assert review_holdings(panel, ["AAPL", "MSFT"]) == review_holdings(OHLCV, ["AAPL", "MSFT"])
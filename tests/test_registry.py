@@ -0,0 +1,58 @@
+import os
+import textwrap
+import pytest
+from ml.registry.loader import Registry
+
+SPEC = """\
+name: momo_trend
+version: {version}
+artifact: ml/strategies/momo_trend.py
+entrypoint: MomoTrend
+params:
+  ma_fast: {ma_fast}
+"""
+
+def _write(root, version, ma_fast):
+    path = root / "momo_trend" / f"{version}.yaml"
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(textwrap.dedent(SPEC.format(version=version, ma_fast=ma_fast)))
+    return path
+
+def test_versions_side_by_side_and_cached(tmp_path):
+    _write(tmp_path, "0.1.0", 50); _write(tmp_path, "0.10.0", 20); _write(tmp_path, "0.2.0", 30)
+    reg = Registry(tmp_path)
+    assert reg.versions("momo_trend") == ["0.1.0", "0.2.0", "0.10.0"]
+    assert reg.resolve("momo_trend") == "momo_trend@0.10.0"
+    a, _ = reg.model("momo_trend@0.1.0")
+    b, spec = reg.model("momo_trend@0.2.0")
+    assert (a.cfg.ma_fast, b.cfg.ma_fast, spec["version"]) == (50, 30, "0.2.0")
+    assert reg.model("momo_trend@0.1.0")[0] is a
+    with pytest.raises(KeyError):
+        reg.resolve("momo_trend@9.9.9")
+
+def test_hot_reload_and_new_versions(tmp_path):
+    path = _write(tmp_path, "0.1.0", 50)
+    reg = Registry(tmp_path)
+    old, _ = reg.model("momo_trend")
+    _write(tmp_path, "0.1.0", 40)
+    st = path.stat(); os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    new, _ = reg.model("momo_trend@0.1.0")
+    assert new is not old and new.cfg.ma_fast == 40
+    _write(tmp_path, "0.3.0", 10)
+    assert reg.model("momo_trend@0.3.0")[0].cfg.ma_fast == 10
+
+def test_misplaced_spec_rejected(tmp_path):
+    _write(tmp_path, "0.1.0", 50).rename(tmp_path / "momo_trend" / "0.2.0.yaml")
+    with pytest.raises(ValueError):
+        Registry(tmp_path)
+
+def test_prerelease_versions_and_deleted_specs(tmp_path):
+    for v in ("1.0.0", "1.0.0rc1", "0.9.0"):
+        _write(tmp_path, v, 50)
+    reg = Registry(tmp_path)
+    assert reg.versions("momo_trend") == ["0.9.0", "1.0.0rc1", "1.0.0"]
+    assert reg.resolve("momo_trend") == "momo_trend@1.0.0"
+    (tmp_path / "momo_trend" / "1.0.0.yaml").unlink()
+    with pytest.raises(KeyError):
+        reg.model("momo_trend@1.0.0")
+    assert reg.resolve("momo_trend") == "momo_trend@1.0.0rc1"
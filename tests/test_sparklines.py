@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from apps.backend.main import app
+from libs.md.silver import write_ohlcv
+from libs.md.sparklines import SPARKLINES, lttb, read_sparklines, write_sparklines
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=300)
+
+def test_lttb_keeps_ends_and_extremes():
+    y = np.sin(np.linspace(0, 6 * np.pi, 1000))
+    y[437] = 5.0                                   # a spike every-n-th sampling would miss
+    idx = lttb(y, 50)
+    assert len(idx) == 50 and idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0) and 437 in idx
+    assert list(lttb(y[:10], 50)) == list(range(10)) and list(lttb(y, 2)) == [0, 999]
+
+def test_sparklines_batch_endpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "data/silver/ohlcv"
+    write_ohlcv(OHLCV, root)
+    write_sparklines(OHLCV.index[-1], root, points=40)
+    meta, df = read_sparklines(SPARKLINES)
+    assert meta["points"] == 40 and df.groupby("symbol").size().max() == 40
+
+    client = TestClient(app)
+    r = client.get("/v1/md/sparklines", params={"symbol": "AAPL,MSFT,QQQ", "points": 40})
+    body = r.json()
+    assert r.status_code == 200 and body["missing"] == ["QQQ"]
+    assert list(body["series"]) == ["AAPL", "MSFT"]
+    aapl = body["series"]["AAPL"]
+    assert len(aapl["c"]) == 40 and aapl["ts"][-1] == str(OHLCV.index[-1].date())
+    closes = OHLCV[("AAPL", "Close")]
+    np.testing.assert_allclose(aapl["c"], closes.loc[pd.DatetimeIndex(aapl["ts"])].to_numpy(),
+                               rtol=1e-12)
+
+    # not precomputed
+    other = client.get("/v1/md/sparklines", params={"symbol": "AAPL", "points": 20}).json()
+    assert len(other["series"]["AAPL"]["c"]) == 20
+    assert other["series"]["AAPL"]["ts"][0] == aapl["ts"][0]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import apps.backend.main as main
+import apps.backend.services.stream_svc.api as stream
+from apps.backend.main import app
+from libs.md.feeds import Bar, QueueFeed, ReplayFeed, synth_session, write_replay
+from libs.md.panel import Panel
+from ml.strategies.holdings_review import KEYS, HoldingsReviewer
+from ml.strategies.momo_trend import MomoTrend
+from ml.strategies.online import OnlineFeatures, feature_keys
+from ml.strategies.streaming import StreamScorer
+from pipelines.mock_ingest import synth_ohlcv
+
+PANEL = Panel.from_frame(synth_ohlcv(periods=320), fields=["Close"])
+MODEL = MomoTrend({"top_frac": 0.4})
+HEAD = PANEL.slice(end=PANEL.dates[-2])
+DAY = PANEL.dates[-1]
+PREV_CLOSE = pd.Series(PANEL.field("Close")[-2], index=PANEL.symbols)
+
+def scorer():
+    st = OnlineFeatures(sorted(set(feature_keys(MODEL)) | set(KEYS)))
+    st.update(HEAD)
+    return StreamScorer(st, MODEL, "momo_trend@test")
+
+def last_bars(minute=0):
+    closes = PANEL.field("Close")[-1]
+    ts = DAY + pd.Timedelta(hours=16, minutes=minute)
+    return [Bar(s, ts, float(c)) for s, c in zip(PANEL.symbols, closes)]
+
+def test_provisional_bar_scores_like_the_end_of_day_batch():
+    sc = scorer()
+    before = sc.actions.copy()
+    # two batches, only touched symbols rescored
+    events = sc.apply(last_bars()[:2]) + sc.apply(last_bars()[2:])
+    want = MODEL.score(PANEL)
+    pd.testing.assert_series_equal(sc.scores(), want["scores"], rtol=1e-9)
+    assert sc.buy == want["signals"]["buy"]
+    review = {r["symbol"]: r for r in HoldingsReviewer(PANEL).review(list(PANEL.symbols))}
+    scored = {e["symbol"]: e for e in events if e["type"] == "score"}
+    for s, r in review.items():
+        assert scored[s]["action"] == r["action"]
+        assert scored[s]["metrics"]["r3m"] == pytest.approx(r["metrics"]["r3m"])
+    changed = {e["symbol"]: (e["from"], e["to"]) for e in events if e["type"] == "action"}
+    assert changed == {s: (before[j], review[s]["action"]) for j, s in enumerate(PANEL.symbols)
+                       if before[j] != review[s]["action"]}
+    assert all(e["latency_ms"] < 1000 for e in events)
+
+def test_stale_unknown_and_next_session_bars():
+    sc = scorer()
+    old = Bar("AAPL", HEAD.dates[-1] + pd.Timedelta(hours=12), 1.0)
+    assert sc.apply([old, Bar("ZZZZ", DAY, 1.0)]) == []
+    sc.apply(last_bars())
+    nxt = sc.apply([Bar("AAPL", DAY + pd.Timedelta(days=1, hours=10), 150.0)])
+    # provisional closes are dropped, not folded into the state
+    assert nxt[0] == {"type": "session", "closed": str(DAY.date()),
+                      "asof": str(HEAD.dates[-1].date()), "latency_ms": nxt[0]["latency_ms"]}
+    assert sc.state.asof == HEAD.dates[-1] and sc.live.sum() == 1
+    closes = pd.Series(sc.close, index=sc.state.symbols)
+    pd.testing.assert_series_equal(closes.drop("AAPL"), PREV_CLOSE.drop("AAPL"))
+
+def test_sse_endpoint_streams_replayed_session(tmp_path, monkeypatch):
+    path = write_replay(synth_session(PREV_CLOSE, DAY, every=30), tmp_path / "replay.jsonl")
+    monkeypatch.setattr(stream, "FEED", f"replay:{path}")
+    monkeypatch.setattr(stream, "load_feed", lambda: ReplayFeed(path, speed=0))
+    monkeypatch.setattr(stream, "_scorer", lambda ref: scorer())
+    monkeypatch.setattr(stream, "_HUBS", {})
+    monkeypatch.setattr(main, "WARMUP", False)
+    with TestClient(app) as client:
+        with client.stream("GET", "/v1/stream/insights", params={"symbol": "AAPL,MSFT"}) as r:
+            assert r.headers["content-type"].startswith("text/event-stream")
+            events = [json.loads(line[6:]) for line in r.iter_lines() if line.startswith("data: ")]
+        stats = client.get("/v1/stream/stats").json()
+    assert events[-1]["type"] == "end"
+    scored = [e for e in events if e["type"] == "score"]
+    assert {e["symbol"] for e in scored} == {"AAPL", "MSFT"}
+    assert 2 <= len(scored) <= 2 * 13   # bursts coalesce
+    assert scored[-1]["ts"].endswith("16:00:00")
+    assert stats["momo_trend@0.1.0"]["bars"] == 5 * 13
+
+def test_hub_runs_only_while_subscribed(tmp_path, monkeypatch):
+    path = write_replay(synth_session(PREV_CLOSE, DAY, every=60), tmp_path / "replay.jsonl")
+    scorers = []
+    monkeypatch.setattr(stream, "_scorer", lambda ref: scorers.append(ref) or scorer())
+
+    async def go():
+        monkeypatch.setattr(stream, "load_feed", lambda: ReplayFeed(path, speed=0))
+        hub = stream.Hub("replayed")
+        q = hub.subscribe()
+        while (await q.get())["type"] != "end":
+            pass
+        hub.unsubscribe(q)
+        late = hub.subscribe()              # after the end: snapshot + end, no second replay
+        assert (await late.get())["type"] == "end" and hub.task.done()
+        bars = hub.stats["bars"]
+
+        live = QueueFeed()
+        monkeypatch.setattr(stream, "load_feed", lambda: live)
+        hub = stream.Hub("live")
+        q = hub.subscribe()
+        live.put(last_bars()[0])
+        assert (await q.get())["type"] == "score"
+        hub.unsubscribe(q)                          # nobody listening: stop consuming the feed
+        await asyncio.sleep(0)
+        assert hub.task.cancelled()
+        hub.subscribe()                             # a new subscriber resumes on the same scorer
+        live.put(last_bars(1)[1])
+        await asyncio.sleep(0.05)
+        return bars, hub.stats["bars"]
+
+    replayed, live_bars = asyncio.run(go())
+    assert replayed == 5 * 6 and live_bars == 2 and scorers == ["replayed", "live"]
+
+def test_hub_rebuilds_scorer_when_persisted_state_changes(monkeypatch):
+    live, version = QueueFeed(), ["v1"]
+    monkeypatch.setattr(stream, "load_feed", lambda: live)
+    monkeypatch.setattr(stream, "_scorer", lambda ref: scorer())
+    monkeypatch.setattr(stream, "_state_version", lambda: version[0])
+
+    async def scored(q, bar):
+        live.put(bar)
+        while (e := await q.get())["type"] != "score" or e["symbol"] != bar.symbol:
+            pass
+
+    async def go():
+        hub = stream.Hub("live")
+        q = hub.subscribe()
+        await scored(q, last_bars()[0])
+        first = hub.scorer
+        await scored(q, last_bars(1)[1])
+        assert hub.scorer is first
+        version[0] = "v2"                           # the daily pipeline saved a new state
+        await scored(q, last_bars(2)[2])
+        hub.unsubscribe(q)
+        return first, hub.scorer
+
+    first, second = asyncio.run(go())
+    assert second is not first and second.live.sum() == 1
@@ -0,0 +1,32 @@
+import json
+import pytest
+from libs.md.panel import Panel
+from ml.backtest.engine import BacktestCfg, run_backtest
+from ml.strategies.momo_trend import MomoTrend
+from pipelines.mock_ingest import synth_ohlcv
+from pipelines.sweep import expand, run_sweep
+
+SPEC = {
+    "strategy": "momo_trend@0.1.0",
+    "params": {"ma_fast": [20, 50], "ma_slow": [50, 100], "top_frac": [0.2]},
+    "backtest": {"start": "2023-09-01", "rebalance_every": 10},
+}
+
+def test_expand_grid_and_random():
+    base = {"ma_fast": 50, "vol_norm_window": 14}
+    grid = expand(SPEC, base)
+    assert len(grid) == 3 and all(c["ma_fast"] < c["ma_slow"] for c in grid)
+    assert all(c["vol_norm_window"] == 14 for c in grid)
+    sample = expand({**SPEC, "search": "random", "n_samples": 2, "seed": 1}, base)
+    assert len(sample) == 2
+    assert sample == expand({**SPEC, "search": "random", "n_samples": 2, "seed": 1}, base)
+
+def test_pool_results_match_serial_backtest():
+    panel = Panel.from_frame(synth_ohlcv([f"S{i}" for i in range(20)], periods=300), ["Close"])
+    results = run_sweep(SPEC, panel, workers=2)
+    assert len(results) == 3
+    row = results.iloc[0]
+    model = MomoTrend(json.loads(row["params"]))
+    serial = run_backtest(model.composite(panel), panel.frame("Close"), start="2023-09-01",
+                          cfg=BacktestCfg(top_frac=0.2, rebalance_every=10))
+    assert row["sharpe"] == pytest.approx(serial.stats["sharpe"])
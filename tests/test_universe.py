@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from libs.md.panel import Panel
+from libs.md.universe import Membership, load_membership, update_membership
+from ml.backtest.engine import BacktestCfg, run_backtest
+from ml.strategies.momo_trend import MomoTrend
+from pipelines.mock_ingest import synth_ohlcv
+
+OHLCV = synth_ohlcv(periods=300, start="2023-01-01")
+DATES = OHLCV.index
+SYMS = OHLCV.columns.get_level_values(0).unique().tolist()
+
+def history() -> pd.DataFrame:
+    """First half: all but the last symbol; second half: all but the first."""
+    frame = pd.DataFrame(True, index=DATES, columns=SYMS)
+    frame.iloc[:150, -1] = False
+    frame.iloc[150:, 0] = False
+    return frame
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def constituents(self, index_symbol, date):
+        self.calls.append(("constituents", date))
+        rows = history().loc[:date]
+        return list(rows.columns[rows.iloc[-1]]) if len(rows) else []
+
+    def index_membership(self, symbols, index_symbol, start=None, end=None):
+        self.calls.append(("index_membership", tuple(symbols)))
+        return history().loc[start:end, symbols]
+
+def test_bitmap_keeps_change_rows_and_answers_as_of():
+    m = Membership.from_frame("^SPX", history())
+    assert len(m.dates) == 2 and m.bits.shape == (2, (len(SYMS) + 7) // 8)
+    assert m.members(DATES[149]) == SYMS[:-1]
+    assert m.members(DATES[200]) == SYMS[1:]
+    assert m.members(DATES[0] - pd.Timedelta(days=1)) == []
+    assert m.ever(DATES[10], DATES[20]) == SYMS[:-1] and m.ever() == SYMS
+
+    mask = m.mask(DATES[140:160], [SYMS[0], "NOPE"])
+    assert mask[SYMS[0]].tolist() == [True] * 10 + [False] * 10 and not mask["NOPE"].any()
+    pd.testing.assert_frame_equal(m.mask(DATES), history(), check_freq=False)
+
+def test_update_builds_once_then_appends_snapshots(tmp_path):
+    client = FakeClient()
+    m = update_membership("^SPX", DATES[-2], client, start=DATES[0], root=tmp_path)
+    # SYMS[0] left the index before the first build: found on a monthly snapshot
+    assert client.calls[-1] == ("index_membership", tuple(sorted(SYMS)))
+    assert m.asof == DATES[-2] and m.members(DATES[0]) == sorted(SYMS[:-1])
+
+    client.calls.clear()
+    m = update_membership("^SPX", DATES[-1], client, start=DATES[0], root=tmp_path)
+    assert client.calls == [("constituents", str(DATES[-1].date()))]
+    assert len(m.dates) == 2  # unchanged membership adds no row
+    stored = load_membership("^SPX", tmp_path)
+    assert stored.asof == DATES[-1] and stored.members(DATES[-1]) == sorted(SYMS[1:])
+
+    grown = stored.with_snapshot(DATES[-1] + pd.Timedelta(days=1), ["NEW"])
+    assert grown.members(grown.asof) == ["NEW"] and grown.members(DATES[-1]) == sorted(SYMS[1:])
+
+def test_non_members_are_never_ranked_or_held():
+    panel = Panel.from_frame(OHLCV, fields=["Close"])
+    universe = Membership.from_frame("^SPX", history()).mask(panel.dates, panel.symbols)
+    model = MomoTrend({"top_frac": 0.5})
+    assert SYMS[0] not in model.score(panel, universe=universe)["scores"].index
+
+    scores = model.composite(panel)
+    res = run_backtest(scores, panel.frame("Close"), start=DATES[210],
+                       cfg=BacktestCfg(top_frac=0.5, rebalance_every=5), universe=universe)
+    assert (res.weights[SYMS[0]] == 0).all()
+    assert np.isnan(model.composite(panel, universe=universe)[SYMS[0]].iloc[150:]).all()
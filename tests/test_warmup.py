@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+import time
+from fastapi.testclient import TestClient
+import apps.backend.main as main
+from apps.backend import warmup
+from apps.backend.services import artifacts
+from libs.md.silver import write_ohlcv
+from pipelines.mock_ingest import synth_ohlcv
+
+def test_main_imports_without_the_data_stack():
+    code = ("import sys, json, apps.backend.main; "
+            "heavy = ('pandas', 'pyarrow', 'yaml', 'requests_oauthlib', 'httpx'); "
+            "print(json.dumps([m for m in heavy if m in sys.modules]))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.splitlines()[-1]) == []
+
+def test_ready_only_after_warmup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_ohlcv(synth_ohlcv(periods=260), tmp_path / "data/silver/ohlcv")
+    (tmp_path / "data/gold").mkdir()
+    artifacts.CACHE.clear()
+    monkeypatch.setattr(warmup, "STATE", {"ready": False, "started": None, "finished": None,
+                                          "steps": {}, "error": None})
+    client = TestClient(main.app)   # no lifespan: warmup not started
+    assert client.get("/healthz").json() == {"live": True}
+    r = client.get("/readyz")
+    assert r.status_code == 503 and r.json()["ready"] is False and r.json()["missing"] == []
+    monkeypatch.setattr(main, "WARMUP", True)
+    with TestClient(main.app) as client:   # lifespan starts the warmup thread
+        deadline = time.monotonic() + 30
+        while not warmup.STATE["ready"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        r = client.get("/readyz")
+        health = client.get("/health").json()
+    assert r.status_code == 200 and r.json()["warmup"]["error"] is None
+    assert set(r.json()["warmup"]["steps"]) == {name for name, _ in warmup.STEPS}
+    assert health["live"] and health["ready"]
+    loads = artifacts.CACHE.stats["loads"]
+    keys = {k if isinstance(k, str) else k[0] for k in artifacts.CACHE._entries}
+    assert {"ohlcv", "reviewer", "model_scores"} <= keys
+    r = TestClient(main.app).post("/v1/analysis/portfolio/keep_or_replace",
+                                  json={"account_id": "a", "symbols": ["AAPL"]})
+    assert r.status_code == 200
+    assert artifacts.CACHE.stats["loads"] == loads   # the first request found everything warm